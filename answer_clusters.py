@@ -0,0 +1,119 @@
+"""Group near-identical answers to a question so teachers review each group once.
+
+Answers are clustered with average-linkage agglomerative clustering on cosine
+distance (ANSWER_CLUSTER_THRESHOLD is the minimum average similarity inside a
+cluster). The embeddings are the ones recorded while grading (answer_store.py);
+only answers not found there are encoded. Each cluster is shown through its
+most central answer, and a teacher score for that answer is applied to every
+submission in the cluster (shared_state.override_scores). Clusterings are
+cached per process until a question's set of answers changes, so the teacher
+view's reruns neither re-encode nor re-cluster.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import ANSWER_CLUSTER_THRESHOLD
+from answer_keys import question_digest
+from answer_store import load_answer_embeddings, record_answer_embeddings
+from eval_service import embedding_model_id
+from result_cache import answer_digest
+from shared_state import load_assessment, response_score
+
+MAX_CACHED_CLUSTERINGS = 64  # Question/answer-set clusterings kept for the teacher view's reruns
+
+_clusterings: "OrderedDict[tuple, List[Tuple[np.ndarray, int]]]" = OrderedDict()
+_clusterings_lock = threading.Lock()
+
+def cluster_embeddings(embeddings: np.ndarray, threshold: float = ANSWER_CLUSTER_THRESHOLD) -> np.ndarray:
+    """Cluster label per row"""
+    if len(embeddings) < 2:
+        return np.zeros(len(embeddings), dtype=int)
+    from sklearn.cluster import AgglomerativeClustering
+    return AgglomerativeClustering(n_clusters=None, metric='cosine', linkage='average',
+                                   distance_threshold=1 - threshold).fit_predict(embeddings)
+
+def representative(embeddings: np.ndarray, weights: np.ndarray) -> int:
+    """Row with the highest (weighted) similarity to the rest of its cluster"""
+    return int(np.argmax((embeddings @ embeddings.T) @ weights))
+
+def answer_vectors(question: Dict[str, Any], answers: List[str]) -> Optional[np.ndarray]:
+    """One normalized vector per answer; stored ones are reused, the rest encoded and stored"""
+    from evaluate import encode_answer_vectors
+
+    digest = question_digest(question)
+    stored = load_answer_embeddings(digest)
+    missing = [i for i, answer in enumerate(answers) if answer_digest(answer) not in stored]
+    vectors = [stored.get(answer_digest(answer)) for answer in answers]
+    if missing:
+        encoded = encode_answer_vectors([answers[i] for i in missing])
+        if encoded is None:
+            return None
+        record_answer_embeddings([digest] * len(missing), [answers[i] for i in missing], encoded)
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+    return np.stack(vectors).astype(np.float32)
+
+def cluster_groups(question: Dict[str, Any], digests: List[str], answers: List[str], counts: List[int],
+                   threshold: float = ANSWER_CLUSTER_THRESHOLD) -> Optional[List[Tuple[np.ndarray, int]]]:
+    """(rows, most central row) per cluster of distinct answers, cached until the answers or their counts change"""
+    key = (question_digest(question), threshold, embedding_model_id(), tuple(zip(digests, counts)))
+    with _clusterings_lock:
+        if key in _clusterings:
+            _clusterings.move_to_end(key)
+            return _clusterings[key]
+    vectors = answer_vectors(question, answers)
+    if vectors is None:
+        return None
+    labels = cluster_embeddings(vectors, threshold)
+    clustering = []
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        weights = np.array([counts[row] for row in rows], dtype=np.float32)
+        clustering.append((rows, int(rows[representative(vectors[rows], weights)])))
+    with _clusterings_lock:
+        _clusterings[key] = clustering
+        while len(_clusterings) > MAX_CACHED_CLUSTERINGS:
+            _clusterings.popitem(last=False)
+    return clustering
+
+def question_clusters(archive_id: str, question_num: int, history: List[Dict[str, Any]],
+                      threshold: float = ANSWER_CLUSTER_THRESHOLD) -> List[Dict[str, Any]]:
+    """Clusters of the stored answers to one question, largest first"""
+    questions = load_assessment(archive_id)
+    if not questions or question_num > len(questions):
+        return []
+    # Identical answers are clustered once
+    distinct: Dict[str, Dict[str, Any]] = {}
+    for index, entry in enumerate(history):
+        if entry.get('assessment_id') != archive_id or 'responses' not in entry:
+            continue
+        response = entry['responses'][question_num - 1]
+        group = distinct.setdefault(answer_digest(response['answer']), {
+            'answer': response['answer'], 'history_indexes': [], 'scores': []
+        })
+        group['history_indexes'].append(index)
+        group['scores'].append(response_score(response))
+    if not distinct:
+        return []
+
+    groups = list(distinct.values())
+    clustering = cluster_groups(questions[question_num - 1], list(distinct),
+                                [group['answer'] for group in groups],
+                                [len(group['history_indexes']) for group in groups], threshold)
+    if clustering is None:
+        return []
+    clusters = []
+    for rows, central_row in clustering:
+        central = groups[central_row]
+        clusters.append({
+            'representative': central['answer'],
+            'representative_score': central['scores'][0],
+            'size': sum(len(groups[row]['history_indexes']) for row in rows),
+            'distinct': len(rows),
+            'history_indexes': [index for row in rows for index in groups[row]['history_indexes']],
+            'scores': [score for row in rows for score in groups[row]['scores']]
+        })
+    return sorted(clusters, key=lambda cluster: -cluster['size'])
@@ -0,0 +1,154 @@
+"""Answer keys compiled once when the teacher publishes an assessment.
+
+save_questions() compiles an artifact holding, for every question,
+its normalized MCQ key, parsed word limit, per-key-point keyword lists and
+float16 embeddings of the model answer and key points. The artifact lives next
+to shared_questions.json, so evaluation in any process (after any restart)
+only has to encode student answers. Entries are looked up by a digest of the
+question itself, so a stale artifact simply isn't used.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from semantic_model import model_id
+
+ANSWER_KEYS_FILE = Path("answer_keys.npz")
+
+COMMON_WORDS = {'the', 'is', 'are', 'was', 'were', 'a', 'an', 'and', 'or', 'but',
+                'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
+
+_loaded = None  # ((mtime, embedding model), {digest: entry})
+_load_lock = threading.Lock()
+
+def extract_keywords(text):
+    words = text.lower().split()
+    keywords = [w for w in words if w not in COMMON_WORDS and len(w) > 3]
+    return keywords[:5]
+
+def parse_word_limit(word_limit) -> Optional[Tuple[int, int]]:
+    """(min_words, max_words) for a word limit such as 'SA (50-80 words)', or None"""
+    if isinstance(word_limit, (tuple, list)):
+        return tuple(word_limit) if word_limit else None
+    if word_limit is None:
+        return None
+    if 'VSA' in str(word_limit) or '20-30' in str(word_limit):
+        return (15, 40)
+    elif 'SA' in str(word_limit) or '50' in str(word_limit):
+        return (40, 100)
+    elif 'LA' in str(word_limit) or '100' in str(word_limit):
+        return (80, 180)
+    return None
+
+def normalize_choice(answer) -> str:
+    return str(answer).strip().upper() if answer is not None else ""
+
+def question_digest(question: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(question, sort_keys=True, default=str).encode()).hexdigest()
+
+def get_question_kind(question: Dict[str, Any]) -> str:
+    if 'options' in question:
+        return 'mcq'
+    if 'labels' in question:
+        return 'diagram'
+    return 'descriptive'
+
+def get_question_type(question: Dict[str, Any]) -> str:
+    """Curriculum type (VSA, SA, LA, CASE_STUDY, ...) where the question records it, else its kind"""
+    return question.get('type') or question.get('question_type') or get_question_kind(question)
+
+def compile_answer_keys(questions: List[Dict[str, Any]], model=None) -> Dict[str, Any]:
+    """Everything evaluation derives from the questions alone. model=None skips embeddings."""
+    entries = []
+    texts = []
+    for question in questions:
+        kind = get_question_kind(question)
+        entry = {'digest': question_digest(question), 'kind': kind}
+        if kind == 'mcq':
+            entry['correct_answer'] = normalize_choice(question.get('correct_answer'))
+        elif kind == 'diagram':
+            entry['label_keywords'] = {
+                label: [w for w in str(name).lower().split() if len(w) > 3]
+                for label, name in question.get('labels', {}).items()
+            }
+        else:
+            key_points = question.get('key_points', [])
+            entry['word_limit'] = parse_word_limit(question.get('word_limit', '50-100 words'))
+            entry['keywords'] = [extract_keywords(point) for point in key_points]
+            # Rows [emb_start, emb_end): model answer, then each key point
+            entry['emb_start'] = len(texts)
+            texts.extend([question.get('model_answer', '')] + list(key_points))
+            entry['emb_end'] = len(texts)
+        entries.append(entry)
+
+    embeddings = None
+    if model is not None and texts:
+        embeddings = np.asarray(
+            model.encode(texts, convert_to_numpy=True, show_progress_bar=False), dtype=np.float16
+        )
+    return {'entries': entries, 'embeddings': embeddings, 'embedding_model': model_id()}
+
+def save_answer_keys(compiled: Dict[str, Any], path: Path = ANSWER_KEYS_FILE):
+    """Write the artifact atomically"""
+    embeddings = compiled['embeddings']
+    if embeddings is None:
+        embeddings = np.zeros((0, 0), dtype=np.float16)
+    meta = {'entries': compiled['entries'], 'embedding_model': compiled['embedding_model']}
+    temp_file = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(temp_file, embeddings=embeddings, meta=np.array(json.dumps(meta)))
+    temp_file.replace(path)
+
+def load_answer_keys(path: Path = ANSWER_KEYS_FILE) -> Dict[str, Dict[str, Any]]:
+    """Compiled entries by question digest, re-read only when the artifact changes"""
+    global _loaded
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+    # Keyed by the model too, so embeddings are picked up once a preload finishes
+    version = (mtime, model_id())
+    with _load_lock:
+        if _loaded is not None and _loaded[0] == version:
+            return _loaded[1]
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                embeddings = data['embeddings']
+        except Exception:
+            return {}
+        usable = embeddings.size > 0 and meta['embedding_model'] is not None \
+            and meta['embedding_model'] == version[1]
+        keys = {}
+        for entry in meta['entries']:
+            if entry['kind'] == 'descriptive' and usable:
+                rows = embeddings[entry['emb_start']:entry['emb_end']].astype(np.float32)
+                entry['model_emb'] = rows[0:1]
+                entry['key_point_embs'] = rows[1:]
+            keys[entry['digest']] = entry
+        _loaded = (version, keys)
+        return keys
+
+def get_answer_key(question: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return load_answer_keys().get(question_digest(question))
+
+def publish_answer_keys(questions: List[Dict[str, Any]]) -> bool:
+    """Compile and save keys for a newly published assessment"""
+    from eval_service import service_enabled, remote_publish
+    if service_enabled():
+        published = remote_publish(questions)
+        if published is not None:
+            return published
+    from semantic_model import get_model
+    try:
+        save_answer_keys(compile_answer_keys(questions, get_model()))
+        return True
+    except Exception:
+        return False
+
+def clear_answer_keys():
+    ANSWER_KEYS_FILE.unlink(missing_ok=True)
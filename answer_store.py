@@ -0,0 +1,104 @@
+"""Embeddings of submitted answers, kept per question for review tools.
+
+evaluate.py encodes every descriptive answer it scores semantically. Instead of
+discarding those vectors after scoring they are recorded here, keyed by
+question digest and answer digest (the result cache's normalization), so
+clustering and similarity checks don't encode the class again.
+
+Each record call appends a small shard, ANSWER_STORE_DIR/<question digest>/
+<time>-<pid>.npz, so concurrent processes (web workers, the evaluation service)
+never overwrite each other. Readers merge the shards and compact them once
+there are many. Answers that aren't found (evaluated before the store existed,
+or by another embedding model) are simply encoded again by the caller.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import ENABLE_ANSWER_STORE
+from eval_service import embedding_model_id
+from result_cache import answer_digest
+
+ANSWER_STORE_DIR = Path("answer_store")
+MAX_SHARDS = 32  # Shards per question before they are merged into one
+
+_tables: Dict[str, Dict[str, Any]] = {}  # question digest -> {'shards': set, 'vectors': {answer digest: vector}}
+_lock = threading.Lock()
+
+def _question_dir(question_digest: str) -> Path:
+    return ANSWER_STORE_DIR / question_digest
+
+def _write_shard(directory: Path, keys: List[str], embeddings: np.ndarray, embedding_model: Optional[str]):
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+    temp_file = directory / f"{name}.tmp.npz"
+    np.savez(temp_file, keys=np.array(keys), embeddings=embeddings.astype(np.float16),
+             meta=np.array(json.dumps({'embedding_model': embedding_model})))
+    temp_file.replace(directory / f"{name}.npz")
+
+def record_answer_embeddings(question_digests: Sequence[str], answers: Sequence[Any], embeddings: np.ndarray):
+    """Store answer vectors (row i belongs to answers[i] of question_digests[i])"""
+    if not ENABLE_ANSWER_STORE or not len(answers):
+        return
+    by_question: Dict[str, Dict[str, int]] = {}
+    for row, (digest, answer) in enumerate(zip(question_digests, answers)):
+        by_question.setdefault(digest, {})[answer_digest(answer)] = row
+    current_model = embedding_model_id()
+    for digest, rows in by_question.items():
+        try:
+            _write_shard(_question_dir(digest), list(rows), np.asarray(embeddings)[list(rows.values())],
+                         current_model)
+        except OSError:
+            pass  # Review tools re-encode what they can't find
+
+def _read_shard(path: Path):
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        return list(data['keys']), data['embeddings'].astype(np.float32), meta['embedding_model']
+
+def _compact(directory: Path, shards: List[Path], vectors: Dict[str, np.ndarray], embedding_model: str):
+    """Replace many shards with one holding the merged vectors"""
+    try:
+        _write_shard(directory, list(vectors), np.stack(list(vectors.values())), embedding_model)
+        for shard in shards:
+            shard.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+def load_answer_embeddings(question_digest: str) -> Dict[str, np.ndarray]:
+    """{answer digest: normalized vector} recorded for a question with the current model"""
+    directory = _question_dir(question_digest)
+    shards = sorted(directory.glob('*.npz')) if directory.is_dir() else []
+    shards = [shard for shard in shards if not shard.name.endswith('.tmp.npz')]
+    current_model = embedding_model_id()
+    with _lock:
+        table = _tables.get(question_digest)
+        if table is None or table['model'] != current_model:
+            table = {'model': current_model, 'shards': set(), 'vectors': {}}
+            _tables[question_digest] = table
+        for shard in shards:
+            if shard.name in table['shards']:
+                continue
+            try:
+                keys, embeddings, embedding_model = _read_shard(shard)
+            except (OSError, ValueError, KeyError):
+                continue  # Removed by a compaction in another process
+            table['shards'].add(shard.name)
+            if embedding_model == current_model:
+                table['vectors'].update(zip(keys, embeddings))
+        vectors = dict(table['vectors'])
+    if len(shards) > MAX_SHARDS and vectors:
+        _compact(directory, shards, vectors, current_model)
+    return vectors
+
+def clear_answer_store():
+    with _lock:
+        _tables.clear()
+    if ANSWER_STORE_DIR.is_dir():
+        for shard in ANSWER_STORE_DIR.glob('*/*.npz'):
+            shard.unlink(missing_ok=True)
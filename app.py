@@ -1,19 +1,36 @@
 import streamlit as st
 import time
+import uuid
 from datetime import datetime
 import io
 
-from config import API_avai, REQUEST_COOLDOWN, MIN_CONTENT_LENGTH, DAILY_LIMIT, OPTIMAL_CONTENT_LENGTH, MAX_IMAGE_SIZE_KB
+from config import API_avai, model, REQUEST_COOLDOWN, MIN_CONTENT_LENGTH, DAILY_LIMIT, BACKGROUND_DAILY_LIMIT, OPTIMAL_CONTENT_LENGTH, MAX_IMAGE_SIZE_KB
+from config import JOB_WORKERS, JOB_POLL_INTERVAL, PRELOAD_SEMANTIC_MODEL, EVAL_SERVICE_URL
+from config import ENABLE_LLM_GRADING, ENABLE_BACKGROUND_EVALUATION, DEBUG_MODE, ENABLE_EVAL_METRICS
+from eval_metrics import export_json
 from extract import extract_pdf, extract_docx
-from question_generator import generate_questions
-from evaluate import evaluate_answer, calculate_total_score, evaluate_batch
-from curriculum import BOARDS, CLASSES, ALL_SUBJECTS, QUESTION_TYPES, get_chapters, get_keywords_for_bloom
-from shared_state import save_questions, load_questions, save_student_result, load_student_history
+from job_queue import submit_job, latest_job, update_job, load_job_images, start_workers
+from evaluate import evaluate_answer, calculate_total_score, evaluate_batch, embedding_cache_stats, evaluate_objective
+from semantic_model import preload as preload_semantic_model, model_status
+from result_cache import result_cache_stats
+from eval_service import service_enabled, remote_status
+from curriculum import BOARDS, CLASSES, ALL_SUBJECTS, QUESTION_TYPES, get_chapters, get_keywords_for_bloom, get_exam_pattern
+from preprocess import content_fingerprint, start_preprocessing, get_prepared, get_prepared_cached_questions, is_probed_hit
+from rate_limit import daily_quota
+from ncert_references import get_syllabus_content
+from shared_state import (save_questions, load_questions, load_student_history, assessment_id, override_scores,
+                          response_score, load_similarity_flags)
+from answer_keys import get_question_kind
+from answer_clusters import question_clusters
+from submissions import run_submission
 from auth import login_page, register_page, logout, check_auth, init_users
 
 
 # Initialize
 init_users()
+if PRELOAD_SEMANTIC_MODEL and not EVAL_SERVICE_URL:
+    # With an evaluation service the model lives there, not in every web worker
+    preload_semantic_model()
 
 st.set_page_config(
     page_title="BloomSetu",
@@ -72,9 +89,23 @@ def can_make_request():
     st.session_state.last_request_time = time.time()
     return True
 
+def show_timings(timings):
+    """Per-question grading times (DEBUG_MODE)"""
+    st.caption(f"Model wait: {timings['model_seconds'] * 1000:.0f} ms")
+    st.dataframe(
+        [{'Question': t['question_num'], 'Type': t['kind'], 'Step': t['step'],
+          'ms': round(t['seconds'] * 1000, 1), 'Step ms': round(t['step_seconds'] * 1000, 1)}
+         for t in timings['questions']],
+        hide_index=True
+    )
+
 init_session_state()
 init_quota_tracking()
 
+if JOB_WORKERS > 0:
+    start_workers(JOB_WORKERS)
+poll_jobs = False  # Set when a background job is still running
+
 # Header with logout
 col1, col2 = st.columns([6, 1])
 with col1:
@@ -122,6 +153,29 @@ with st.sidebar:
 
     st.divider()
     st.success("API Connected" if API_avai else "Demo Mode")
+    service_status = remote_status() if service_enabled() else None
+    if service_status:
+        st.caption("🧠 Grading via evaluation service")
+        grading_status = service_status['model']
+        cache_stats = service_status['embedding_cache']
+        results_stats = service_status['result_cache']
+    else:
+        grading_status = model_status()
+        cache_stats = embedding_cache_stats()
+        results_stats = result_cache_stats()
+    if grading_status['status'] == 'ready':
+        st.caption(f"🧠 Grading model ready ({grading_status['load_seconds']:.1f}s load)")
+        if cache_stats['hit_rate'] is not None:
+            st.caption(
+                f"Key embedding cache: {cache_stats['hit_rate']:.0%} hits, {cache_stats['entries']} entries, "
+                f"{cache_stats['bytes'] / 1024 / 1024:.1f}/{cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+            )
+        if results_stats['hit_rate'] is not None:
+            st.caption(f"Result cache: {results_stats['hit_rate']:.0%} hits, {results_stats['entries']} answers")
+    elif grading_status['status'] in ('loading', 'not_loaded'):
+        st.caption("🧠 Grading model loading...")
+    elif grading_status['status'] == 'unavailable':
+        st.caption("🧠 Keyword grading (semantic model unavailable)")
 
     st.divider()
     st.markdown("### Statistics")
@@ -131,6 +185,16 @@ with st.sidebar:
         if API_avai:
             remaining = DAILY_LIMIT - st.session_state.quota_data['count']
             st.metric("API Calls Today", f"{remaining}/{DAILY_LIMIT}")
+            st.metric("Background API Calls Left", f"{daily_quota().remaining()}/{BACKGROUND_DAILY_LIMIT}")
+            if len(model.members) > 1:
+                with st.expander("Model Pool"):
+                    for member in model.stats():
+                        latency = f"{member['latency']:.1f}s" if member['latency'] is not None else "-"
+                        st.caption(
+                            f"{member['name']}: health {member['health']:.2f}, latency {latency}, "
+                            f"used {member['quota_used']}/{member['quota_limit'] or '∞'}"
+                            + (" (cooling down)" if member['cooling_down'] else "")
+                        )
         
         history = load_student_history()
         st.metric("Student Assessments", len(history))
@@ -170,7 +234,13 @@ if st.session_state.role == "teacher":
                 )
             else:
                 uploaded_file = st.file_uploader("Upload PDF or DOCX", type=['pdf', 'docx'])
-                if uploaded_file:
+                upload_id = getattr(uploaded_file, 'file_id', None) or (
+                    f"{uploaded_file.name}-{uploaded_file.size}" if uploaded_file else None
+                )
+                if uploaded_file and upload_id == st.session_state.get('extracted_upload_id'):
+                    # Already extracted on a previous rerun
+                    content = st.session_state.extracted_content
+                elif uploaded_file:
                     with st.spinner("Extracting text..."):
                         if uploaded_file.name.endswith('.pdf'):
                             content, images = extract_pdf(uploaded_file)
@@ -180,13 +250,14 @@ if st.session_state.role == "teacher":
                             st.session_state.extracted_images = []
                         if not content:
                             content = ""
-                    if content:
-                        st.session_state.extracted_content = content
-                        with st.expander("Preview"):
-                            st.text(content[:1500] + ("..." if len(content) > 1500 else ""))
-                            if st.session_state.get('extracted_images'):
-                                st.image(st.session_state.extracted_images, caption=[f"Image {i+1}" for i in range(len(st.session_state.extracted_images))])
-                        st.success(f"Extracted {len(content)} characters" + (f" and {len(st.session_state.extracted_images)} images" if st.session_state.get('extracted_images') else ""))
+                    st.session_state.extracted_upload_id = upload_id
+                if uploaded_file and content:
+                    st.session_state.extracted_content = content
+                    with st.expander("Preview"):
+                        st.text(content[:1500] + ("..." if len(content) > 1500 else ""))
+                        if st.session_state.get('extracted_images'):
+                            st.image(st.session_state.extracted_images, caption=[f"Image {i+1}" for i in range(len(st.session_state.extracted_images))])
+                    st.success(f"Extracted {len(content)} characters" + (f" and {len(st.session_state.extracted_images)} images" if st.session_state.get('extracted_images') else ""))
 
         with col2:
             st.subheader("Question Settings")
@@ -212,15 +283,51 @@ if st.session_state.role == "teacher":
             keywords = get_keywords_for_bloom(bloom_level)
             st.caption(f"Keywords: {', '.join(keywords[:3])}")
 
+            curriculum_info = {
+                'board': st.session_state.board,
+                'class': st.session_state.class_level,
+                'subject': st.session_state.subject,
+                'chapter': st.session_state.chapter,
+                'num_questions': num_questions,
+                'question_type': q_type,
+                'bloom_level': bloom_level
+            }
+
+            # Pre-process the material while the teacher picks settings (see preprocess.py)
+            if content and len(content) >= MIN_CONTENT_LENGTH:
+                images = st.session_state.get('extracted_images', [])
+                handle = st.session_state.get('preprocessing')
+                if not handle or handle['fingerprint'] != content_fingerprint(content, images, curriculum_info):
+                    st.session_state.preprocessing = start_preprocessing(
+                        content, images, curriculum_info,
+                        [{'question_type': q_type, 'bloom_level': bloom_level, 'num_questions': num_questions}]
+                    )
+                elif is_probed_hit(handle, curriculum_info):
+                    st.caption("⚡ Cached for these settings - no API call needed")
+
         st.divider()
 
         col_left, col_center, col_right = st.columns([1, 2, 1])
         with col_center:
             if st.button("🎯 Generate Assessment", type="primary", use_container_width=True):
+                if not content and st.session_state.chapter:
+                    # No material: generate from the NCERT syllabus (served from the prewarmed cache/bank)
+                    content = get_syllabus_content(st.session_state.subject, st.session_state.class_level, st.session_state.chapter)
+                # Only the API call is left if the upload pipeline has already run
+                images = st.session_state.get('extracted_images', [])
+                prepared = None
+                cached_questions = None
+                if content and len(content) >= MIN_CONTENT_LENGTH:
+                    prepared = get_prepared(st.session_state.get('preprocessing'), content, images, curriculum_info)
+                    cached_questions = get_prepared_cached_questions(prepared, curriculum_info)
+
                 if not content:
                     st.error("Please provide study material")
                 elif len(content) < MIN_CONTENT_LENGTH:
                     st.error(f"Content too short (minimum {MIN_CONTENT_LENGTH} characters)")
+                elif cached_questions:
+                    st.session_state.questions = cached_questions
+                    st.success(f"✅ Loaded {len(cached_questions)} cached questions (no API call needed)")
                 elif not can_make_request():
                     st.stop()
                 elif API_avai and not check_quota():
@@ -257,29 +364,109 @@ if st.session_state.role == "teacher":
                             for warning in warnings:
                                 st.info(warning)
                     
-                    curriculum_info = {
-                        'board': st.session_state.board,
-                        'class': st.session_state.class_level,
-                        'subject': st.session_state.subject,
-                        'chapter': st.session_state.chapter,
-                        'num_questions': num_questions,
-                        'question_type': q_type,
-                        'bloom_level': bloom_level
-                    }
-
-                    with st.spinner("Generating questions..."):
-                        was_using_api = API_avai and check_quota()
-                        images = st.session_state.get('extracted_images', [])
-                        questions = generate_questions(content, curriculum_info, images)
-                        if questions and was_using_api:
-                            increment_quota()
-
-                    if questions:
-                        st.session_state.questions = questions
-                        # Ensure images are preserved in session state
-                        if images:
-                            st.session_state.extracted_images = images
-                        st.success(f"✅ Generated {len(questions)} questions")
+                    # Generate in a background worker; the result is picked up below
+                    submit_job(
+                        'generate',
+                        {'content': content, 'curriculum_info': curriculum_info, 'prepared': prepared},
+                        st.session_state.username,
+                        images
+                    )
+
+        # Pick up background generation (survives reruns and page reloads)
+        generation_job = latest_job(st.session_state.username, 'generate')
+        if generation_job and not generation_job['consumed']:
+            if generation_job['status'] in ('queued', 'running'):
+                elapsed = time.time() - generation_job['created']
+                st.info(f"⏳ Generating questions in the background ({generation_job['status']}, {elapsed:.0f}s)...")
+                poll_jobs = True
+            elif generation_job['status'] == 'done':
+                update_job(generation_job['id'], consumed=True)
+                questions = generation_job['result']['questions']
+                if generation_job['result']['used_api']:
+                    increment_quota()
+                if questions:
+                    st.session_state.questions = questions
+                    # Restore images after a page reload
+                    images = load_job_images(generation_job)
+                    if images:
+                        st.session_state.extracted_images = images
+                    st.success(f"✅ Generated {len(questions)} questions")
+            else:
+                update_job(generation_job['id'], consumed=True)
+                st.error(f"Generation failed: {generation_job['error']}")
+
+        pattern = get_exam_pattern(st.session_state.board, st.session_state.class_level)
+        if pattern:
+            with st.expander("📄 Full Exam Paper"):
+                st.caption(" | ".join(
+                    f"{QUESTION_TYPES[t]['name']}: {p['count']} × {p['marks']} marks" for t, p in pattern.items()
+                ))
+                st.caption(
+                    f"Total: {sum(p['count'] for p in pattern.values())} questions, "
+                    f"{sum(p['count'] * p['marks'] for p in pattern.values())} marks. "
+                    "Uses the study material above, or the NCERT syllabus for the selected chapter."
+                )
+                publish_paper = st.checkbox("Publish when ready", value=True)
+                if st.button("📄 Build Full Paper", use_container_width=True):
+                    if not content and not st.session_state.chapter:
+                        st.error("Please provide study material or select a chapter")
+                    elif content and len(content) < MIN_CONTENT_LENGTH:
+                        st.error(f"Content too short (minimum {MIN_CONTENT_LENGTH} characters)")
+                    elif not can_make_request():
+                        st.stop()
+                    elif API_avai and not check_quota():
+                        st.error(f"Daily limit reached ({DAILY_LIMIT} assessments).")
+                    else:
+                        # Built by a background worker; progress and the paper are picked up below
+                        submit_job(
+                            'paper',
+                            {
+                                'content': content or None,
+                                'base_info': {
+                                    'board': st.session_state.board,
+                                    'class': st.session_state.class_level,
+                                    'subject': st.session_state.subject,
+                                    'chapter': st.session_state.chapter,
+                                    'bloom_level': bloom_level
+                                },
+                                'publish': publish_paper
+                            },
+                            st.session_state.username,
+                            st.session_state.get('extracted_images', []) if content else None
+                        )
+
+        # Pick up the background paper build (survives reruns and page reloads)
+        paper_job = latest_job(st.session_state.username, 'paper')
+        if paper_job and not paper_job['consumed']:
+            if paper_job['status'] in ('queued', 'running'):
+                progress = paper_job.get('progress') or {}
+                total = progress.get('total') or 0
+                st.progress(progress.get('done', 0) / total if total else 0.0,
+                            text=progress.get('message', "Planning paper..."))
+                poll_jobs = True
+            elif paper_job['status'] == 'done':
+                update_job(paper_job['id'], consumed=True)
+                paper = paper_job['result']
+                if paper['stats']['api_calls']:
+                    increment_quota()
+                if paper['questions']:
+                    st.session_state.questions = paper['questions']
+                    stats = paper['stats']
+                    st.success(
+                        f"✅ Built paper with {len(paper['questions'])} questions "
+                        f"({stats['api_calls']} API calls, {stats['cached']} cached, {stats['banked']} from bank)"
+                    )
+                    if paper['missing']:
+                        st.warning("⚠️ Missing: " + ", ".join(f"{n} {t}" for t, n in paper['missing'].items()))
+                    if paper['published']:
+                        st.success("✅ Paper published! Students can access it now.")
+                    elif paper_job['params']['publish']:
+                        st.error("Failed to publish")
+                else:
+                    st.error("Could not generate the paper")
+            else:
+                update_job(paper_job['id'], consumed=True)
+                st.error(f"Paper build failed: {paper_job['error']}")
 
         if st.session_state.questions:
             st.divider()
@@ -376,6 +563,7 @@ if st.session_state.role == "teacher":
 
             st.divider()
             st.markdown("### Recent Submissions")
+            similarity_flags = load_similarity_flags()
 
             for idx, attempt in enumerate(reversed(history[-10:]), 1):
                 username = attempt.get('username', 'Anonymous')
@@ -389,6 +577,57 @@ if st.session_state.role == "teacher":
                     with col_b:
                         st.write(f"✅ Score: {attempt['total_score']:.1f}/{attempt['max_score']}")
                         st.write(f"📊 Percentage: {attempt['percentage']:.1f}%")
+                    for flag in similarity_flags.get(attempt.get('submission_id'), []):
+                        st.warning(
+                            f"⚠️ Q{flag['question_num']} answer is {flag['similarity']:.0%} similar to "
+                            f"{flag['username'] or 'Anonymous'}'s"
+                        )
+
+            # Near-identical answers are reviewed once per cluster
+            published = load_questions()
+            descriptive = [num for num, q in enumerate(published, 1) if get_question_kind(q) == 'descriptive']
+            if descriptive:
+                st.divider()
+                st.markdown("### Review Answers by Cluster")
+                review_num = st.selectbox(
+                    "Question",
+                    descriptive,
+                    format_func=lambda num: f"Q{num}: {published[num - 1]['question'][:80]}"
+                )
+                archive_id = assessment_id(published)
+                if ENABLE_LLM_GRADING and API_avai:
+                    if st.button("🤖 Grade pending answers with Gemini"):
+                        # Many students' answers per request; semantic scores stay until grades arrive
+                        submit_job('llm_grade', {'min_pending': 1}, st.session_state.username)
+                        st.info("⏳ Grading in the background. Refresh to see updated scores")
+                with st.spinner("Grouping similar answers..."):
+                    clusters = question_clusters(archive_id, review_num, history)
+                if not clusters:
+                    st.info("No stored answers for this question yet")
+                else:
+                    max_marks = published[review_num - 1].get('marks', 5)
+                    st.caption(f"{sum(c['size'] for c in clusters)} answers in {len(clusters)} clusters")
+                    for k, cluster in enumerate(clusters, 1):
+                        low, high = min(cluster['scores']), max(cluster['scores'])
+                        score_range = f"{low}" if low == high else f"{low}–{high}"
+                        with st.expander(f"Cluster {k}: {cluster['size']} answers, score {score_range}/{max_marks}"):
+                            st.write(cluster['representative'] or "(empty answer)")
+                            if cluster['distinct'] > 1:
+                                st.caption(f"Most central of {cluster['distinct']} distinct answers")
+                            score = st.number_input(
+                                "Score for every answer in this cluster",
+                                min_value=0.0,
+                                max_value=float(max_marks),
+                                value=float(cluster['representative_score']),
+                                step=0.5,
+                                key=f"cluster_score_{review_num}_{k}"
+                            )
+                            if st.button(f"Apply to {cluster['size']} answers", key=f"cluster_apply_{review_num}_{k}"):
+                                if override_scores(archive_id, review_num, cluster['history_indexes'], score):
+                                    st.success("✅ Scores updated")
+                                    st.rerun()
+                                else:
+                                    st.error("Could not save the scores")
         else:
             st.info("No student submissions yet")
 
@@ -412,6 +651,20 @@ else:
         st.markdown("3. 📊 Get instant detailed feedback")
         st.stop()
 
+    # Pick up background grading (survives reruns and page reloads)
+    grading_job = None
+    evaluation_job = latest_job(st.session_state.username, 'evaluate')
+    if evaluation_job and not evaluation_job['consumed']:
+        if evaluation_job['status'] in ('queued', 'running'):
+            grading_job = evaluation_job
+            poll_jobs = True
+        elif evaluation_job['status'] == 'done':
+            update_job(evaluation_job['id'], consumed=True)
+            st.session_state.results = evaluation_job['result']
+        else:
+            update_job(evaluation_job['id'], consumed=True)
+            st.error(f"Grading failed: {evaluation_job['error']}")
+
     tab1, tab2 = st.tabs(["✍️ Take Assessment", "📊 View Results"])
 
     with tab1:
@@ -498,6 +751,8 @@ else:
 
         if answered < total_q:
             st.warning(f"⚠️ Please answer all questions ({answered}/{total_q})")
+        if grading_job:
+            st.info("⏳ Your answers are being graded. Open 📊 View Results to follow along")
 
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
@@ -505,36 +760,62 @@ else:
                 "📤 Submit Assessment",
                 type="primary",
                 use_container_width=True,
-                disabled=(answered < total_q)
+                disabled=(answered < total_q or grading_job is not None)
             ):
-                with st.spinner("Evaluating your answers..."):
-                    # Use batch evaluation for faster processing
-                    results = evaluate_batch(questions, st.session_state.student_answers)
-
-                score_summary = calculate_total_score(results)
-                st.session_state.results = {
-                    'results': results,
-                    **score_summary
-                }
-                
-                save_student_result({
-                    'username': st.session_state.username,
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'total_score': score_summary['total_score'],
-                    'max_score': score_summary['max_score'],
-                    'percentage': score_summary['percentage'],
-                    'num_questions': len(questions)
-                })
+                submission_id = uuid.uuid4().hex[:12]
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                answers = dict(st.session_state.student_answers)
+                if ENABLE_BACKGROUND_EVALUATION:
+                    # MCQ/diagram marks right away; descriptive grading continues in a job worker
+                    known = evaluate_objective(questions, answers)
+                    submit_job(
+                        'evaluate',
+                        {'submission_id': submission_id, 'questions': questions, 'answers': answers,
+                         'known': known, 'timestamp': timestamp},
+                        st.session_state.username
+                    )
+                    st.session_state.results = None
+                else:
+                    with st.spinner("Evaluating your answers..."):
+                        st.session_state.results = run_submission(
+                            submission_id, st.session_state.username, questions, answers, timestamp=timestamp
+                        )
                 
                 st.success("✅ Assessment submitted!")
                 time.sleep(1)
                 st.rerun()
 
     with tab2:
-        if st.session_state.results:
+        if grading_job:
+            partial = grading_job.get('partial')
+            if partial is None:
+                # Not started yet: only the marks given at submission
+                known = grading_job['params'].get('known', {})
+                partial = [{'question_num': idx, 'evaluation': known.get(str(idx))}
+                           for idx in range(1, len(grading_job['params']['questions']) + 1)]
+            graded = sum(1 for r in partial if r['evaluation'] is not None)
+            st.markdown("## ⏳ Grading your answers...")
+            st.progress(graded / len(partial), text=f"{graded}/{len(partial)} questions graded")
+            for r in partial:
+                if r['evaluation'] is None:
+                    st.caption(f"Question {r['question_num']} - grading...")
+                else:
+                    st.write(f"Question {r['question_num']} - "
+                             f"{r['evaluation']['score']:.1f}/{r['evaluation']['max_score']} marks")
+            if DEBUG_MODE and grading_job.get('timings'):
+                show_timings(grading_job['timings'])
+        elif st.session_state.results:
             results = st.session_state.results
             st.markdown("## 📊 Your Assessment Results")
 
+            # Later grading (Gemini or the teacher) replaces the instant scores
+            reviewed = next((h for h in load_student_history()
+                             if results.get('submission_id') and h.get('submission_id') == results['submission_id']),
+                            None)
+            if reviewed and reviewed['total_score'] != results['total_score']:
+                results = {**results, 'total_score': reviewed['total_score'], 'percentage': reviewed['percentage']}
+                st.info("ℹ️ Descriptive answers have been reviewed since you submitted; scores below are updated")
+
             col1, col2, col3 = st.columns(3)
             col1.metric(
                 "Total Score",
@@ -575,6 +856,8 @@ else:
                 eval_data = result['evaluation']
                 score = eval_data['score']
                 max_score = eval_data['max_score']
+                review = reviewed['responses'][result['question_num'] - 1] if reviewed else {}
+                score = response_score(review) if review else score
 
                 with st.expander(
                     f"Question {result['question_num']} - {score:.1f}/{max_score} marks",
@@ -609,6 +892,16 @@ else:
                                     st.markdown(f"- {label}")
 
                     st.info(f"💡 **Feedback:** {eval_data['feedback']}")
+                    if review.get('llm_feedback'):
+                        st.info(f"🤖 **Reviewer:** {review['llm_feedback']}")
+
+            if DEBUG_MODE and results.get('timings'):
+                with st.expander("🔧 Grading timings"):
+                    show_timings(results['timings'])
+                    if ENABLE_EVAL_METRICS:
+                        # Rolling per-stage percentiles of this process (the service has GET /metrics)
+                        st.download_button("Download stage metrics (JSON)", export_json(),
+                                           file_name="eval_metrics.json", mime="application/json")
 
             st.divider()
             col1, col2 = st.columns(2)
@@ -636,3 +929,9 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+
+# Poll background jobs without blocking the rest of the page
+if poll_jobs:
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,102 @@
+"""Parity check + throughput/latency benchmark: torch vs ONNX Runtime embeddings.
+
+    python embedding_backends.py export-onnx          # once
+    python benchmarks/bench_embedding_backends.py --threads 1 2 4 --output onnx.json
+
+Parity: the ONNX backend must embed the same texts in (nearly) the same
+direction as torch, and answer/key-point similarities must fall on the same
+side of SEMANTIC_SIMILARITY_THRESHOLD. Exits with status 1 if it doesn't.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from bench_utils import sample_texts, percentiles, time_calls, write_results
+
+from config import SEMANTIC_SIMILARITY_THRESHOLD, ONNX_MODEL_PATH
+from embedding_backends import OnnxEmbeddingBackend, normalize_rows
+from semantic_model import get_model_source
+
+MIN_COSINE = {'fp32': 0.999, 'int8': 0.98}  # Per-text cosine between backends
+MIN_THRESHOLD_AGREEMENT = 0.97  # Share of pairs graded the same at the threshold
+
+def check_parity(reference, candidate, texts, key_points):
+    ref = normalize_rows(reference.encode(texts, convert_to_numpy=True))
+    cand = normalize_rows(candidate.encode(texts, convert_to_numpy=True))
+    per_text = (ref * cand).sum(axis=1)
+
+    ref_keys = normalize_rows(reference.encode(key_points, convert_to_numpy=True))
+    cand_keys = normalize_rows(candidate.encode(key_points, convert_to_numpy=True))
+    ref_sim = ref @ ref_keys.T
+    cand_sim = cand @ cand_keys.T
+    agreement = ((ref_sim >= SEMANTIC_SIMILARITY_THRESHOLD) == (cand_sim >= SEMANTIC_SIMILARITY_THRESHOLD)).mean()
+    return {
+        'min_cosine': round(float(per_text.min()), 5),
+        'mean_cosine': round(float(per_text.mean()), 5),
+        'max_similarity_diff': round(float(np.abs(ref_sim - cand_sim).max()), 5),
+        'threshold_agreement': round(float(agreement), 5)
+    }
+
+def benchmark(model, texts, batch_sizes, repeats):
+    results = {}
+    for batch_size in batch_sizes:
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        latencies = []
+        for _ in range(repeats):
+            for batch in batches:
+                latencies.extend(time_calls(lambda: model.encode(batch, batch_size=batch_size,
+                                                                 convert_to_numpy=True), 1, warmup=0))
+        total = sum(latencies)
+        results[str(batch_size)] = {
+            'texts_per_second': round(len(texts) * repeats / total, 1),
+            **percentiles(latencies)
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', help="Torch model name/path (default: semantic model source)")
+    parser.add_argument('--onnx-dir', default=ONNX_MODEL_PATH)
+    parser.add_argument('--texts', type=int, default=256)
+    parser.add_argument('--batch-sizes', type=int, nargs='*', default=[1, 8, 32])
+    parser.add_argument('--threads', type=int, nargs='*', default=[0], help="ONNX intra-op threads (0 = default)")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    texts = sample_texts(args.texts, seed=1)
+    key_points = sample_texts(32, seed=2, max_sentences=1)
+    torch_model = SentenceTransformer(args.source or get_model_source(), device='cpu')
+
+    results = {
+        'texts': args.texts,
+        'threshold': SEMANTIC_SIMILARITY_THRESHOLD,
+        'parity': {},
+        'throughput': {f"torch (threads={torch.get_num_threads()})": benchmark(torch_model, texts, args.batch_sizes, args.repeats)}
+    }
+    passed = True
+    for variant, quantized in (('fp32', False), ('int8', True)):
+        onnx_model = OnnxEmbeddingBackend(args.onnx_dir, quantized=quantized)
+        if quantized and onnx_model.model_file != 'model.int8.onnx':
+            continue  # Exported with --no-quantize
+        parity = check_parity(torch_model, onnx_model, texts, key_points)
+        parity['passed'] = (parity['min_cosine'] >= MIN_COSINE[variant]
+                            and parity['threshold_agreement'] >= MIN_THRESHOLD_AGREEMENT)
+        passed = passed and parity['passed']
+        results['parity'][variant] = parity
+        for threads in args.threads:
+            model = OnnxEmbeddingBackend(args.onnx_dir, quantized=quantized, intra_op_threads=threads)
+            results['throughput'][f"onnx-{variant} (threads={threads or 'default'})"] = benchmark(
+                model, texts, args.batch_sizes, args.repeats)
+
+    write_results(results, args.output)
+    if not passed:
+        print("Parity check FAILED", file=sys.stderr)
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Load benchmark: grading throughput with and without cross-student micro-batching.
+
+    python benchmarks/bench_eval_scheduler.py --concurrency 1 10 100 --output sched.json
+
+N submitter threads each grade `--submissions` synthetic submissions through
+evaluate_batch() at the same time, once with eval_scheduler disabled (one
+encode() per submission) and once with it enabled.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from bench_utils import ROOT, synthetic_class, percentiles, write_results
+
+import evaluate
+import eval_scheduler
+from config import EVAL_BATCH_WINDOW_MS, EVAL_MAX_BATCH
+
+def run_load(questions, students, concurrency, submissions):
+    """Latencies of every submission when `concurrency` threads submit together"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def submitter(worker):
+        barrier.wait()
+        for round_idx in range(submissions):
+            answers = students[(worker * submissions + round_idx) % len(students)]
+            start = time.perf_counter()
+            evaluate.evaluate_batch(questions, answers)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=submitter, args=(worker,)) for worker in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', help="SentenceTransformer name/path (default: configured backend)")
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 10, 100])
+    parser.add_argument('--submissions', type=int, default=3, help="Submissions per submitter")
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--window-ms', type=float, default=EVAL_BATCH_WINDOW_MS)
+    parser.add_argument('--max-batch', type=int, default=EVAL_MAX_BATCH)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+
+    if args.source:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.source, device='cpu')
+        evaluate.get_semantic_model = lambda: model
+
+    # Every run must encode: repeated answers would otherwise come from the result cache
+    evaluate.ENABLE_RESULT_CACHE = False
+    max_students = max(args.concurrency) * args.submissions
+    questions, students = synthetic_class(args.questions, max_students, seed=11)
+    evaluate.get_semantic_model()  # Load the model while relative model paths still resolve
+
+    results = {'questions': args.questions, 'submissions_per_submitter': args.submissions,
+               'window_ms': args.window_ms, 'max_batch': args.max_batch, 'runs': []}
+    # Grading writes answer embeddings to ./answer_store; keep them out of the repository
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        evaluate.evaluate_batch(questions, students[0])  # Cache key embeddings
+        for concurrency in args.concurrency:
+            for enabled in (False, True):
+                eval_scheduler.configure(enabled=enabled, window_ms=args.window_ms, max_batch=args.max_batch)
+                latencies, elapsed = run_load(questions, students, concurrency, args.submissions)
+                run = {
+                    'concurrency': concurrency,
+                    'scheduler': enabled,
+                    'submissions_per_second': round(len(latencies) / elapsed, 2),
+                    'answers_per_second': round(len(latencies) * args.questions / elapsed, 1),
+                    **percentiles(latencies)
+                }
+                if enabled:
+                    run['batches'] = eval_scheduler.get_batcher().stats()
+                results['runs'].append(run)
+                print(f"concurrency={concurrency:>4} scheduler={'on ' if enabled else 'off'} "
+                      f"{run['submissions_per_second']:>8} submissions/s  p95 {run['p95_ms']} ms")
+        os.chdir(ROOT)
+    write_results(results, output)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,204 @@
+"""CPU cost around each Gemini call: optimize_content, build_prompt and parse_json.
+
+    python benchmarks/bench_generation.py --output generation.json
+    python benchmarks/bench_generation.py --cases parse_json --budget 0.5
+
+Every case is timed at growing input sizes, taking the best of repeated calls.
+Growth stops once a single call takes longer than --budget seconds. The
+scaling exponent is the slope of log(time) against log(size) over the largest
+three sizes: about 1 for linear work. A case is flagged when that exponent
+exceeds --max-exponent or when the function raises. The script then exits 1.
+
+Inputs are real or adversarial:
+- uploads built from the repository's own documentation, up to a few MB
+- Gemini-style replies in the generator's schema, whole, fenced or truncated
+  mid-object (what a 4K-token output limit produces)
+- malformed replies: unclosed objects, deeply nested braces, and an
+  unterminated string of escapes
+"""
+import argparse
+import json
+import random
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from bench_utils import ROOT, sample_sentence, write_results
+
+from question_generator import optimize_content, build_prompt, parse_json
+
+CHAPTER = "Light Reflection and Refraction"
+INFO = {'board': 'CBSE', 'class': 10, 'subject': 'Physics', 'chapter': CHAPTER, 'question_type': 'LA',
+        'bloom_level': 'Understand', 'num_questions': 10}
+MIN_FIT_POINTS = 2
+FIT_POINTS = 3  # Largest sizes used for the exponent
+
+def doc_paragraphs() -> List[str]:
+    """Real prose: the paragraphs of the repository's markdown files"""
+    paragraphs = []
+    for path in sorted(ROOT.glob('*.md')):
+        paragraphs.extend(p.strip() for p in path.read_text(encoding='utf-8').split('\n\n') if p.strip())
+    return paragraphs
+
+def upload(size: int, seed: int = 0, chapter_every: int = 6, separator: str = '\n\n') -> str:
+    """About `size` characters of documentation paragraphs; every chapter_every-th one names the chapter"""
+    rng = random.Random(seed)
+    paragraphs = doc_paragraphs()
+    parts, length = [], 0
+    while length < size:
+        paragraph = rng.choice(paragraphs)
+        if chapter_every and len(parts) % chapter_every == 0:
+            paragraph = f"{CHAPTER}: {paragraph}"
+        parts.append(paragraph)
+        length += len(paragraph) + len(separator)
+    return separator.join(parts)[:size]
+
+def reply_questions(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Questions in the generator's schema, alternating MCQ and long answer"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        if i % 2 == 0:
+            questions.append({
+                'question': f"Which statement about {CHAPTER.lower()} is correct?",
+                'options': {letter: sample_sentence(rng) for letter in "ABCD"},
+                'correct_answer': rng.choice("ABCD"),
+                'explanation': sample_sentence(rng) + ".",
+                'bloom_level': 'Understand', 'difficulty': 'Medium', 'marks': 1
+            })
+        else:
+            key_points = [sample_sentence(rng) for _ in range(3)]
+            questions.append({
+                'question': f"Explain why {key_points[0].lower()}.",
+                'bloom_level': 'Understand', 'difficulty': 'Hard', 'marks': 5, 'word_limit': '100-150 words',
+                'model_answer': " ".join(sample_sentence(rng) + "." for _ in range(8)),
+                'key_points': key_points,
+                'marking_scheme': [f"Award marks for: {point}" for point in key_points]
+            })
+    return questions
+
+def reply(count: int) -> str:
+    return json.dumps(reply_questions(count), indent=2)
+
+def truncated(count: int) -> str:
+    """A reply cut part-way through its last object"""
+    text = reply(count)
+    last = text.rfind('{')
+    return text[:last + (len(text) - last) // 2]
+
+def truncated_raw_newlines(count: int) -> str:
+    """Truncated, with unescaped newlines inside strings"""
+    return truncated(count).replace('. ', '.\n')
+
+def prompt_for_upload(text: str) -> str:
+    """The generation path: trim the upload, then build the prompt"""
+    return build_prompt(optimize_content(text, CHAPTER), INFO)
+
+UPLOAD_SIZES = [16_000, 64_000, 256_000, 1_000_000, 4_000_000]
+REPLY_SIZES = [5, 20, 80, 320, 1280]
+MALFORMED_SIZES = [250, 1000, 4000, 16000, 64000]
+
+# (function, case, size unit, sizes, size -> call with its input built)
+CASES: List[Tuple[str, str, str, List[int], Callable[[int], Callable[[], Any]]]] = [
+    ('optimize_content', 'upload', 'chars', UPLOAD_SIZES,
+     lambda n: partial(optimize_content, upload(n), CHAPTER)),
+    ('optimize_content', 'every_paragraph_matches', 'chars', UPLOAD_SIZES,
+     lambda n: partial(optimize_content, upload(n, chapter_every=1), CHAPTER)),
+    ('optimize_content', 'no_paragraph_breaks', 'chars', UPLOAD_SIZES,
+     lambda n: partial(optimize_content, upload(n, separator=' '), CHAPTER)),
+    ('optimize_content', 'no_sentence_ends', 'chars', UPLOAD_SIZES,
+     lambda n: partial(optimize_content, ("word " * n)[:n])),
+    ('build_prompt', 'optimized_upload', 'chars', UPLOAD_SIZES,
+     lambda n: partial(prompt_for_upload, upload(n))),
+    ('build_prompt', 'raw_upload', 'chars', UPLOAD_SIZES,
+     lambda n: partial(build_prompt, upload(n), INFO)),
+    ('parse_json', 'valid_array', 'questions', REPLY_SIZES,
+     lambda n: partial(parse_json, reply(n))),
+    ('parse_json', 'fenced_with_prose', 'questions', REPLY_SIZES,
+     lambda n: partial(parse_json, f"Here are the questions:\n```json\n{reply(n)}\n```\nDone.")),
+    ('parse_json', 'truncated_mid_object', 'questions', REPLY_SIZES,
+     lambda n: partial(parse_json, truncated(n))),
+    ('parse_json', 'truncated_raw_newlines', 'questions', REPLY_SIZES,
+     lambda n: partial(parse_json, truncated_raw_newlines(n))),
+    ('parse_json', 'unclosed_objects', 'objects', MALFORMED_SIZES,
+     lambda n: partial(parse_json, '[' + '{"question": "a", ' * n)),
+    ('parse_json', 'deep_nesting', 'depth', MALFORMED_SIZES,
+     lambda n: partial(parse_json, '[{"question": ' + '{"a": ' * n + '1')),
+    ('parse_json', 'unterminated_escapes', 'escapes', list(range(8, 30, 2)),
+     lambda n: partial(parse_json, '[{"question": "' + '\\a' * n + ' x')),
+]
+
+def best_time(call: Callable[[], Any], min_time: float, max_calls: int = 1000) -> float:
+    """Fastest of repeated calls, repeating for at least min_time seconds"""
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_calls and (not samples or time.perf_counter() - start < min_time):
+        call_start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - call_start)
+    return min(samples)
+
+def exponent(points: List[Dict[str, Any]]) -> float:
+    """Slope of log(seconds) against log(size) over the largest sizes"""
+    fit = points[-FIT_POINTS:]
+    sizes = np.log([p['size'] for p in fit])
+    seconds = np.log([max(p['seconds'], 1e-9) for p in fit])
+    return float(np.polyfit(sizes, seconds, 1)[0])
+
+def run_case(function, case, unit, sizes, make_call, budget, min_time, max_exponent):
+    points = []
+    stopped = None
+    error = None
+    for size in sizes:
+        try:
+            seconds = best_time(make_call(size), min_time)
+        except Exception as e:
+            # Inputs like these should come back as [] or the original text, never raise
+            error = {'size': size, 'error': f"{type(e).__name__}: {e}"}
+            break
+        points.append({'size': size, 'seconds': seconds, 'us_per_unit': round(seconds / size * 1e6, 4)})
+        if seconds > budget:
+            stopped = size
+            break
+    result = {'function': function, 'case': case, 'unit': unit, 'points': points, 'stopped_at': stopped,
+              'error': error, 'exponent': None, 'flagged': error is not None}
+    if len(points) >= MIN_FIT_POINTS:
+        result['exponent'] = round(exponent(points), 2)
+        result['flagged'] = result['flagged'] or result['exponent'] > max_exponent
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='*', help="Only cases whose 'function/case' contains one of these")
+    parser.add_argument('--budget', type=float, default=1.0, help="Stop growing a case once one call takes this long")
+    parser.add_argument('--min-time', type=float, default=0.05, help="Seconds of repeated calls per size")
+    parser.add_argument('--max-exponent', type=float, default=1.5, help="Flag scaling steeper than size^x")
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    results = {'budget_seconds': args.budget, 'max_exponent': args.max_exponent, 'cases': []}
+    for function, case, unit, sizes, make_call in CASES:
+        name = f"{function}/{case}"
+        if args.cases and not any(pattern in name for pattern in args.cases):
+            continue
+        result = run_case(function, case, unit, sizes, make_call, args.budget, args.min_time, args.max_exponent)
+        results['cases'].append(result)
+        if result['points']:
+            largest = result['points'][-1]
+            print(f"{name:<42} {largest['seconds'] * 1000:>10.3f} ms at {largest['size']} {unit:<9} "
+                  f"exponent {result['exponent']}"
+                  f"{'  SUPER-LINEAR' if result['exponent'] and result['exponent'] > args.max_exponent else ''}"
+                  f"{'  (over budget)' if result['stopped_at'] else ''}")
+        if result['error']:
+            print(f"{name:<42} raised at {result['error']['size']} {unit}: {result['error']['error']}")
+    write_results(results, args.output)
+    flagged = [f"{c['function']}/{c['case']}" for c in results['cases'] if c['flagged']]
+    if flagged:
+        print(f"Flagged: {', '.join(flagged)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+"""End-to-end grading benchmark: evaluate_batch on synthetic mixed-type classes.
+
+    python benchmarks/bench_grading.py --students 10 50 200 --output grading.json
+    python benchmarks/bench_grading.py --baseline grading.json --max-slowdown 1.25
+
+Each assessment mixes the curriculum.QUESTION_TYPES types (--mix, default one
+each of MCQ, VSA, SA, LA, CASE_STUDY, DIAGRAM). Descriptive answers run from
+0.3x to 1.6x their word limit. Every class size is graded three times, one
+evaluate_batch() call per student:
+
+- cold: empty embedding and result caches
+- warm: new students on the same assessment (key embeddings cached)
+- repeat: the cold students again (result cache hits)
+
+Each run reports throughput, per-submission latency percentiles and the
+process's peak RSS. With ENABLE_EVAL_METRICS=1 it also reports the per-stage
+timings from eval_metrics. The JSON output records the commit and settings.
+A later run given --baseline prints the change per run, and with
+--max-slowdown exits 1 if any p50 latency regressed by more than that factor.
+Cache files are written to a temporary directory, not the repository.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_utils import ROOT, mixed_class, percentiles, write_results
+
+import config
+import eval_metrics
+import eval_scheduler
+import evaluate
+from answer_store import clear_answer_store
+from result_cache import clear_results
+from semantic_model import load_model, model_status
+
+DEFAULT_MIX = "MCQ=1,VSA=1,SA=1,LA=1,CASE_STUDY=1,DIAGRAM=1"
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(','):
+        q_type, _, count = part.partition('=')
+        mix[q_type.strip()] = int(count or 1)
+    return mix
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def grade(questions, students):
+    """Per-submission latencies and the total wall time"""
+    latencies = []
+    start = time.perf_counter()
+    for answers in students:
+        submitted = time.perf_counter()
+        evaluate.evaluate_batch(questions, answers)
+        latencies.append(time.perf_counter() - submitted)
+    return latencies, time.perf_counter() - start
+
+def run_phase(phase, questions, students):
+    eval_metrics.reset()
+    latencies, elapsed = grade(questions, students)
+    run = {
+        'phase': phase,
+        'students': len(students),
+        'submissions_per_second': round(len(students) / elapsed, 2),
+        'answers_per_second': round(len(students) * len(questions) / elapsed, 1),
+        'first_submission_ms': round(latencies[0] * 1000, 3),
+        **percentiles(latencies),
+        'peak_rss_mb': peak_rss_mb()
+    }
+    if config.ENABLE_EVAL_METRICS:
+        run['stages'] = eval_metrics.snapshot()['stages']
+    return run
+
+def compare(results, baseline, max_slowdown=None) -> bool:
+    """Print the change against a previous run; False if a p50 regressed beyond max_slowdown"""
+    previous = {(run['phase'], run['students']): run for run in baseline.get('runs', [])}
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'}:")
+    ok = True
+    for run in results['runs']:
+        before = previous.get((run['phase'], run['students']))
+        if before is None or not before['p50_ms']:
+            continue
+        slowdown = run['p50_ms'] / before['p50_ms']
+        regressed = max_slowdown is not None and slowdown > max_slowdown
+        ok = ok and not regressed
+        print(f"  {run['phase']:<6} students={run['students']:>5}  p50 x{slowdown:.2f}  "
+              f"throughput x{run['submissions_per_second'] / before['submissions_per_second']:.2f}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, nargs='*', default=[10, 50, 200], help="Class sizes")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Questions per type, e.g. MCQ=5,SA=3,LA=2")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', help="JSON from an earlier run to compare against")
+    parser.add_argument('--max-slowdown', type=float, help="Exit 1 if a p50 latency grows by more than this factor")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    rss_before_model = peak_rss_mb()
+    start = time.perf_counter()
+    load_model()
+    model_seconds = time.perf_counter() - start
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'model': model_status(),
+        'model_load_seconds': round(model_seconds, 3),
+        'peak_rss_before_model_mb': rss_before_model,
+        'settings': {
+            'mix': mix,
+            'seed': args.seed,
+            'short_answer_policy': config.SHORT_ANSWER_POLICY,
+            'result_cache': config.ENABLE_RESULT_CACHE,
+            'eval_scheduler': eval_scheduler._enabled,
+            'answer_store': config.ENABLE_ANSWER_STORE
+        },
+        'runs': []
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        for size in args.students:
+            questions, students = mixed_class(mix, 2 * size, seed=args.seed + size)
+            clear_results()
+            evaluate._embedding_cache.clear()
+            clear_answer_store()
+            for phase, group in (('cold', students[:size]), ('warm', students[size:]), ('repeat', students[:size])):
+                run = run_phase(phase, questions, group)
+                results['runs'].append(run)
+                print(f"students={size:>5} {phase:<6} {run['submissions_per_second']:>8} submissions/s  "
+                      f"p50 {run['p50_ms']} ms  p95 {run['p95_ms']} ms  peak RSS {run['peak_rss_mb']} MB")
+        os.chdir(ROOT)
+    write_results(results, output)
+
+    if baseline:
+        if not compare(results, json.loads(Path(baseline).read_text()), args.max_slowdown):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
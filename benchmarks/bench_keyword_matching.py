@@ -0,0 +1,75 @@
+"""Keyword-only grading throughput: precompiled matchers vs per-answer keyword extraction.
+
+    python benchmarks/bench_keyword_matching.py --students 30 300 3000 --output kw.json
+
+Grades synthetic classes with semantic evaluation and the result cache turned
+off, so every answer goes through evaluate_keyword_based(). The legacy
+algorithm (extract_keywords per key point per answer, one substring scan per
+keyword) is timed alongside and must agree with the matcher on every answer.
+"""
+import argparse
+import sys
+import time
+
+from bench_utils import synthetic_class, write_results
+
+import evaluate
+from answer_keys import extract_keywords
+from keyword_matcher import key_point_matcher
+
+def legacy_counts(key_points, student_answer):
+    student_lower = student_answer.lower()
+    return [sum(1 for kw in extract_keywords(point) if kw in student_lower) for point in key_points]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, nargs='*', default=[30, 300, 3000])
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--long-answers', action='store_true', help="~150-word answers instead of ~40")
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    evaluate.ENABLE_SEMANTIC_EVALUATION = False
+    evaluate.ENABLE_RESULT_CACHE = False
+
+    results = {'questions': args.questions, 'runs': []}
+    agree = True
+    for students_count in args.students:
+        questions, students = synthetic_class(args.questions, students_count, seed=5)
+        if args.long_answers:
+            students = [{idx: " ".join([answer] * 4) for idx, answer in answers.items()} for answers in students]
+        pairs = [(q, answers[idx]) for answers in students for idx, q in enumerate(questions, 1)]
+
+        start = time.perf_counter()
+        legacy = [legacy_counts(q['key_points'], answer) for q, answer in pairs]
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled = [key_point_matcher(q['key_points']).group_counts(answer) for q, answer in pairs]
+        matcher_seconds = time.perf_counter() - start
+        agree = agree and legacy == compiled
+
+        start = time.perf_counter()
+        for answers in students:
+            evaluate.evaluate_batch(questions, answers)
+        grading_seconds = time.perf_counter() - start
+
+        run = {
+            'students': students_count,
+            'answers': len(pairs),
+            'legacy_match_seconds': round(legacy_seconds, 4),
+            'matcher_seconds': round(matcher_seconds, 4),
+            'match_speedup': round(legacy_seconds / matcher_seconds, 2),
+            'keyword_grading_answers_per_second': round(len(pairs) / grading_seconds, 1)
+        }
+        results['runs'].append(run)
+        print(f"{students_count:>5} students: matching {run['match_speedup']}x faster, "
+              f"{run['keyword_grading_answers_per_second']} answers/s end to end")
+    results['identical_matches'] = agree
+    write_results(results, args.output)
+    if not agree:
+        print("Matcher disagrees with the legacy algorithm", file=sys.stderr)
+    return 0 if agree else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+"""Near-copy detection: LSH index vs all-pairs comparison.
+
+    python benchmarks/bench_similarity_index.py --students 1000 10000 --output sim.json
+
+Synthetic answer vectors to one question share a topic direction (typical
+pairwise similarity ~0.7, like real answers to the same question), and a few
+percent are planted near-copies of an earlier answer. Each student is added
+and queried in turn, as check_submission() does. The brute-force pass finds
+every pair at or above the threshold; the index must recover at least
+--min-recall of them.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from bench_utils import percentiles, write_results
+
+from config import COLLUSION_THRESHOLD
+from similarity_index import LSHIndex
+
+def synthetic_vectors(count: int, dim: int, copy_rate: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topic = rng.standard_normal(dim)
+    topic /= np.linalg.norm(topic)
+    noise = rng.standard_normal((count, dim))
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    vectors = 1.4 * topic + noise
+    for i in np.flatnonzero(rng.random(count) < copy_rate):
+        if i:
+            # Light edit of an earlier answer
+            edit = rng.standard_normal(dim)
+            vectors[i] = vectors[rng.integers(i)] + 0.25 * edit / np.linalg.norm(edit) * np.linalg.norm(vectors[i])
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, nargs='*', default=[1000, 10000])
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--copy-rate', type=float, default=0.03)
+    parser.add_argument('--threshold', type=float, default=COLLUSION_THRESHOLD)
+    parser.add_argument('--min-recall', type=float, default=0.9)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    results = {'threshold': args.threshold, 'dim': args.dim, 'runs': []}
+    ok = True
+    for count in args.students:
+        vectors = synthetic_vectors(count, args.dim, args.copy_rate, seed=count)
+
+        start = time.perf_counter()
+        exact = set()
+        for i in range(1, count):
+            similarities = vectors[:i] @ vectors[i]
+            exact.update((int(j), i) for j in np.flatnonzero(similarities >= args.threshold))
+        brute_seconds = time.perf_counter() - start
+
+        index = LSHIndex(args.dim)
+        found = set()
+        latencies = []
+        candidates = 0
+        for i in range(count):
+            start = time.perf_counter()
+            index.add(vectors[i:i + 1], [i])
+            matches = index.query(vectors[i], args.threshold)
+            latencies.append(time.perf_counter() - start)
+            candidates += len(index.candidates(vectors[i])) - 1
+            found.update((j, i) for j, _ in matches if j != i)
+
+        recall = len(found & exact) / len(exact) if exact else 1.0
+        ok = ok and recall >= args.min_recall and found <= exact
+        run = {
+            'students': count,
+            'flagged_pairs': len(exact),
+            'recall': round(recall, 4),
+            'false_flags': len(found - exact),
+            'mean_candidates': round(candidates / count, 1),
+            'brute_force_seconds': round(brute_seconds, 3),
+            'index_seconds': round(sum(latencies), 3),
+            'index_latency': percentiles(latencies)
+        }
+        results['runs'].append(run)
+        print(f"{count:>6} students: {len(exact)} pairs, recall {recall:.3f}, "
+              f"{run['mean_candidates']} candidates/query, brute force {brute_seconds:.2f}s "
+              f"vs index {run['index_seconds']:.2f}s (p95 {run['index_latency']['p95_ms']:.2f} ms)")
+    write_results(results, args.output)
+    if not ok:
+        print(f"Recall below {args.min_recall}", file=sys.stderr)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
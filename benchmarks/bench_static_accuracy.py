@@ -0,0 +1,101 @@
+"""Accuracy of the static-embedding backend against the transformer on held-out answers.
+
+    python embedding_backends.py distill-static       # once
+    python benchmarks/bench_static_accuracy.py --output static.json
+    python benchmarks/bench_static_accuracy.py --markdown   # a row for the README table
+
+The answer set is synthetic (seeded, never seen by distillation, which only
+embeds single vocabulary tokens). Both backends grade it through
+evaluate_batch, and the static backend is scored on how closely it reproduces
+the transformer's marks, similarities and matched key points.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from bench_utils import ROOT, synthetic_class, write_results
+
+import evaluate
+from config import STATIC_MODEL_PATH
+from embedding_backends import StaticEmbeddingBackend
+from semantic_model import get_model_source
+
+def grade(model, questions, students):
+    """evaluate_batch results for every student, graded with `model`"""
+    evaluate.get_semantic_model = lambda: model
+    # Both caches are keyed by the loaded model, not the patched one: the second run would reuse the first's
+    evaluate.ENABLE_RESULT_CACHE = False
+    evaluate._embedding_cache.clear()
+    start = time.perf_counter()
+    results = [evaluate.evaluate_batch(questions, answers) for answers in students]
+    return results, time.perf_counter() - start
+
+def rank(values: np.ndarray) -> np.ndarray:
+    return values.argsort().argsort().astype(float)
+
+def compare(reference, candidate):
+    ref = [r['evaluation'] for student in reference for r in student]
+    cand = [r['evaluation'] for student in candidate for r in student]
+    ref_scores = np.array([e['score'] for e in ref])
+    cand_scores = np.array([e['score'] for e in cand])
+    ref_sim = np.array([e.get('semantic_similarity', 0.0) for e in ref])
+    cand_sim = np.array([e.get('semantic_similarity', 0.0) for e in cand])
+    point_agreement = np.mean([
+        set(r['matched_points']) == set(c['matched_points']) for r, c in zip(ref, cand)
+    ])
+    ref_totals = np.array([sum(r['evaluation']['score'] for r in student) for student in reference])
+    cand_totals = np.array([sum(r['evaluation']['score'] for r in student) for student in candidate])
+    return {
+        'answers': len(ref),
+        'score_mae': round(float(np.abs(ref_scores - cand_scores).mean()), 4),
+        'exact_score_agreement': round(float((ref_scores == cand_scores).mean()), 4),
+        'within_half_mark': round(float((np.abs(ref_scores - cand_scores) <= 0.5).mean()), 4),
+        'similarity_pearson': round(float(np.corrcoef(ref_sim, cand_sim)[0, 1]), 4),
+        'similarity_spearman': round(float(np.corrcoef(rank(ref_sim), rank(cand_sim))[0, 1]), 4),
+        'matched_points_agreement': round(float(point_agreement), 4),
+        'student_total_spearman': round(float(np.corrcoef(rank(ref_totals), rank(cand_totals))[0, 1]), 4)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', help="Transformer model name/path (default: semantic model source)")
+    parser.add_argument('--static-dir', default=STATIC_MODEL_PATH)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--students', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output')
+    parser.add_argument('--markdown', action='store_true', help="Also print the accuracy as a README table row")
+    args = parser.parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+
+    from sentence_transformers import SentenceTransformer
+
+    questions, students = synthetic_class(args.questions, args.students, args.seed)
+    transformer = SentenceTransformer(args.source or get_model_source(), device='cpu')
+    static = StaticEmbeddingBackend(args.static_dir)
+
+    # Grading writes answer embeddings to ./answer_store; keep them out of the repository
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        reference, transformer_seconds = grade(transformer, questions, students)
+        candidate, static_seconds = grade(static, questions, students)
+        os.chdir(ROOT)
+    accuracy = compare(reference, candidate)
+    write_results({
+        'questions': args.questions,
+        'students': args.students,
+        'seed': args.seed,
+        'accuracy': accuracy,
+        'grading_seconds': {'transformer': round(transformer_seconds, 3), 'static': round(static_seconds, 3)}
+    }, output)
+    if args.markdown:
+        print(f"| {args.source or get_model_source()} | {accuracy['answers']} | {accuracy['score_mae']} | "
+              f"{accuracy['exact_score_agreement']:.1%} | {accuracy['within_half_mark']:.1%} | "
+              f"{accuracy['matched_points_agreement']:.1%} | {accuracy['student_total_spearman']} |")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+"""Shared helpers for the scripts in benchmarks/.
+
+Run benchmarks from the repository root, e.g.
+
+    python benchmarks/bench_embedding_backends.py --output results.json
+"""
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Vocabulary for synthetic student answers (NCERT-style science/social science)
+SUBJECTS = ["Photosynthesis", "The heart", "Friction", "Democracy", "The water cycle", "An acid",
+            "Evaporation", "The cell membrane", "A food chain", "Soil erosion", "Electric current",
+            "The Constitution", "Respiration", "Magnetism", "Sound", "Deforestation"]
+VERBS = ["converts", "pumps", "opposes", "protects", "moves", "reacts with", "depends on",
+         "controls", "produces", "reduces", "carries", "changes", "transfers", "absorbs"]
+OBJECTS = ["light energy into chemical energy", "blood to all parts of the body", "the motion of objects",
+           "the rights of citizens", "water between land and the atmosphere", "bases to form salt and water",
+           "heat from the surroundings", "substances entering the cell", "energy between organisms",
+           "the fertile top layer of soil", "charge through a conductor", "the powers of the government",
+           "glucose to release energy", "iron and nickel", "vibrations through a medium", "forest cover"]
+FILLERS = ["because", "so that", "which means", "and therefore", "in order that", "while"]
+
+def sample_sentence(rng: random.Random) -> str:
+    return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+
+def sample_answer(rng: random.Random, min_sentences: int = 1, max_sentences: int = 4) -> str:
+    """A synthetic answer of a few clauses"""
+    sentences = [sample_sentence(rng) for _ in range(rng.randint(min_sentences, max_sentences))]
+    parts = [sentences[0]]
+    for sentence in sentences[1:]:
+        parts.append(f"{rng.choice(FILLERS)} {sentence[0].lower()}{sentence[1:]}")
+    return " ".join(parts) + "."
+
+def sample_texts(count: int, seed: int = 0, **kwargs) -> List[str]:
+    rng = random.Random(seed)
+    return [sample_answer(rng, **kwargs) for _ in range(count)]
+
+def synthetic_question(rng: random.Random, marks: int = 5) -> Dict[str, Any]:
+    """A descriptive question in the generator's schema"""
+    key_points = [sample_sentence(rng) for _ in range(rng.randint(2, 5))]
+    return {
+        'question': f"Explain how {key_points[0][0].lower()}{key_points[0][1:]}.",
+        'model_answer': ". ".join(key_points) + ".",
+        'key_points': key_points,
+        'marks': marks,
+        'word_limit': '30-80 words'
+    }
+
+def synthetic_student_answer(rng: random.Random, question: Dict[str, Any]) -> str:
+    """A student answer covering a random share of the key points, padded with off-topic clauses"""
+    key_points = question['key_points']
+    covered = rng.sample(key_points, rng.randint(0, len(key_points)))
+    extra = [sample_sentence(rng) for _ in range(rng.randint(0, 3))]
+    clauses = covered + extra or [sample_sentence(rng)]
+    rng.shuffle(clauses)
+    return ". ".join(clauses) + "."
+
+def synthetic_class(num_questions: int, num_students: int, seed: int = 0):
+    """(questions, [student_answers dict keyed by 1-based question number, ...])"""
+    rng = random.Random(seed)
+    questions = [synthetic_question(rng) for _ in range(num_questions)]
+    students = [{idx: synthetic_student_answer(rng, q) for idx, q in enumerate(questions, 1)}
+                for _ in range(num_students)]
+    return questions, students
+
+DIAGRAM_PARTS = ["Nucleus", "Cell membrane", "Cell wall", "Chloroplast", "Left ventricle", "Right atrium",
+                 "Xylem vessel", "Stomata", "Lens", "Retina", "Anther", "Ovary"]
+
+def mixed_question(rng: random.Random, q_type: str) -> Dict[str, Any]:
+    """A question of a curriculum.QUESTION_TYPES type, in the generator's schema"""
+    from curriculum import QUESTION_TYPES
+
+    info = QUESTION_TYPES[q_type]
+    if q_type == "MCQ":
+        options = {letter: sample_sentence(rng) for letter in "ABCD"}
+        return {'type': q_type, 'question': f"Which statement is correct about {rng.choice(SUBJECTS).lower()}?",
+                'options': options, 'correct_answer': rng.choice("ABCD"),
+                'explanation': sample_sentence(rng) + ".", 'marks': info['marks']}
+    if q_type == "DIAGRAM":
+        parts = rng.sample(DIAGRAM_PARTS, 3)
+        return {'type': q_type, 'question': "Label the parts marked 1-3 in the diagram.",
+                'labels': {str(i): part for i, part in enumerate(parts, 1)}, 'marks': info['marks']}
+    question = synthetic_question(rng, marks=info['marks'])
+    question['type'] = q_type
+    question['word_limit'] = info.get('word_limit', '30-80 words')
+    return question
+
+def mixed_answer(rng: random.Random, question: Dict[str, Any]):
+    """A student answer to a mixed_question(): a letter, a label dict, or text of 0.3-1.6x the word limit"""
+    if 'options' in question:
+        return rng.choice("ABCD")
+    if 'labels' in question:
+        return {num: rng.choice([part, part.split()[-1].lower(), rng.choice(DIAGRAM_PARTS)])
+                for num, part in question['labels'].items()}
+    max_words = int(question['word_limit'].split()[0].split('-')[-1])
+    target = max(3, int(max_words * rng.uniform(0.3, 1.6)))
+    answer = synthetic_student_answer(rng, question)
+    while len(answer.split()) < target:
+        answer += " " + sample_answer(rng, 1, 2)
+    return answer
+
+def mixed_class(mix: Dict[str, int], num_students: int, seed: int = 0):
+    """(questions, [student_answers, ...]) for an assessment with mix[q_type] questions of each type"""
+    rng = random.Random(seed)
+    questions = [mixed_question(rng, q_type) for q_type, count in mix.items() for _ in range(count)]
+    students = [{idx: mixed_answer(rng, q) for idx, q in enumerate(questions, 1)} for _ in range(num_students)]
+    return questions, students
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean in milliseconds for samples in seconds"""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'mean_ms': None}
+    values = np.array(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'mean_ms': round(float(values.mean()), 3)
+    }
+
+def time_calls(func: Callable[[], Any], repeats: int, warmup: int = 1) -> List[float]:
+    """Wall-clock seconds for each of `repeats` calls, after `warmup` untimed calls"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def write_results(results: Dict[str, Any], output: Optional[str]):
+    """Print results and, if given, save them as JSON"""
+    text = json.dumps(results, indent=2)
+    print(text)
+    if output:
+        Path(output).write_text(text)
@@ -1,18 +1,27 @@
 import os 
 from dotenv import load_dotenv
 import google.generativeai as genai
+from model_pool import build_gemini_pool
 
 load_dotenv()
 
 API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Optional routing pool (model_pool.py): comma-separated keys and models, e.g.
+# GEMINI_API_KEYS=key1,key2  GEMINI_MODELS=models/gemini-2.5-flash,models/gemini-2.0-flash
+# GEMINI_MODEL_WEIGHTS=1,0.5  GEMINI_KEY_QUOTAS=250,250 (daily requests per key)
+API_KEYS = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()] or ([API_KEY] if API_KEY else [])
+MODEL_NAMES = [m.strip() for m in os.getenv("GEMINI_MODELS", "").split(",") if m.strip()] or ["models/gemini-2.5-flash"]
+MODEL_WEIGHTS = [float(w) for w in os.getenv("GEMINI_MODEL_WEIGHTS", "").split(",") if w.strip()]
+KEY_DAILY_QUOTAS = [int(q) for q in os.getenv("GEMINI_KEY_QUOTAS", "").split(",") if q.strip()]
+
 API_avai = False
-model = None
+model = None  # ModelPool with the same generate_content() interface as genai.GenerativeModel
 
-if API_KEY:
+if API_KEYS:
     try:
-        genai.configure(api_key=API_KEY)
-        model = genai.GenerativeModel("models/gemini-2.5-flash")
+        genai.configure(api_key=API_KEYS[0])
+        model = build_gemini_pool(API_KEYS, MODEL_NAMES, MODEL_WEIGHTS, KEY_DAILY_QUOTAS)
         API_avai = True
     except Exception:
         pass
@@ -23,7 +32,8 @@ OPTIMAL_CONTENT_LENGTH = 1500  # Target length for API calls
 MAX_PDF_PAGES = 5 
 REQUEST_COOLDOWN = 10
 
-DAILY_LIMIT = 10  
+DAILY_LIMIT = 10  # Interactive generations per session per day
+BACKGROUND_DAILY_LIMIT = int(os.getenv("BACKGROUND_DAILY_LIMIT", "200"))  # Gemini calls per day for paper builds, prewarm and LLM grading, all processes (rate_limit.DailyQuota)
 MAX_CACHE_AGE_HOURS = 48  # Increased cache age
 
 # Image optimization settings
@@ -38,4 +48,66 @@ ENABLE_IMAGE_OPTIMIZATION = True
 
 # ML Evaluation settings
 ENABLE_SEMANTIC_EVALUATION = True
-SEMANTIC_SIMILARITY_THRESHOLD = 0.6  # Minimum similarity for partial credit
\ No newline at end of file
+SEMANTIC_SIMILARITY_THRESHOLD = 0.6  # Minimum similarity for partial credit
+SHORT_ANSWER_WORDS = 20  # Answers below this many words are "short"
+SHORT_ANSWER_POLICY = "semantic"  # semantic | keyword: how short answers are scored (keyword skips encoding)
+CHUNK_LONG_ANSWERS = os.getenv("CHUNK_LONG_ANSWERS", "0") == "1"  # Encode long answers sentence by sentence instead of truncating them (changes their scores)
+CHUNK_ANSWER_WORDS = 180  # Answers longer than this are chunked: about the model's 256-wordpiece truncation point
+CHUNK_MAX_WORDS = 50  # Longer sentences are cut into windows of this many words
+ENABLE_RESULT_CACHE = True  # Reuse evaluations of identical answers (result_cache.py)
+RESULT_CACHE_MAX_ENTRIES = 20000
+ENABLE_ANSWER_STORE = True  # Keep student answer embeddings for clustering (answer_store.py)
+ANSWER_CLUSTER_THRESHOLD = 0.9  # Average cosine similarity for answers to share a review cluster
+ENABLE_COLLUSION_CHECK = True  # Flag near-copied answers between students after each submission (similarity_index.py)
+COLLUSION_THRESHOLD = 0.95  # Cosine similarity at which two students' answers are flagged
+COLLUSION_MIN_WORDS = 20  # Shorter answers to the same question are alike anyway
+COLLUSION_LSH_BITS = 14  # Hyperplanes per LSH table
+COLLUSION_LSH_TABLES = 12  # More tables: fewer missed pairs, more candidates to compare
+EVAL_SERVICE_URL = os.getenv("EVAL_SERVICE_URL", "")  # e.g. http://127.0.0.1:8765 to grade via eval_service.py
+EVAL_SERVICE_HOST = "127.0.0.1"
+EVAL_SERVICE_PORT = int(os.getenv("EVAL_SERVICE_PORT", "8765"))
+EVAL_SERVICE_TIMEOUT = 60  # Seconds per request before falling back to in-process grading
+SEMANTIC_MODEL_NAME = 'all-MiniLM-L6-v2'  # Lightweight, fast model
+SEMANTIC_MODEL_PATH = os.getenv("SEMANTIC_MODEL_PATH", "models/all-MiniLM-L6-v2")  # Local copy, used if present
+PRELOAD_SEMANTIC_MODEL = True  # Load the model at server start instead of on first submission
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | static (see embedding_backends.py)
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "models/all-MiniLM-L6-v2-onnx")  # Written by `python embedding_backends.py export-onnx`
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") == "1"  # Use the int8 model when it has been exported
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 = ONNX Runtime default (all cores)
+STATIC_MODEL_PATH = os.getenv("STATIC_MODEL_PATH", "models/all-MiniLM-L6-v2-static")  # Written by `python embedding_backends.py distill-static`
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64"))  # In-memory budget for model answer / key point embeddings
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")  # e.g. "embedding_cache" to keep embeddings across restarts
+ENABLE_EVAL_SCHEDULER = True  # Encode answers from concurrent submissions together (eval_scheduler.py)
+EVAL_BATCH_WINDOW_MS = 30  # How long the first pending answer waits for others
+EVAL_MAX_BATCH = 128  # Texts that trigger a batch before the window ends
+ENABLE_BACKGROUND_EVALUATION = True  # Grade submissions in a job worker and show results as they arrive
+EVAL_PROGRESS_BATCH = 4  # Descriptive questions graded per step before partial results are published
+DEBUG_MODE = os.getenv("DEBUG_MODE", "0") == "1"  # Show internal timings in the UI
+ENABLE_EVAL_METRICS = os.getenv("ENABLE_EVAL_METRICS", "0") == "1"  # Per-stage grading timings (eval_metrics.py)
+EVAL_METRICS_WINDOW = 1000  # Most recent samples kept per stage / question type / batch size
+
+# Headless generation jobs (prewarm, exam paper builder)
+BATCH_REQUESTS_PER_MINUTE = 6  # Same pace as REQUEST_COOLDOWN
+BATCH_MAX_REQUESTS = 200  # Per job run
+MAX_QUESTIONS_PER_CALL = 10  # Larger sections are split across calls
+PAPER_MAX_WORKERS = 3  # Concurrent generation calls for a full exam paper
+
+# Background job queue (generation runs outside the Streamlit request thread)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # In-process workers; 0 = use `python job_queue.py`
+JOB_POLL_INTERVAL = 1.0  # Seconds between queue/status polls
+JOB_TIMEOUT_SECONDS = 300  # Running jobs whose lock has not been touched for this long are picked up again
+JOB_HEARTBEAT_SECONDS = 30  # How often a worker touches the lock of the job it is running
+JOB_RETENTION_HOURS = 24  # Finished job records older than this are deleted by the workers
+JOB_CLEANUP_INTERVAL = 3600  # Seconds between those cleanups, per process
+
+# Optional batched Gemini grading of descriptive answers (llm_grading.py)
+ENABLE_LLM_GRADING = os.getenv("ENABLE_LLM_GRADING", "0") == "1"  # Uses API quota; semantic scores are shown meanwhile
+LLM_GRADING_BATCH_SIZE = 25  # Distinct answers per request
+LLM_GRADING_MAX_CHARS = 12000  # Answer text per request
+LLM_GRADING_MIN_PENDING = 20  # Background jobs wait until a question has this many ungraded answers
+LLM_GRADING_MAX_REQUESTS = 20  # Per job run
+
+# Bulk re-grading of stored history (regrade.py)
+REGRADE_WORKERS = int(os.getenv("REGRADE_WORKERS", "0"))  # Processes; 0 = one per CPU core
+REGRADE_CHUNK_SIZE = 2000  # Unique answers per worker task
+REGRADE_BATCH_SIZE = 256  # Texts per model.encode() batch inside a worker
@@ -0,0 +1,243 @@
+"""Embedding backends behind semantic_model.get_model().
+
+Every backend offers the part of SentenceTransformer.encode() that evaluate.py
+uses, so grading code doesn't care which one is loaded (EMBEDDING_BACKEND):
+
+- torch: sentence-transformers on PyTorch (default)
+- onnx:  the same MiniLM exported to ONNX Runtime, optionally int8-quantized,
+         with mean pooling + normalization done in NumPy
+- static: a per-token embedding table distilled from MiniLM, mean-pooled in
+         NumPy from a memory-mapped .npy; no torch import (~1 GB less RSS per
+         worker) at some accuracy cost
+
+Export the ONNX model / distill the static table once:
+
+    python embedding_backends.py export-onnx           # writes ONNX_MODEL_PATH
+    python embedding_backends.py distill-static        # writes STATIC_MODEL_PATH
+"""
+import argparse
+import inspect
+import json
+from pathlib import Path
+
+import numpy as np
+
+from config import (EMBEDDING_BACKEND, ONNX_MODEL_PATH, ONNX_QUANTIZED, ONNX_INTRA_OP_THREADS,
+                    STATIC_MODEL_PATH)
+
+META_FILE = "embedding_meta.json"
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+STATIC_TABLE_FILE = "embeddings.npy"
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Mean over real tokens, as sentence-transformers' Pooling(mean) does"""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+class OnnxEmbeddingBackend:
+    """MiniLM on ONNX Runtime (CPU) with a SentenceTransformer-compatible encode()"""
+
+    def __init__(self, model_dir: str = ONNX_MODEL_PATH, quantized: bool = ONNX_QUANTIZED,
+                 intra_op_threads: int = ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        meta = json.loads((model_dir / META_FILE).read_text())
+        model_file = model_dir / ONNX_INT8_FILE
+        if not quantized or not model_file.exists():
+            model_file = model_dir / ONNX_FILE
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(str(model_file), options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=meta['max_seq_length'])
+        self.tokenizer.enable_padding()  # Pad to the longest text in each batch
+        self.normalize = meta['normalize']
+        self.dimension = meta['dimension']
+        self.model_file = model_file.name
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        embeddings = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        # Longest first, so each batch pads to similar lengths (as sentence-transformers does)
+        order = np.argsort([-len(s) for s in sentences], kind='stable')
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in idx])
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': attention_mask
+            }
+            if 'token_type_ids' in self.input_names:
+                feeds['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, feeds)[0]
+            embeddings[idx] = mean_pool(token_embeddings, attention_mask)
+        if self.normalize or normalize_embeddings:
+            embeddings = normalize_rows(embeddings)
+        return embeddings[0] if single else embeddings
+
+class StaticEmbeddingBackend:
+    """Mean of distilled per-token vectors; pure NumPy + tokenizers"""
+
+    def __init__(self, model_dir: str = STATIC_MODEL_PATH):
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        meta = json.loads((model_dir / META_FILE).read_text())
+        # Memory-mapped: pages are shared between worker processes and only touched rows load
+        self.table = np.load(model_dir / STATIC_TABLE_FILE, mmap_mode='r')
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=meta['max_seq_length'])
+        self.special_ids = set(meta.get('special_ids', []))
+        self.normalize = meta['normalize']
+        self.dimension = self.table.shape[1]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for row, encoding in enumerate(self.tokenizer.encode_batch(list(sentences))):
+            ids = [i for i in encoding.ids if i not in self.special_ids]
+            if ids:
+                embeddings[row] = self.table[ids].astype(np.float32).mean(axis=0)
+        if self.normalize or normalize_embeddings:
+            embeddings = normalize_rows(embeddings)
+        return embeddings[0] if single else embeddings
+
+def load_embedding_backend(name: str = EMBEDDING_BACKEND, source: str = None):
+    """Instantiate a backend; source is the model name/path (export directory for onnx/static)"""
+    if name == 'onnx':
+        return OnnxEmbeddingBackend(source or ONNX_MODEL_PATH)
+    if name == 'static':
+        return StaticEmbeddingBackend(source or STATIC_MODEL_PATH)
+    if name == 'torch':
+        from sentence_transformers import SentenceTransformer
+        from semantic_model import get_model_source
+        return SentenceTransformer(source or get_model_source(), device='cpu')
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}'")
+
+def export_onnx(source: str, out_dir: str = ONNX_MODEL_PATH, quantize: bool = True, opset: int = 14) -> Path:
+    """Export a sentence-transformers model's encoder to ONNX (+ int8 copy)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(source, device='cpu')
+    transformer = st_model[0]
+    pooling = st_model[1]
+    if not getattr(pooling, 'pooling_mode_mean_tokens', False):
+        raise ValueError("Only mean-pooling models can be exported")
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    sample = tokenizer(["Export sample sentence"], return_tensors='pt')
+    input_names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = auto_model
+
+        def forward(self, *inputs):
+            return self.encoder(**dict(zip(input_names, inputs)))[0]
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dynamic_axes = {n: {0: 'batch', 1: 'sequence'} for n in input_names + ['token_embeddings']}
+    export_kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs['dynamo'] = False  # Newer torch defaults to the dynamo exporter
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(), tuple(sample[n] for n in input_names), str(out_dir / ONNX_FILE),
+            input_names=input_names, output_names=['token_embeddings'],
+            dynamic_axes=dynamic_axes, opset_version=opset, **export_kwargs
+        )
+    tokenizer.save_pretrained(str(out_dir))  # tokenizer.json for the fast tokenizer
+
+    meta = {
+        'source': source,
+        'max_seq_length': st_model.max_seq_length,
+        'dimension': st_model.get_sentence_embedding_dimension(),
+        'normalize': any(type(module).__name__ == 'Normalize' for module in st_model)
+    }
+    (out_dir / META_FILE).write_text(json.dumps(meta, indent=2))
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(str(out_dir / ONNX_FILE), str(out_dir / ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+    return out_dir
+
+def distill_static(source: str, out_dir: str = STATIC_MODEL_PATH, dtype: str = 'float16',
+                   batch_size: int = 256) -> Path:
+    """Build the static table: every vocabulary token embedded on its own by the transformer.
+
+    Pooling over a sentence's token rows then approximates the transformer's
+    sentence embedding (the Model2Vec recipe, without the PCA step).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(source, device='cpu')
+    tokenizer = st_model[0].tokenizer
+    vocab = tokenizer.get_vocab()
+    tokens = [token for token, _ in sorted(vocab.items(), key=lambda item: item[1])]
+    # Continuation pieces are embedded without their ## marker
+    texts = [token[2:] if token.startswith('##') and len(token) > 2 else token for token in tokens]
+    table = st_model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                            show_progress_bar=True, normalize_embeddings=True)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / STATIC_TABLE_FILE, table.astype(dtype))
+    tokenizer.save_pretrained(str(out_dir))
+    meta = {
+        'source': source,
+        'max_seq_length': st_model.max_seq_length,
+        'dimension': int(table.shape[1]),
+        'normalize': True,
+        'special_ids': sorted(set(tokenizer.all_special_ids))
+    }
+    (out_dir / META_FILE).write_text(json.dumps(meta, indent=2))
+    return out_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backend tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export-onnx', help="Export MiniLM to ONNX (+ int8)")
+    export_parser.add_argument('--source', help="Model name or path (default: semantic model source)")
+    export_parser.add_argument('--out', default=ONNX_MODEL_PATH)
+    export_parser.add_argument('--no-quantize', action='store_true')
+    static_parser = subparsers.add_parser('distill-static', help="Distill the static token-embedding table")
+    static_parser.add_argument('--source', help="Model name or path (default: semantic model source)")
+    static_parser.add_argument('--out', default=STATIC_MODEL_PATH)
+    static_parser.add_argument('--dtype', choices=['float16', 'float32'], default='float16')
+    args = parser.parse_args()
+
+    from semantic_model import get_model_source
+    if args.command == 'export-onnx':
+        print(f"Exported to {export_onnx(args.source or get_model_source(), args.out, not args.no_quantize)}")
+    elif args.command == 'distill-static':
+        print(f"Distilled to {distill_static(args.source or get_model_source(), args.out, args.dtype)}")
@@ -0,0 +1,121 @@
+"""Bounded LRU cache for model-answer / key-point embeddings.
+
+Keys are sha256 digests of the embedding model and the exact texts, so they are
+small and identical in every process. Entries are evicted least-recently-used
+once their arrays exceed the byte budget. With a disk directory configured,
+every entry is also written there as an .npz archive, so warm embeddings survive restarts
+and are shared between worker processes.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+def embedding_key(model_id: Optional[str], texts: Iterable[str]) -> str:
+    """Stable digest of the model and texts (length-prefixed, so joins can't collide)"""
+    digest = hashlib.sha256(f"{model_id}".encode())
+    for text in texts:
+        data = text.encode()
+        digest.update(f"|{len(data)}:".encode())
+        digest.update(data)
+    return digest.hexdigest()
+
+class EmbeddingCache:
+    """LRU of {name: np.ndarray} entries with a byte budget and optional disk tier"""
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(value: Dict[str, np.ndarray]) -> int:
+        return sum(array.nbytes for array in value.values())
+
+    def _disk_file(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._load_from_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, np.ndarray]):
+        with self._lock:
+            self._insert(key, value)
+        self._save_to_disk(key, value)
+
+    def _insert(self, key: str, value: Dict[str, np.ndarray]):
+        size = self._size(value)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= self._size(old)
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._size(evicted)
+            self.evictions += 1
+
+    def _load_from_disk(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        if self.disk_dir is None:
+            return None
+        try:
+            with np.load(self._disk_file(key)) as data:
+                return {name: data[name] for name in data.files}
+        except Exception:
+            return None
+
+    def _save_to_disk(self, key: str, value: Dict[str, np.ndarray]):
+        if self.disk_dir is None:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = self.disk_dir / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez(temp_file, **value)
+            temp_file.replace(self._disk_file(key))
+        except Exception:
+            pass
+
+    def clear(self):
+        """Drop the in-memory tier (the disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else None
+            }
@@ -0,0 +1,129 @@
+"""Per-stage timings for the evaluation hot path.
+
+    with span('encode', kind='descriptive', batch=len(texts)):
+        ...
+
+Each finished span adds its duration to three rolling windows of the last
+EVAL_METRICS_WINDOW samples: one for the stage, one for the stage and question
+type, and one for the stage and batch-size bucket (1, 2-3, 4-7, 8-15, ...).
+A batch holding several question types passes kind={type: rows}: each type's
+window gets the duration in proportion to its rows.
+snapshot() turns them into p50/p95/p99/mean milliseconds, and export_json()
+serializes that. It is served at GET /metrics by eval_service.py and offered
+as a download in the app with DEBUG_MODE.
+
+With ENABLE_EVAL_METRICS off, span() returns one shared no-op context manager:
+no clock reads, no allocation and no locking.
+"""
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from config import ENABLE_EVAL_METRICS, EVAL_METRICS_WINDOW
+
+_enabled = ENABLE_EVAL_METRICS
+_series: Dict[Tuple[str, str, str], deque] = {}
+_lock = threading.Lock()
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ('stage', 'kind', 'batch', 'start')
+
+    def __init__(self, stage: str, kind: Union[str, Dict[str, int], None], batch: Optional[int]):
+        self.stage = stage
+        self.kind = kind
+        self.batch = batch
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start, self.kind, self.batch)
+        return False
+
+def span(stage: str, kind: Union[str, Dict[str, int], None] = None, batch: Optional[int] = None):
+    """Context manager timing one stage (kind: question type or {type: rows}, batch: items handled together)"""
+    if not _enabled:
+        return _NOOP
+    return _Span(stage, kind, batch)
+
+def batch_bucket(size: int) -> str:
+    if size <= 1:
+        return "1"
+    low = 1 << (int(size).bit_length() - 1)
+    return f"{low}-{2 * low - 1}"
+
+def record(stage: str, seconds: float, kind: Union[str, Dict[str, int], None] = None,
+           batch: Optional[int] = None):
+    samples = [((stage, 'all', ''), seconds)]
+    if isinstance(kind, dict):
+        total = sum(kind.values())
+        samples.extend(((stage, 'kind', label), seconds * rows / total) for label, rows in kind.items() if rows)
+    elif kind is not None:
+        samples.append(((stage, 'kind', kind), seconds))
+    if batch is not None:
+        samples.append(((stage, 'batch', batch_bucket(batch)), seconds))
+    with _lock:
+        for key, value in samples:
+            window = _series.get(key)
+            if window is None:
+                window = _series[key] = deque(maxlen=EVAL_METRICS_WINDOW)
+            window.append(value)
+
+def _stats(samples) -> Dict[str, Any]:
+    values = np.fromiter(samples, dtype=np.float64, count=len(samples)) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(values),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(values.mean()), 3)
+    }
+
+def snapshot() -> Dict[str, Any]:
+    """{stage: {'all': stats, 'by_kind': {kind: stats}, 'by_batch': {bucket: stats}}}"""
+    with _lock:
+        series = {key: list(samples) for key, samples in _series.items()}
+    stages: Dict[str, Dict[str, Any]] = {}
+    for (stage, dimension, label), samples in sorted(series.items()):
+        entry = stages.setdefault(stage, {'all': None, 'by_kind': {}, 'by_batch': {}})
+        if dimension == 'all':
+            entry['all'] = _stats(samples)
+        else:
+            entry[f"by_{dimension}"][label] = _stats(samples)
+    return {'enabled': _enabled, 'window': EVAL_METRICS_WINDOW, 'stages': stages}
+
+def export_json(path: Optional[Path] = None) -> str:
+    """Snapshot as JSON text, also written (atomically) to path if given"""
+    text = json.dumps(snapshot(), indent=2)
+    if path is not None:
+        path = Path(path)
+        temp_file = path.with_suffix('.tmp')
+        temp_file.write_text(text)
+        temp_file.replace(path)
+    return text
+
+def configure(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+def reset():
+    with _lock:
+        _series.clear()
@@ -0,0 +1,152 @@
+"""Micro-batching of student-answer encoding across concurrent submissions.
+
+When a whole class submits at once, every evaluate_batch() call used to run its
+own small encode(). Here callers hand their texts to one background thread,
+which, once submissions overlap, waits up to EVAL_BATCH_WINDOW_MS after the
+first request (or until EVAL_MAX_BATCH texts are pending), encodes everything
+in one batch (identical texts once) and hands each caller back its own rows.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from config import ENABLE_EVAL_SCHEDULER, EVAL_BATCH_WINDOW_MS, EVAL_MAX_BATCH
+
+_enabled = ENABLE_EVAL_SCHEDULER
+_window_ms = EVAL_BATCH_WINDOW_MS
+_max_batch = EVAL_MAX_BATCH
+_batcher = None
+_batcher_lock = threading.Lock()
+
+class _Request:
+    __slots__ = ('model', 'texts', 'future')
+
+    def __init__(self, model, texts: List[str]):
+        self.model = model
+        self.texts = texts
+        self.future = Future()
+
+class MicroBatcher:
+    def __init__(self, window_ms: float = EVAL_BATCH_WINDOW_MS, max_batch: int = EVAL_MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.texts = 0
+        self.encoded = 0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="eval-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, model, texts: List[str]) -> Future:
+        request = _Request(model, list(texts))
+        with self._submit_lock:
+            if not self._closed:
+                self._queue.put(request)
+                return request.future
+        # Caller held on to a batcher that configure() has since closed
+        self._process([request])
+        return request.future
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish the queued requests and stop the thread"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def encode(self, model, texts: List[str]) -> np.ndarray:
+        return self.submit(model, texts).result()
+
+    def _run(self):
+        concurrent = False
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            count = len(pending[0].texts)
+            # A lone submitter isn't delayed; the window only applies once submissions overlap
+            deadline = time.monotonic() + (self.window if concurrent or not self._queue.empty() else 0)
+            while count < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Closed: the sentinel comes after every accepted request
+                    self._process(pending)
+                    return
+                pending.append(request)
+                count += len(request.texts)
+            concurrent = len(pending) > 1
+            self._process(pending)
+
+    def _process(self, pending: List[_Request]):
+        # Normally one model, but keep callers of different models apart
+        by_model = {}
+        for request in pending:
+            by_model.setdefault(id(request.model), []).append(request)
+        for requests in by_model.values():
+            rows = {}
+            for request in requests:
+                for text in request.texts:
+                    rows.setdefault(text, len(rows))
+            try:
+                embeddings = requests[0].model.encode(list(rows), convert_to_numpy=True,
+                                                      show_progress_bar=False, batch_size=self.max_batch)
+            except Exception as e:
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += sum(len(request.texts) for request in requests)
+            self.encoded += len(rows)
+            for request in requests:
+                request.future.set_result(embeddings[[rows[text] for text in request.texts]])
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'encoded': self.encoded,
+            'avg_batch': self.texts / self.batches if self.batches else None
+        }
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(_window_ms, _max_batch)
+        return _batcher
+
+def configure(enabled: Optional[bool] = None, window_ms: Optional[float] = None, max_batch: Optional[int] = None):
+    """Change scheduler settings at runtime (used by benchmarks); takes effect for new batches"""
+    global _enabled, _window_ms, _max_batch, _batcher
+    with _batcher_lock:
+        if enabled is not None:
+            _enabled = enabled
+        if window_ms is not None:
+            _window_ms = window_ms
+        if max_batch is not None:
+            _max_batch = max_batch
+        previous, _batcher = _batcher, None
+    if previous is not None:
+        # Outside the lock: its queued requests still need encoding
+        previous.close()
+
+def encode_answers(model, texts: List[str], batch_size: int = 8) -> np.ndarray:
+    """Embeddings for student answers, batched with other submissions when enabled"""
+    if not texts:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    if not _enabled:
+        return model.encode(texts, convert_to_numpy=True, show_progress_bar=False, batch_size=batch_size)
+    return get_batcher().encode(model, texts)
@@ -0,0 +1,185 @@
+"""Local evaluation service shared by all Streamlit worker processes.
+
+One process owns the embedding model, the embedding/result caches and the
+micro-batching scheduler; web workers send submissions to it over localhost
+HTTP instead of each loading a model:
+
+    python eval_service.py --port 8765
+    EVAL_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Without EVAL_SERVICE_URL (single-node dev) everything runs in-process, and
+clients also fall back to in-process evaluation when the service can't be
+reached.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import EVAL_SERVICE_URL, EVAL_SERVICE_TIMEOUT, EVAL_SERVICE_HOST, EVAL_SERVICE_PORT
+
+SERVICE_RETRY_SECONDS = 30  # After a failed call, evaluate in-process for this long
+SERVICE_MODEL_TTL = 60  # Seconds the service's model id is trusted before asking again
+
+_serving = False  # True inside the service process: never call ourselves
+_down_until = 0.0
+_service_model: Optional[Tuple[Optional[str], float]] = None  # (model id, when fetched)
+_state_lock = threading.Lock()
+
+def service_enabled() -> bool:
+    return bool(EVAL_SERVICE_URL) and not _serving and time.time() >= _down_until
+
+def _mark_down():
+    global _down_until
+    with _state_lock:
+        _down_until = time.time() + SERVICE_RETRY_SECONDS
+
+def _post(path: str, payload: Dict[str, Any], timeout: float = EVAL_SERVICE_TIMEOUT) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        EVAL_SERVICE_URL.rstrip('/') + path,
+        data=json.dumps(payload).encode(),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def remote_evaluate(pairs: List[Tuple[Dict[str, Any], Any]], short_answer_policy: str) -> Optional[List[Dict[str, Any]]]:
+    """Evaluations from the service, or None if it is unreachable (caller falls back)"""
+    try:
+        return _post('/evaluate', {'pairs': pairs, 'short_answer_policy': short_answer_policy})['evaluations']
+    except (urllib.error.URLError, OSError, ValueError, KeyError):
+        _mark_down()
+        return None
+
+def remote_publish(questions: List[Dict[str, Any]]) -> Optional[bool]:
+    """Have the service compile answer keys (it owns the model); None if unreachable"""
+    try:
+        return bool(_post('/publish', {'questions': questions})['ok'])
+    except (urllib.error.URLError, OSError, ValueError, KeyError):
+        _mark_down()
+        return None
+
+def remote_encode(answers: List[str]) -> Optional[Tuple[Optional[str], List[List[float]]]]:
+    """(model id, normalized whole-answer vectors) from the service's model, or None if unreachable"""
+    global _service_model
+    try:
+        reply = _post('/encode', {'answers': answers})
+    except (urllib.error.URLError, OSError, ValueError):
+        _mark_down()
+        return None
+    if reply.get('vectors') is None:
+        return None
+    with _state_lock:
+        _service_model = (reply.get('model'), time.time())
+    return reply.get('model'), reply['vectors']
+
+def embedding_model_id() -> Optional[str]:
+    """Id of the model that encodes answers for this process: the service's when it is used.
+
+    Stored answer vectors and similarity shards are tagged with it, so web
+    workers (which don't load a model) and the service agree on what matches.
+    """
+    global _service_model
+    from semantic_model import model_id
+
+    if not service_enabled():
+        return model_id()
+    with _state_lock:
+        cached = _service_model
+    if cached is not None and time.time() - cached[1] < SERVICE_MODEL_TTL:
+        return cached[0]
+    status = remote_status()
+    if status is None:
+        _mark_down()
+        return model_id()
+    service_id = status.get('model', {}).get('id')
+    with _state_lock:
+        _service_model = (service_id, time.time())
+    return service_id
+
+def remote_status(timeout: float = 2) -> Optional[Dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(EVAL_SERVICE_URL.rstrip('/') + '/health', timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+class EvaluationHandler(BaseHTTPRequestHandler):
+    def _send(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            from eval_metrics import snapshot
+            return self._send(200, snapshot())
+        if self.path != '/health':
+            return self._send(404, {'error': 'not found'})
+        from evaluate import embedding_cache_stats
+        from result_cache import result_cache_stats
+        from semantic_model import model_status, model_id
+        self._send(200, {
+            'model': {**model_status(), 'id': model_id()},
+            'embedding_cache': embedding_cache_stats(),
+            'result_cache': result_cache_stats()
+        })
+
+    def do_POST(self):
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        except ValueError:
+            return self._send(400, {'error': 'invalid JSON'})
+        try:
+            if self.path == '/evaluate':
+                from evaluate import evaluate_many
+                from config import SHORT_ANSWER_POLICY
+                pairs = [(question, answer) for question, answer in payload['pairs']]
+                policy = payload.get('short_answer_policy') or SHORT_ANSWER_POLICY
+                return self._send(200, {'evaluations': evaluate_many(pairs, policy)})
+            if self.path == '/encode':
+                from evaluate import encode_answer_vectors
+                from semantic_model import model_id
+                vectors = encode_answer_vectors(payload['answers'])
+                return self._send(200, {'model': model_id(),
+                                        'vectors': None if vectors is None else vectors.tolist()})
+            if self.path == '/publish':
+                from answer_keys import publish_answer_keys
+                return self._send(200, {'ok': publish_answer_keys(payload['questions'])})
+        except Exception as e:
+            return self._send(500, {'error': str(e)})
+        self._send(404, {'error': 'not found'})
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for the startup line
+
+def serve(host: str = EVAL_SERVICE_HOST, port: int = EVAL_SERVICE_PORT):
+    global _serving
+    _serving = True
+    from semantic_model import load_model, model_status
+    load_model()
+    status = model_status()
+    server = ThreadingHTTPServer((host, port), EvaluationHandler)
+    server.daemon_threads = True
+    print(f"Evaluation service on http://{host}:{port} (model: {status['status']}, {status['backend']})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the shared evaluation service")
+    parser.add_argument('--host', default=EVAL_SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=EVAL_SERVICE_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,38 +1,51 @@
+import copy
+import time
+from collections import Counter
+
 import streamlit as st
-from config import ENABLE_SEMANTIC_EVALUATION, SEMANTIC_SIMILARITY_THRESHOLD
+from config import (ENABLE_SEMANTIC_EVALUATION, EMBEDDING_CACHE_MAX_MB, EMBEDDING_CACHE_DIR,
+                    SHORT_ANSWER_WORDS, SHORT_ANSWER_POLICY, CHUNK_LONG_ANSWERS, CHUNK_ANSWER_WORDS,
+                    ENABLE_RESULT_CACHE, EVAL_PROGRESS_BATCH)
 import numpy as np
+from semantic_model import get_model, model_status, model_id
+from answer_keys import get_answer_key, get_question_kind, get_question_type, question_digest, extract_keywords, parse_word_limit, normalize_choice
+from embedding_cache import EmbeddingCache, embedding_key
+from eval_scheduler import encode_answers
+from scoring import score_descriptive, split_answer, normalize_rows
+from result_cache import scoring_config_version, result_key, get_result, put_result
+from keyword_matcher import key_point_matcher, label_matcher
+from eval_service import service_enabled, remote_evaluate, remote_encode
+from answer_store import record_answer_embeddings
+from eval_metrics import span
 
-# Lazy load semantic model
-_semantic_model = None
 # Cache for model answer and key point embeddings (they don't change per question)
-_embedding_cache = {}
+_embedding_cache = EmbeddingCache(int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024), EMBEDDING_CACHE_DIR or None)
 
 def get_semantic_model():
-    """Lazy load semantic model to avoid loading on import"""
-    global _semantic_model
-    if _semantic_model is None and ENABLE_SEMANTIC_EVALUATION:
-        try:
-            from sentence_transformers import SentenceTransformer
-            _semantic_model = SentenceTransformer('all-MiniLM-L6-v2')  # Lightweight, fast model
-        except ImportError as e:
-            st.warning(f"Semantic evaluation unavailable: sentence-transformers not installed. Using keyword matching.")
-            return None
-        except Exception as e:
-            st.warning(f"Semantic evaluation unavailable: {e}. Using keyword matching.")
-            return None
-    return _semantic_model
+    """Shared process-wide model, normally preloaded at server start (see semantic_model.py)"""
+    if not ENABLE_SEMANTIC_EVALUATION:
+        return None
+    model = get_model()
+    if model is None:
+        st.warning(f"Semantic evaluation unavailable: {model_status()['error']}. Using keyword matching.")
+    return model
 
-def get_cached_embeddings(model_answer, key_points):
+def get_cached_embeddings(model_answer, key_points, question=None):
     """Get or compute embeddings for model answer and key points (cache them)"""
-    cache_key = f"{model_answer}_{hash(tuple(key_points))}"
-    
-    if cache_key in _embedding_cache:
-        return _embedding_cache[cache_key]
+    # Compiled when the assessment was published (see answer_keys.py)
+    answer_key = get_answer_key(question) if question is not None else None
+    if answer_key and 'model_emb' in answer_key:
+        return answer_key
     
     model = get_semantic_model()
     if not model:
         return None
     
+    cache_key = embedding_key(model_id(), [model_answer] + list(key_points))
+    cached = _embedding_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # Encode model answer and key points together
     texts = [model_answer] + key_points
     embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
@@ -41,26 +54,205 @@ def get_cached_embeddings(model_answer, key_points):
         'model_emb': embeddings[0:1],
         'key_point_embs': embeddings[1:]
     }
-    
-    # Cache the result (limit cache size to prevent memory issues)
-    if len(_embedding_cache) < 50:  # Limit to 50 cached questions
-        _embedding_cache[cache_key] = result
+    _embedding_cache.put(cache_key, result)
     
     return result
 
+def embedding_cache_stats():
+    return _embedding_cache.stats()
+
 def evaluate_answer(question, student_answer):
-    if 'options' in question:
-        return evaluate_mcq(question, student_answer)
-    elif 'labels' in question:
-        return evaluate_diagram_labeling(question, student_answer)
-    else:
-        return evaluate_descriptive(question, student_answer)
+    with span('evaluate_answer', kind=get_question_type(question), batch=1):
+        return evaluate_many([(question, student_answer)])[0]
+
+def evaluate_many(pairs, short_answer_policy=SHORT_ANSWER_POLICY):
+    """Evaluate (question, student_answer) pairs in one pass; every public evaluate_* goes through here.
+    
+    All descriptive answers that get semantic scoring share one encode and one
+    vectorized scoring call. short_answer_policy decides answers under
+    SHORT_ANSWER_WORDS words: 'semantic' scores them like any other,
+    'keyword' uses keyword matching for them (no encoding).
+    Answers already evaluated (by anyone) come from the result cache.
+    With EVAL_SERVICE_URL set, the shared evaluation service does all of this.
+    """
+    if service_enabled():
+        with span('remote', batch=len(pairs)):
+            evaluations = remote_evaluate(pairs, short_answer_policy)
+        if evaluations is not None:
+            return evaluations
+    
+    if not ENABLE_RESULT_CACHE:
+        return evaluate_uncached(pairs, short_answer_policy)
+    
+    if ENABLE_SEMANTIC_EVALUATION and any(get_question_kind(q) == 'descriptive' for q, _ in pairs):
+        # Wait for the model first, so results are stored under the model that scores them
+        get_model()
+    version = scoring_config_version(short_answer_policy)
+    evaluations = [None] * len(pairs)
+    pending = {}  # result key -> indexes of identical answers still to evaluate
+    with span('result_cache', batch=len(pairs)):
+        for i, (question, student_answer) in enumerate(pairs):
+            key = result_key(question_digest(question), student_answer, version)
+            if key not in pending:
+                evaluations[i] = get_result(key)
+                if evaluations[i] is not None:
+                    continue
+            pending.setdefault(key, []).append(i)
+    
+    if pending:
+        keys = list(pending)
+        fresh = evaluate_uncached([pairs[pending[key][0]] for key in keys], short_answer_policy)
+        for key, evaluation in zip(keys, fresh):
+            put_result(key, evaluation)
+            for i in pending[key]:
+                evaluations[i] = copy.deepcopy(evaluation)
+    return evaluations
+
+def evaluate_uncached(pairs, short_answer_policy=SHORT_ANSWER_POLICY):
+    evaluations = [None] * len(pairs)
+    semantic_items = []
+    for i, (question, student_answer) in enumerate(pairs):
+        kind = get_question_kind(question)
+        if kind == 'mcq':
+            with span('mcq', kind=get_question_type(question)):
+                evaluations[i] = evaluate_mcq(question, student_answer)
+        elif kind == 'diagram':
+            with span('diagram', kind=get_question_type(question)):
+                evaluations[i] = evaluate_diagram_labeling(question, student_answer)
+        elif not student_answer or len(student_answer.strip()) < 10:
+            evaluations[i] = too_short_evaluation(question)
+        else:
+            item = {
+                'index': i,
+                'question': question,
+                'student_answer': student_answer,
+                'model_answer': question.get('model_answer', ''),
+                'key_points': question.get('key_points', []),
+                'max_marks': question.get('marks', 5),
+                'word_count': len(student_answer.split())
+            }
+            short = item['word_count'] < SHORT_ANSWER_WORDS
+            if ENABLE_SEMANTIC_EVALUATION and not (short and short_answer_policy == 'keyword'):
+                semantic_items.append(item)
+            else:
+                with span('keyword', kind=get_question_type(question)):
+                    evaluations[i] = keyword_evaluation(item)
+    
+    for item, evaluation in zip(semantic_items, evaluate_semantic_items(semantic_items)):
+        # Fall back to keyword matching where semantic scoring wasn't possible
+        if evaluation is None:
+            with span('keyword', kind=get_question_type(item['question'])):
+                evaluation = keyword_evaluation(item)
+        evaluations[item['index']] = evaluation
+    return evaluations
+
+def chunk_answers(answers):
+    """Texts to encode and each answer's row offsets into them"""
+    # Long answers are encoded sentence by sentence so nothing is truncated
+    texts = []
+    chunk_offsets = [0]
+    for answer in answers:
+        if CHUNK_LONG_ANSWERS and len(answer.split()) > CHUNK_ANSWER_WORDS:
+            texts.extend(split_answer(answer))
+        else:
+            texts.append(answer)
+        chunk_offsets.append(len(texts))
+    return texts, chunk_offsets
+
+def encode_answer_vectors(answers):
+    """Normalized whole-answer vectors, as evaluate_semantic_items computes them (None without a model)"""
+    if service_enabled():
+        # The service's model, so vectors match what it stored while grading
+        remote = remote_encode(list(answers))
+        if remote is not None:
+            return np.asarray(remote[1], dtype=np.float32)
+    model = get_semantic_model()
+    if not model:
+        return None
+    texts, chunk_offsets = chunk_answers(answers)
+    chunks = normalize_rows(encode_answers(model, texts))
+    return normalize_rows(np.add.reduceat(chunks, chunk_offsets[:-1], axis=0))
+
+def evaluate_semantic_items(items):
+    """Semantic evaluations for descriptive items (None where unavailable)"""
+    if not items:
+        return []
+    batch = len(items)
+    # Timings are split across the batch's question types (VSA, SA, LA, ...) by row count
+    kinds = Counter(get_question_type(item['question']) for item in items)
+    try:
+        with span('model', kind=kinds, batch=batch):
+            model = get_semantic_model()
+        if not model:
+            return [None] * len(items)
+        
+        # Model answer / key point embeddings come from the compiled keys or the cache
+        scorable = []
+        with span('key_embeddings', kind=kinds, batch=batch):
+            for item in items:
+                cached = get_cached_embeddings(item['model_answer'], item['key_points'], item['question'])
+                if cached is not None:
+                    scorable.append((item, cached))
+        if not scorable:
+            return [None] * len(items)
+        
+        texts, chunk_offsets = chunk_answers([item['student_answer'] for item, _ in scorable])
+        kinds = Counter(get_question_type(item['question']) for item, _ in scorable)
+        encoded_rows = Counter()
+        for (item, _), start, end in zip(scorable, chunk_offsets, chunk_offsets[1:]):
+            encoded_rows[get_question_type(item['question'])] += end - start
+        
+        # One encode for all answers, shared with other students submitting at the same time
+        with span('encode', kind=encoded_rows, batch=batch):
+            student_embs = encode_answers(model, texts)
+        with span('scoring', kind=kinds, batch=batch):
+            scored = score_descriptive(
+                student_embs,
+                np.concatenate([cached['model_emb'] for _, cached in scorable]),
+                [cached['key_point_embs'] for _, cached in scorable],
+                [item['max_marks'] for item, _ in scorable],
+                [item['word_count'] for item, _ in scorable],
+                [parse_word_limit(get_word_limit(item['question'])) for item, _ in scorable],
+                chunk_offsets,
+                kind=kinds
+            )
+        # Kept for answer clustering and similarity checks
+        with span('answer_store', kind=kinds, batch=batch):
+            record_answer_embeddings([question_digest(item['question']) for item, _ in scorable],
+                                     [item['student_answer'] for item, _ in scorable],
+                                     scored['answer_embeddings'])
+        results = {}
+        with span('feedback', kind=kinds, batch=batch):
+            for i, (item, _) in enumerate(scorable):
+                results[id(item)] = build_semantic_evaluation(scored, i, item['key_points'], item['max_marks'],
+                                                              item['word_count'])
+        return [results.get(id(item)) for item in items]
+    except Exception as e:
+        # Fall back to keyword matching on error
+        return [None] * len(items)
+
+def too_short_evaluation(question):
+    return {
+        'score': 0,
+        'max_score': question.get('marks', 5),
+        'percentage': 0,
+        'feedback': "Answer too short or empty",
+        'matched_points': [],
+        'missing_points': question.get('key_points', []),
+        'word_count': 0
+    }
+
+def keyword_evaluation(item):
+    return evaluate_keyword_based(item['question'], item['student_answer'], item['key_points'],
+                                  item['max_marks'], item['word_count'])
 
 #simple mcq logic
 def evaluate_mcq(question, student_answer):
     correct_answer = question['correct_answer']
     marks = question.get('marks', 1)
-    is_correct = (student_answer == correct_answer)
+    answer_key = get_answer_key(question)
+    normalized_key = answer_key['correct_answer'] if answer_key else normalize_choice(correct_answer)
+    is_correct = (normalize_choice(student_answer) == normalized_key)
     
     return {
         'correct': is_correct,
@@ -84,19 +276,24 @@ def evaluate_diagram_labeling(question, student_answer):
         }
     
     correct_labels = question.get('labels', {})
+    # Label words compiled at publish time (answer_keys.py), else split once per question
+    answer_key = get_answer_key(question)
+    label_keywords = answer_key.get('label_keywords') if answer_key else None
+    keyword_groups = [label_keywords[label] for label in correct_labels] \
+        if label_keywords and set(label_keywords) == set(correct_labels) else None
+    matcher = label_matcher(correct_labels, keyword_groups)
     matched = []
     missing = []
     score = 0
     
-    for label_key, correct_name in correct_labels.items():
+    for label_idx, (label_key, correct_name) in enumerate(correct_labels.items()):
         student_label = student_answer.get(label_key, "").strip().lower()
         correct_lower = correct_name.lower()
         
         # Simple matching: check if student answer contains key words
-        key_words = [w for w in correct_lower.split() if len(w) > 3]
-        matches = sum(1 for word in key_words if word in student_label)
+        matches = matcher.count(label_idx, student_label)
         
-        if matches >= len(key_words) * 0.5 or student_label in correct_lower:
+        if matches >= len(matcher.groups[label_idx]) * 0.5 or student_label in correct_lower:
             matched.append(f"{label_key}: {correct_name}")
             score += question.get('marks', 3) / len(correct_labels)
         else:
@@ -119,121 +316,54 @@ def evaluate_diagram_labeling(question, student_answer):
         'missing_labels': missing
     }
 
-def evaluate_descriptive(question, student_answer):
-    if not student_answer or len(student_answer.strip()) < 10:
-        return {
-            'score': 0,
-            'max_score': question.get('marks', 5),
-            'percentage': 0,
-            'feedback': "Answer too short or empty",
-            'matched_points': [],
-            'missing_points': question.get('key_points', []),
-            'word_count': 0
-        }
-    
-    max_marks = question.get('marks', 5)
-    key_points = question.get('key_points', [])
-    model_answer = question.get('model_answer', '')
-    word_count = len(student_answer.split())
-    
-    # Skip semantic evaluation for very short answers (faster)
-    # Use keyword matching directly for answers < 20 words
-    if word_count < 20 and ENABLE_SEMANTIC_EVALUATION:
-        # Still try semantic if model is loaded, but keyword is faster for short answers
-        semantic_result = evaluate_semantic(student_answer, model_answer, key_points, max_marks, word_count, question)
-        if semantic_result:
-            return semantic_result
-    
-    # Try semantic evaluation first, fall back to keyword matching
-    if ENABLE_SEMANTIC_EVALUATION and word_count >= 20:
-        semantic_result = evaluate_semantic(student_answer, model_answer, key_points, max_marks, word_count, question)
-        if semantic_result:
-            return semantic_result
-    
-    # Fall back to keyword-based evaluation
-    return evaluate_keyword_based(question, student_answer, key_points, max_marks, word_count)
+def evaluate_descriptive(question, student_answer, short_answer_policy=SHORT_ANSWER_POLICY):
+    return evaluate_many([(question, student_answer)], short_answer_policy)[0]
 
 def evaluate_semantic(student_answer, model_answer, key_points, max_marks, word_count, question):
-    """Evaluate using semantic similarity - optimized version"""
-    try:
-        model = get_semantic_model()
-        if not model:
-            return None
-        
-        from sklearn.metrics.pairwise import cosine_similarity
-        
-        # Get cached embeddings for model answer and key points
-        cached = get_cached_embeddings(model_answer, key_points)
-        if cached is None:
-            return None
-        
-        model_emb = cached['model_emb']
-        key_point_embs = cached['key_point_embs']
-        
-        # Only encode student answer (fastest part)
-        student_emb = model.encode([student_answer], convert_to_numpy=True, show_progress_bar=False)
-        student_emb = student_emb.reshape(1, -1)  # Ensure 2D
-        
-        # Overall similarity with model answer (vectorized)
-        overall_similarity = cosine_similarity(student_emb, model_emb)[0][0]
-        
-        # Batch similarity calculation for all key points at once (much faster)
-        if len(key_point_embs) > 0:
-            # Vectorized similarity calculation
-            point_similarities = cosine_similarity(student_emb, key_point_embs)[0]
-            
-            # Classify points based on threshold
-            matched_indices = np.where(point_similarities >= SEMANTIC_SIMILARITY_THRESHOLD)[0]
-            missing_indices = np.where(point_similarities < SEMANTIC_SIMILARITY_THRESHOLD)[0]
-            
-            matched_points = [key_points[i] for i in matched_indices]
-            missing_points = [key_points[i] for i in missing_indices]
-            
-            # Use average of key point similarities and overall similarity
-            avg_key_similarity = np.mean(point_similarities)
-            combined_similarity = (overall_similarity * 0.4 + avg_key_similarity * 0.6)
-        else:
-            matched_points = []
-            missing_points = []
-            combined_similarity = overall_similarity
-        
-        # Map similarity to score (0.6 similarity = 60% of marks, 0.9+ = 90%+)
-        base_score = combined_similarity * max_marks
-        
-        # Adjust for word limit
-        word_limit = question.get('word_limit', '50-100 words')
-        score = adjust_for_word_limit(base_score, word_count, word_limit, max_marks)
-        score = round(score * 2) / 2
-        score = max(0, min(score, max_marks))
-        
-        percentage = (score / max_marks * 100) if max_marks > 0 else 0
-        feedback = generate_semantic_feedback(score, max_marks, matched_points, missing_points, 
-                                               word_count, overall_similarity, len(key_points))
-        
-        return {
-            'score': score,
-            'max_score': max_marks,
-            'percentage': percentage,
-            'feedback': feedback,
-            'matched_points': matched_points,
-            'missing_points': missing_points,
-            'word_count': word_count,
-            'semantic_similarity': float(overall_similarity)
-        }
-    except Exception as e:
-        # Fall back to keyword matching on error
-        return None
+    """Semantic evaluation of one answer, or None if it isn't possible"""
+    return evaluate_semantic_items([{
+        'question': question,
+        'student_answer': student_answer,
+        'model_answer': model_answer,
+        'key_points': key_points,
+        'max_marks': max_marks,
+        'word_count': word_count
+    }])[0]
+
+def build_semantic_evaluation(scored, i, key_points, max_marks, word_count):
+    """Result dict for answer i of a score_descriptive() batch"""
+    start, end = scored['offsets'][i], scored['offsets'][i + 1]
+    matched_mask = scored['matched'][start:end]
+    matched_points = [point for point, matched in zip(key_points, matched_mask) if matched]
+    missing_points = [point for point, matched in zip(key_points, matched_mask) if not matched]
+    score = float(scored['score'][i])
+    overall_similarity = float(scored['overall_similarity'][i])
+    
+    percentage = (score / max_marks * 100) if max_marks > 0 else 0
+    feedback = generate_semantic_feedback(score, max_marks, matched_points, missing_points,
+                                          word_count, overall_similarity, len(key_points))
+    
+    return {
+        'score': score,
+        'max_score': max_marks,
+        'percentage': percentage,
+        'feedback': feedback,
+        'matched_points': matched_points,
+        'missing_points': missing_points,
+        'word_count': word_count,
+        'semantic_similarity': overall_similarity
+    }
 
 def evaluate_keyword_based(question, student_answer, key_points, max_marks, word_count):
     """Original keyword-based evaluation (fallback)"""
-    student_lower = student_answer.lower()
     matched_points = []
     missing_points = []
+    # Keywords compiled at publish time (answer_keys.py), else extracted once per question;
+    # one search per distinct keyword
+    answer_key = get_answer_key(question)
+    matcher = key_point_matcher(key_points, answer_key.get('keywords') if answer_key else None)
     
-    for point in key_points:
-        keywords = extract_keywords(point)
-        matches = sum(1 for kw in keywords if kw in student_lower)
-        
+    for point, keywords, matches in zip(key_points, matcher.groups, matcher.group_counts(student_answer)):
         if matches >= 2 or len(keywords) <= 2:
             matched_points.append(point)
         else:
@@ -246,7 +376,7 @@ def evaluate_keyword_based(question, student_answer, key_points, max_marks, word
     
     base_score = coverage_ratio * max_marks
     
-    word_limit = question.get('word_limit', '50-100 words')
+    word_limit = get_word_limit(question)
     score = adjust_for_word_limit(base_score, word_count, word_limit, max_marks)
     
     score = round(score * 2) / 2
@@ -264,22 +394,18 @@ def evaluate_keyword_based(question, student_answer, key_points, max_marks, word
         'word_count': word_count
     }
 
-def extract_keywords(text):
-    common_words = {'the', 'is', 'are', 'was', 'were', 'a', 'an', 'and', 'or', 'but', 
-                   'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-    words = text.lower().split()
-    keywords = [w for w in words if w not in common_words and len(w) > 3]
-    return keywords[:5]
+def get_word_limit(question):
+    answer_key = get_answer_key(question)
+    if answer_key and 'word_limit' in answer_key:
+        return answer_key['word_limit']
+    return question.get('word_limit', '50-100 words')
 
 def adjust_for_word_limit(score, word_count, word_limit, max_marks):
-    if 'VSA' in str(word_limit) or '20-30' in str(word_limit):
-        min_words, max_words = 15, 40
-    elif 'SA' in str(word_limit) or '50' in str(word_limit):
-        min_words, max_words = 40, 100
-    elif 'LA' in str(word_limit) or '100' in str(word_limit):
-        min_words, max_words = 80, 180
-    else:
+    """word_limit is the question's text or a compiled (min_words, max_words)"""
+    limits = parse_word_limit(word_limit)
+    if limits is None:
         return score
+    min_words, max_words = limits
     
     if word_count < min_words:
         penalty = (min_words - word_count) / min_words * 0.3
@@ -358,142 +484,67 @@ def calculate_total_score(results):
         'percentage': percentage
     }
 
-def evaluate_batch(questions, student_answers):
-    """Evaluate multiple questions in batch for faster processing"""
-    if not ENABLE_SEMANTIC_EVALUATION:
-        # If semantic evaluation is disabled, evaluate normally
-        results = []
-        for idx, question in enumerate(questions, 1):
-            student_answer = student_answers.get(idx, "")
-            evaluation = evaluate_answer(question, student_answer)
-            results.append({
-                'question_num': idx,
-                'question': question['question'],
-                'student_answer': student_answer,
-                'evaluation': evaluation
-            })
-        return results
-    
-    model = get_semantic_model()
-    if not model:
-        # Fall back to normal evaluation if model not available
-        results = []
-        for idx, question in enumerate(questions, 1):
-            student_answer = student_answers.get(idx, "")
-            evaluation = evaluate_answer(question, student_answer)
-            results.append({
-                'question_num': idx,
-                'question': question['question'],
-                'student_answer': student_answer,
-                'evaluation': evaluation
-            })
-        return results
-    
-    # Separate questions by type for batch processing
-    descriptive_questions = []
-    other_questions = []
-    
-    for idx, question in enumerate(questions, 1):
-        student_answer = student_answers.get(idx, "")
-        if 'options' in question:
-            # MCQ - evaluate immediately (fast)
-            evaluation = evaluate_mcq(question, student_answer)
-            other_questions.append({
-                'question_num': idx,
-                'question': question,
-                'student_answer': student_answer,
-                'evaluation': evaluation
-            })
-        elif 'labels' in question:
-            # Diagram labeling - evaluate immediately (fast)
-            evaluation = evaluate_diagram_labeling(question, student_answer)
-            other_questions.append({
-                'question_num': idx,
-                'question': question,
-                'student_answer': student_answer,
-                'evaluation': evaluation
-            })
-        else:
-            # Descriptive - batch process
-            descriptive_questions.append({
-                'question_num': idx,
-                'question': question,
-                'student_answer': student_answer
-            })
-    
-    # Batch encode all student answers for descriptive questions
-    if descriptive_questions:
-        student_answers_list = [item['student_answer'] for item in descriptive_questions]
-        student_embs = model.encode(student_answers_list, convert_to_numpy=True, show_progress_bar=False, batch_size=8)
-        
-        # Evaluate each descriptive question using pre-encoded embeddings
-        for i, item in enumerate(descriptive_questions):
-            question = item['question']
-            student_answer = item['student_answer']
-            student_emb = student_embs[i:i+1]
-            
-            # Use cached embeddings for model answer and key points
-            model_answer = question.get('model_answer', '')
-            key_points = question.get('key_points', [])
-            max_marks = question.get('marks', 5)
-            word_count = len(student_answer.split())
-            
-            cached = get_cached_embeddings(model_answer, key_points)
-            if cached:
-                from sklearn.metrics.pairwise import cosine_similarity
-                
-                model_emb = cached['model_emb']
-                key_point_embs = cached['key_point_embs']
-                
-                overall_similarity = cosine_similarity(student_emb, model_emb)[0][0]
-                
-                if len(key_point_embs) > 0:
-                    point_similarities = cosine_similarity(student_emb, key_point_embs)[0]
-                    matched_indices = np.where(point_similarities >= SEMANTIC_SIMILARITY_THRESHOLD)[0]
-                    missing_indices = np.where(point_similarities < SEMANTIC_SIMILARITY_THRESHOLD)[0]
-                    
-                    matched_points = [key_points[i] for i in matched_indices]
-                    missing_points = [key_points[i] for i in missing_indices]
-                    
-                    avg_key_similarity = np.mean(point_similarities)
-                    combined_similarity = (overall_similarity * 0.4 + avg_key_similarity * 0.6)
-                else:
-                    matched_points = []
-                    missing_points = []
-                    combined_similarity = overall_similarity
-                
-                base_score = combined_similarity * max_marks
-                word_limit = question.get('word_limit', '50-100 words')
-                score = adjust_for_word_limit(base_score, word_count, word_limit, max_marks)
-                score = round(score * 2) / 2
-                score = max(0, min(score, max_marks))
-                
-                percentage = (score / max_marks * 100) if max_marks > 0 else 0
-                feedback = generate_semantic_feedback(score, max_marks, matched_points, missing_points, 
-                                                       word_count, overall_similarity, len(key_points))
-                
-                evaluation = {
-                    'score': score,
-                    'max_score': max_marks,
-                    'percentage': percentage,
-                    'feedback': feedback,
-                    'matched_points': matched_points,
-                    'missing_points': missing_points,
-                    'word_count': word_count,
-                    'semantic_similarity': float(overall_similarity)
-                }
-            else:
-                # Fallback to keyword-based
-                evaluation = evaluate_keyword_based(question, student_answer, key_points, max_marks, word_count)
-            
-            other_questions.append({
-                'question_num': item['question_num'],
-                'question': question['question'],  # Extract question text
-                'student_answer': student_answer,
-                'evaluation': evaluation
+def evaluate_batch(questions, student_answers, short_answer_policy=SHORT_ANSWER_POLICY):
+    """Evaluate a whole submission (student_answers keyed by 1-based question number)"""
+    answers = [student_answers.get(idx, "") for idx in range(1, len(questions) + 1)]
+    with span('evaluate_batch', batch=len(questions)):
+        evaluations = evaluate_many(list(zip(questions, answers)), short_answer_policy)
+    return [
+        {
+            'question_num': idx,
+            'question': question['question'],
+            'student_answer': answer,
+            'evaluation': evaluation
+        }
+        for idx, (question, answer, evaluation) in enumerate(zip(questions, answers, evaluations), 1)
+    ]
+
+def evaluate_objective(questions, student_answers):
+    """MCQ and diagram evaluations by question number (cheap: no model involved)"""
+    rows = [idx for idx, question in enumerate(questions, 1) if get_question_kind(question) != 'descriptive']
+    evaluations = evaluate_many([(questions[idx - 1], student_answers.get(idx, "")) for idx in rows])
+    return dict(zip(rows, evaluations))
+
+def evaluate_progressively(questions, student_answers, publish=None, known=None,
+                           batch_size=EVAL_PROGRESS_BATCH, short_answer_policy=SHORT_ANSWER_POLICY):
+    """evaluate_batch in steps: objective questions first, then descriptive ones batch_size at a time.
+    
+    publish(results, timings) is called after every step with the results so
+    far (evaluation None where still pending). known maps question numbers to
+    evaluations already made. Returns (results, timings).
+    """
+    known = known or {}
+    answers = [student_answers.get(idx, "") for idx in range(1, len(questions) + 1)]
+    results = [
+        {'question_num': idx, 'question': question['question'], 'student_answer': answer,
+         'evaluation': known.get(idx)}
+        for idx, (question, answer) in enumerate(zip(questions, answers), 1)
+    ]
+    pending = [i for i, result in enumerate(results) if result['evaluation'] is None]
+    objective = [i for i in pending if get_question_kind(questions[i]) != 'descriptive']
+    descriptive = [i for i in pending if get_question_kind(questions[i]) == 'descriptive']
+    steps = ([objective] if objective else []) + [descriptive[start:start + batch_size]
+                                                  for start in range(0, len(descriptive), batch_size)]
+    timings = {'model_seconds': 0.0, 'questions': []}
+    if descriptive and ENABLE_SEMANTIC_EVALUATION and not service_enabled():
+        # Waits for the preload on a cold start; reported separately from grading
+        start = time.perf_counter()
+        get_semantic_model()
+        timings['model_seconds'] = time.perf_counter() - start
+    
+    for step, rows in enumerate(steps, 1):
+        start = time.perf_counter()
+        evaluations = evaluate_many([(questions[i], answers[i]) for i in rows], short_answer_policy)
+        seconds = time.perf_counter() - start
+        for i, evaluation in zip(rows, evaluations):
+            results[i]['evaluation'] = evaluation
+            timings['questions'].append({
+                'question_num': i + 1,
+                'kind': get_question_kind(questions[i]),
+                'step': step,
+                'seconds': seconds / len(rows),  # Share of a step graded together
+                'step_seconds': seconds
             })
-    
-    # Sort results by question number
-    results = sorted(other_questions, key=lambda x: x['question_num'])
-    
-    return results
\ No newline at end of file
+        if publish:
+            publish(results, timings)
+    return results, timings
@@ -0,0 +1,64 @@
+"""File locks and atomic writes for state shared by threads and processes.
+
+The web app's job workers, `python job_queue.py` workers and the CLI tools all
+read-modify-write the same JSON and pickle files. Wrap each read-modify-write
+in file_lock(path) and write with atomic_write(): a reader never sees a
+half-written file, and no writer saves over another's update.
+"""
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads of this process are still serialized
+    fcntl = None
+
+_thread_locks = {}
+_registry_lock = threading.Lock()
+_held = {}  # path -> open lock file, only touched while holding that path's thread lock
+
+def _key(path) -> str:
+    return str(Path(path).resolve())
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` (via `<path>.lock` beside it); re-entrant within a thread"""
+    key = _key(path)
+    with _registry_lock:
+        lock = _thread_locks.setdefault(key, threading.RLock())
+    with lock:
+        outer = key not in _held
+        if outer:
+            Path(key).parent.mkdir(parents=True, exist_ok=True)
+            handle = open(f"{key}.lock", 'a')
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            _held[key] = handle
+        try:
+            yield
+        finally:
+            if outer:
+                # Closing the file releases the flock
+                _held.pop(key).close()
+
+def atomic_write(path, data, mode: str = 'w'):
+    """Write `data` to a unique temp file beside `path`, then rename it into place"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(mode, dir=path.parent, prefix=f"{path.name}.", suffix='.tmp',
+                                     delete=False) as f:
+        temp_name = f.name
+        try:
+            f.write(data)
+        except BaseException:
+            f.close()
+            os.unlink(temp_name)
+            raise
+    try:
+        os.replace(temp_name, path)
+    except OSError:
+        os.unlink(temp_name)
+        raise
@@ -0,0 +1,397 @@
+"""Local background job queue with durable job records.
+
+Each job is a JSON file in JOBS_DIR, so jobs survive Streamlit reruns, page reloads
+and web-process restarts. Workers are threads started inside the web process
+(JOB_WORKERS) and/or separate processes:
+
+    JOB_WORKERS=0 streamlit run app.py     # web process only submits jobs
+    python job_queue.py --workers 4        # scale workers separately
+
+Workers find work through JOBS_DIR/pending/ (one marker per unfinished job)
+rather than by reading every record, and delete finished records older than
+JOB_RETENTION_HOURS as they go.
+"""
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from PIL import Image
+
+from config import (JOB_POLL_INTERVAL, JOB_TIMEOUT_SECONDS, JOB_HEARTBEAT_SECONDS, JOB_RETENTION_HOURS,
+                    JOB_CLEANUP_INTERVAL)
+
+JOBS_DIR = Path("jobs")
+PENDING_DIR = JOBS_DIR / "pending"  # An empty file per queued or running job, so claims skip finished records
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+_stop_event = threading.Event()
+_records: Dict[str, tuple] = {}  # Parsed job records by id, with the file mtime they were read at
+_records_lock = threading.Lock()
+_retention_hours = JOB_RETENTION_HOURS
+_last_cleanup = 0.0
+
+def job_handler(kind: str):
+    """Register a function that runs jobs of the given kind"""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+def _job_file(job_id: str) -> Path:
+    return JOBS_DIR / f"{job_id}.json"
+
+def _lock_file(job_id: str) -> Path:
+    return JOBS_DIR / f"{job_id}.lock"
+
+def _pending_file(job_id: str) -> Path:
+    return PENDING_DIR / job_id
+
+def save_job(job: Dict[str, Any]):
+    """Write a job record atomically"""
+    JOBS_DIR.mkdir(exist_ok=True)
+    temp_file = JOBS_DIR / f"{job['id']}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(job, f)
+    temp_file.replace(_job_file(job['id']))
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_job_file(job_id), 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def update_job(job_id: str, **fields) -> Optional[Dict[str, Any]]:
+    job = get_job(job_id)
+    if job is None:
+        return None
+    job.update(fields)
+    save_job(job)
+    return job
+
+def _read_record(path: Path) -> Optional[Dict[str, Any]]:
+    """Parsed job record, re-parsed only when the file has changed since the last poll"""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    with _records_lock:
+        cached = _records.get(path.stem)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    job = get_job(path.stem)
+    if job is not None:
+        with _records_lock:
+            _records[path.stem] = (mtime, job)
+    return job
+
+def _list_records(username: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Matching job records, oldest first, as shared with later polls (do not modify them)"""
+    if not JOBS_DIR.exists():
+        return []
+    jobs = []
+    for path in JOBS_DIR.glob("*.json"):
+        job = _read_record(path)
+        if job is None:
+            continue
+        if username is not None and job.get('username') != username:
+            continue
+        if kind is not None and job.get('kind') != kind:
+            continue
+        jobs.append(job)
+    return sorted(jobs, key=lambda j: j['created'])
+
+def list_jobs(username: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+    """All job records, oldest first"""
+    return copy.deepcopy(_list_records(username, kind))
+
+def latest_job(username: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    jobs = _list_records(username, kind)
+    return copy.deepcopy(jobs[-1]) if jobs else None
+
+def submit_job(kind: str, params: Dict[str, Any], username: Optional[str] = None,
+               images: Optional[List[Image.Image]] = None) -> str:
+    """Queue a job and return its id. Images are stored next to the record."""
+    job_id = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}"
+    JOBS_DIR.mkdir(exist_ok=True)
+    image_files = []
+    for idx, img in enumerate(images or []):
+        path = JOBS_DIR / f"{job_id}_img{idx}.png"
+        img.save(path, format='PNG')
+        image_files.append(path.name)
+    save_job({
+        'id': job_id,
+        'kind': kind,
+        'status': 'queued',
+        'username': username,
+        'params': params,
+        'images': image_files,
+        'created': time.time(),
+        'started': None,
+        'finished': None,
+        'attempts': 0,
+        'worker': None,
+        'result': None,
+        'error': None,
+        'consumed': False
+    })
+    _ensure_pending_index()
+    _pending_file(job_id).touch()
+    return job_id
+
+def load_job_images(job: Dict[str, Any]) -> List[Image.Image]:
+    images = []
+    for name in job.get('images', []):
+        try:
+            with Image.open(JOBS_DIR / name) as img:
+                img.load()
+                images.append(img.copy())
+        except Exception:
+            pass
+    return images
+
+def _try_claim(job_id: str) -> bool:
+    """Claim a job across threads and processes with an exclusive lock file"""
+    lock = _lock_file(job_id)
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Reclaim jobs whose worker died without finishing
+        return _steal_stale_lock(lock)
+    except OSError:
+        return False
+    os.close(fd)
+    return True
+
+def _steal_stale_lock(lock: Path) -> bool:
+    """Take over a lock whose worker stopped heartbeating; an O_EXCL guard lets only one worker win"""
+    guard = lock.with_suffix('.steal')
+    try:
+        fd = os.open(guard, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Left behind by a worker that died mid-steal
+        try:
+            if time.time() - guard.stat().st_mtime >= JOB_TIMEOUT_SECONDS:
+                guard.unlink()
+        except OSError:
+            pass
+        return False
+    except OSError:
+        return False
+    os.close(fd)
+    try:
+        if time.time() - lock.stat().st_mtime < JOB_TIMEOUT_SECONDS:
+            return False
+        # A fresh mtime makes the lock ours; the lock file itself is never removed and re-created
+        os.utime(lock)
+        return True
+    except OSError:
+        return False
+    finally:
+        guard.unlink(missing_ok=True)
+
+def _heartbeat(lock: Path, done: threading.Event):
+    """Keep a running job's lock fresh so it is not reclaimed as stale"""
+    while not done.wait(JOB_HEARTBEAT_SECONDS):
+        try:
+            os.utime(lock)
+        except OSError:
+            pass
+
+def _ensure_pending_index():
+    """Create the pending index, from the job records, if it does not exist yet"""
+    if PENDING_DIR.is_dir():
+        return
+    JOBS_DIR.mkdir(exist_ok=True)
+    building = JOBS_DIR / f"pending.{os.getpid()}.{threading.get_ident()}.tmp"
+    building.mkdir()
+    for job in _list_records():
+        if job['status'] in ('queued', 'running'):
+            (building / job['id']).touch()
+    try:
+        building.rename(PENDING_DIR)
+    except OSError:
+        # Another worker built it first
+        for marker in building.iterdir():
+            marker.unlink()
+        building.rmdir()
+
+def claim_next_job(worker_name: str, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    _ensure_pending_index()
+    # Job ids start with their creation time, so this is oldest first
+    for job_id in sorted(marker.name for marker in PENDING_DIR.iterdir()):
+        job = get_job(job_id)
+        if job is None or job['status'] not in ('queued', 'running'):
+            _pending_file(job_id).unlink(missing_ok=True)
+            continue
+        if kinds and job['kind'] not in kinds:
+            continue
+        if not _try_claim(job_id):
+            continue
+        # Re-read after claiming: another worker may have finished it meanwhile
+        job = get_job(job_id)
+        if job is None or job['status'] not in ('queued', 'running'):
+            _lock_file(job_id).unlink(missing_ok=True)
+            continue
+        return update_job(job_id, status='running', started=time.time(),
+                          attempts=job['attempts'] + 1, worker=worker_name)
+    return None
+
+def run_job(job: Dict[str, Any]):
+    """Run a claimed job and record its result"""
+    handler = JOB_HANDLERS.get(job['kind'])
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(_lock_file(job['id']), done), daemon=True).start()
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job kind '{job['kind']}'")
+        result = handler(job)
+        update_job(job['id'], status='done', result=result, finished=time.time())
+    except Exception as e:
+        update_job(job['id'], status='failed', error=str(e), finished=time.time())
+    finally:
+        done.set()
+        _pending_file(job['id']).unlink(missing_ok=True)
+        _lock_file(job['id']).unlink(missing_ok=True)
+
+def _maybe_cleanup():
+    """Delete old finished jobs at most every JOB_CLEANUP_INTERVAL seconds per process"""
+    global _last_cleanup
+    with _workers_lock:
+        if time.time() - _last_cleanup < JOB_CLEANUP_INTERVAL:
+            return
+        _last_cleanup = time.time()
+    cleanup_jobs(_retention_hours)
+
+def worker_loop(worker_name: str, kinds: Optional[List[str]] = None, stop_event: threading.Event = _stop_event):
+    while not stop_event.is_set():
+        try:
+            _maybe_cleanup()
+            job = claim_next_job(worker_name, kinds)
+        except Exception:
+            job = None
+        if job is None:
+            stop_event.wait(JOB_POLL_INTERVAL)
+            continue
+        run_job(job)
+
+def start_workers(count: int, kinds: Optional[List[str]] = None) -> int:
+    """Start background worker threads once per process. Returns the number running."""
+    with _workers_lock:
+        alive = [t for t in _workers if t.is_alive()]
+        for idx in range(len(alive), count):
+            name = f"{os.getpid()}-worker-{idx}"
+            thread = threading.Thread(target=worker_loop, args=(name, kinds), name=name, daemon=True)
+            thread.start()
+            alive.append(thread)
+        _workers[:] = alive
+        return len(alive)
+
+def cleanup_jobs(max_age_hours: float = JOB_RETENTION_HOURS):
+    """Delete finished job records (and their images) older than max_age_hours"""
+    cutoff = time.time() - max_age_hours * 3600
+    for job in _list_records():
+        if job['status'] in ('done', 'failed') and (job.get('finished') or 0) < cutoff:
+            for name in job.get('images', []):
+                (JOBS_DIR / name).unlink(missing_ok=True)
+            _job_file(job['id']).unlink(missing_ok=True)
+            with _records_lock:
+                _records.pop(job['id'], None)
+
+@job_handler('generate')
+def run_generate_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Question generation for the teacher dashboard"""
+    from config import API_avai
+    from question_generator import generate_questions
+
+    params = job['params']
+    questions = generate_questions(params['content'], params['curriculum_info'], load_job_images(job),
+                                   params.get('prepared'))
+    return {'questions': questions, 'used_api': bool(API_avai and questions)}
+
+@job_handler('evaluate')
+def run_evaluate_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Grading of a student submission; partial results are published on the job record"""
+    from submissions import run_submission
+
+    params = job['params']
+    # JSON object keys are strings
+    answers = {int(idx): answer for idx, answer in params['answers'].items()}
+    known = {int(idx): evaluation for idx, evaluation in params.get('known', {}).items()}
+
+    def publish(results, timings):
+        update_job(job['id'], partial=results, timings=timings)
+
+    return run_submission(params['submission_id'], job['username'], params['questions'], answers,
+                          publish, known, params.get('timestamp'))
+
+@job_handler('paper')
+def run_paper_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Full exam paper for the teacher dashboard; progress is published on the job record"""
+    from config import API_avai, BATCH_REQUESTS_PER_MINUTE, PAPER_MAX_WORKERS
+    from curriculum import get_exam_pattern
+    from paper_builder import build_paper
+    from rate_limit import RateLimiter, daily_quota
+    from shared_state import save_questions
+
+    params = job['params']
+    base_info = params['base_info']
+    limiter = None
+    if API_avai:
+        limiter = RateLimiter(BATCH_REQUESTS_PER_MINUTE, burst=PAPER_MAX_WORKERS, quota=daily_quota())
+
+    def progress(done, total, message):
+        update_job(job['id'], progress={'done': done, 'total': total, 'message': message})
+
+    paper = build_paper(params['content'], base_info, get_exam_pattern(base_info['board'], base_info['class']),
+                        load_job_images(job) or None, limiter=limiter, progress=progress)
+    paper['published'] = bool(paper['questions'] and params.get('publish') and save_questions(paper['questions']))
+    return paper
+
+@job_handler('similarity')
+def run_similarity_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Near-copy check for a new submission"""
+    from similarity_index import check_submission
+
+    return check_submission(job['params']['submission_id'])
+
+@job_handler('llm_grade')
+def run_llm_grade_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Batched Gemini grading of pending descriptive answers"""
+    from config import LLM_GRADING_MIN_PENDING
+    from llm_grading import run_llm_grading, default_limiter
+    from rate_limit import daily_quota
+
+    return run_llm_grading(job['params'].get('min_pending', LLM_GRADING_MIN_PENDING), default_limiter(),
+                           quota=daily_quota())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run BloomSetu background job workers")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--kinds', nargs='*', help="Only run these job kinds")
+    parser.add_argument('--cleanup-hours', type=float, default=JOB_RETENTION_HOURS,
+                        help="Delete finished jobs older than this (checked every JOB_CLEANUP_INTERVAL seconds)")
+    args = parser.parse_args(argv)
+
+    global _retention_hours
+    _retention_hours = args.cleanup_hours
+    start_workers(args.workers, args.kinds)
+    print(f"[{datetime.now():%H:%M:%S}] {args.workers} workers polling {JOBS_DIR}/ (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        _stop_event.set()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+"""Precompiled keyword matching for keyword-based and diagram-label grading.
+
+A KeywordMatcher is built once per question (key points -> keyword lists,
+diagram labels -> label words) and reused for every answer: the answer is
+lowered once and each distinct keyword is searched once, however many key
+points share it.
+
+Matching stays substring-based, exactly like the original `kw in answer`
+checks. A single-pass regex alternation was measured 5x slower than these
+C-level `in` scans at realistic sizes (Python's re has no Aho-Corasick
+optimisation), and a stemmed token index changes which answers get marks.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from answer_keys import extract_keywords
+
+MAX_MATCHERS = 4096
+
+_matchers: "OrderedDict[tuple, KeywordMatcher]" = OrderedDict()
+_lock = threading.Lock()
+
+class KeywordMatcher:
+    def __init__(self, keyword_groups: Iterable[Sequence[str]]):
+        self.groups = [list(group) for group in keyword_groups]
+        self.keywords = sorted({keyword for group in self.groups for keyword in group})
+
+    def present(self, text_lower: str) -> Set[str]:
+        """Distinct keywords occurring in already-lowered text"""
+        return {keyword for keyword in self.keywords if keyword in text_lower}
+
+    def group_counts(self, text: str) -> List[int]:
+        """Per group, how many of its keywords (with repeats) occur in text"""
+        found = self.present(text.lower())
+        return [sum(1 for keyword in group if keyword in found) for group in self.groups]
+
+    def count(self, group_idx: int, text_lower: str) -> int:
+        """Matches for one group, for texts that differ per group (diagram labels)"""
+        return sum(1 for keyword in self.groups[group_idx] if keyword in text_lower)
+
+def _cached(cache_key: tuple, build) -> KeywordMatcher:
+    with _lock:
+        matcher = _matchers.get(cache_key)
+        if matcher is not None:
+            _matchers.move_to_end(cache_key)
+            return matcher
+    matcher = build()
+    with _lock:
+        _matchers[cache_key] = matcher
+        while len(_matchers) > MAX_MATCHERS:
+            _matchers.popitem(last=False)
+    return matcher
+
+def key_point_matcher(key_points: Sequence[str],
+                      keyword_groups: Optional[List[List[str]]] = None) -> KeywordMatcher:
+    """Matcher over a question's key points (keyword_groups: precompiled keywords, if any)"""
+    return _cached(('points', tuple(key_points)),
+                   lambda: KeywordMatcher(keyword_groups if keyword_groups is not None
+                                          else [extract_keywords(point) for point in key_points]))
+
+def label_matcher(labels: Dict[str, str],
+                  keyword_groups: Optional[List[List[str]]] = None) -> KeywordMatcher:
+    """Matcher with one group of significant words per diagram label, in labels order"""
+    return _cached(('labels', tuple(labels.items())),
+                   lambda: KeywordMatcher(keyword_groups if keyword_groups is not None
+                                          else ([w for w in name.lower().split() if len(w) > 3]
+                                                for name in labels.values())))
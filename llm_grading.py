@@ -0,0 +1,208 @@
+"""Opt-in Gemini grading of descriptive answers, a whole class per call.
+
+Semantic scores are shown as soon as a student submits. With ENABLE_LLM_GRADING
+on, a background job ('llm_grade') later takes the stored answers that no LLM
+has graded yet. It packs up to LLM_GRADING_BATCH_SIZE distinct answers to the
+same question into one request, together with the model answer and marking
+scheme, and asks for a strict JSON array of scores. Replies are read one
+object at a time, so a reply cut off by the output limit still yields every
+complete grade. Answers missing from a reply keep their semantic score and are
+picked up by the next job.
+
+Grades are stored on the history entries (llm_score, llm_feedback) and count
+instead of the semantic score; a teacher override still wins. Identical
+answers to the same question are graded once.
+
+    python llm_grading.py               # grade everything pending
+    python llm_grading.py --dry-run     # pending answers and the calls they need
+"""
+import argparse
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (BATCH_REQUESTS_PER_MINUTE, LLM_GRADING_BATCH_SIZE, LLM_GRADING_MAX_CHARS,
+                    LLM_GRADING_MAX_REQUESTS, LLM_GRADING_MIN_PENDING)
+from rate_limit import RateLimiter, DailyQuota, daily_quota
+
+def build_grading_prompt(question: Dict[str, Any], answers: List[str]) -> str:
+    max_marks = question.get('marks', 5)
+    scheme = question.get('marking_scheme') or question.get('key_points', [])
+    scheme_text = "\n".join(f"- {item}" for item in scheme) or "- Judge against the model answer"
+    answers_json = json.dumps([{'id': i, 'answer': answer} for i, answer in enumerate(answers, 1)],
+                              ensure_ascii=False)
+    return f"""You are an experienced CBSE examiner marking student answers.
+
+QUESTION ({max_marks} marks): {question.get('question', '')}
+WORD LIMIT: {question.get('word_limit', 'not specified')}
+
+MODEL ANSWER:
+{question.get('model_answer', '')}
+
+MARKING SCHEME:
+{scheme_text}
+
+STUDENT ANSWERS:
+{answers_json}
+
+Mark every answer independently against the marking scheme. Give credit for correct ideas in the student's own words; do not reward length alone.
+Return ONLY a JSON array with exactly one object per answer, in the same order:
+[{{"id": 1, "score": <0 to {max_marks}, in steps of 0.5>, "feedback": "<one sentence for the student>"}}]
+"""
+
+def reply_objects(text: str) -> List[Any]:
+    """Every complete top-level JSON object in a reply, wherever the array around them breaks off.
+
+    Decoding starts at each '{' not inside an object already read, so braces and
+    brackets inside feedback strings don't confuse it.
+    """
+    decoder = json.JSONDecoder(strict=False)  # Raw newlines inside strings
+    objects = []
+    start = text.find('{')
+    while start != -1:
+        try:
+            item, end = decoder.raw_decode(text, start)
+        except ValueError:
+            start = text.find('{', start + 1)
+            continue
+        objects.append(item)
+        start = text.find('{', end)
+    return objects
+
+def parse_grades(text: str, count: int, max_marks: float) -> Dict[int, Tuple[float, str]]:
+    """{answer id: (score, feedback)} for every well-formed grade in the reply"""
+    grades = {}
+    for item in reply_objects(text):
+        if not isinstance(item, dict):
+            continue
+        try:
+            answer_id = int(item['id'])
+            score = float(item['score'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= answer_id <= count:
+            score = min(max(round(score * 2) / 2, 0), max_marks)
+            grades[answer_id] = (score, str(item.get('feedback', '')).strip())
+    return grades
+
+def grade_answers(question: Dict[str, Any], answers: List[str], backend=None) -> List[Optional[Tuple[float, str]]]:
+    """(score, feedback) per answer from one request; None where the reply has no grade"""
+    from question_generator import extract_text
+
+    if backend is None:
+        from config import model as backend
+    response = backend.generate_content(
+        [build_grading_prompt(question, answers)],
+        generation_config={'temperature': 0.1, 'max_output_tokens': 4096}
+    )
+    grades = parse_grades(extract_text(response), len(answers), question.get('marks', 5))
+    return [grades.get(i) for i in range(1, len(answers) + 1)]
+
+def pending_answers(history: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Ungraded descriptive answers by question digest: {'question', 'answers': {answer digest: ...}}.
+
+    Answers already graded for another submission are returned under 'known'
+    instead, so they are copied rather than sent again.
+    """
+    from answer_keys import get_question_kind, question_digest
+    from result_cache import answer_digest
+    from shared_state import load_assessment
+
+    assessments = {}
+    graded = {}
+    pending: Dict[str, Dict[str, Any]] = {}
+    for index, entry in enumerate(history):
+        archive_id = entry.get('assessment_id')
+        if not archive_id or 'responses' not in entry:
+            continue
+        if archive_id not in assessments:
+            assessments[archive_id] = load_assessment(archive_id) or []
+        for num, (question, response) in enumerate(zip(assessments[archive_id], entry['responses']), 1):
+            answer = response['answer']
+            if get_question_kind(question) != 'descriptive' or not answer or len(answer.strip()) < 10:
+                continue
+            key = (question_digest(question), answer_digest(answer))
+            if 'llm_score' in response:
+                graded[key] = (response['llm_score'], response.get('llm_feedback', ''))
+                continue
+            group = pending.setdefault(key[0], {'question': question, 'answers': {}, 'known': []})
+            group['answers'].setdefault(key[1], {'answer': answer, 'targets': []})['targets'].append((index, num))
+    for digest, group in pending.items():
+        for key in [k for k in group['answers'] if (digest, k) in graded]:
+            group['known'].append((group['answers'].pop(key), graded[(digest, key)]))
+    return pending
+
+def batches(answers: List[Dict[str, Any]], batch_size: int = LLM_GRADING_BATCH_SIZE,
+            max_chars: int = LLM_GRADING_MAX_CHARS) -> List[List[Dict[str, Any]]]:
+    """Split one question's answers into requests of bounded size"""
+    result, current, chars = [], [], 0
+    for item in answers:
+        if current and (len(current) >= batch_size or chars + len(item['answer']) > max_chars):
+            result.append(current)
+            current, chars = [], 0
+        current.append(item)
+        chars += len(item['answer'])
+    if current:
+        result.append(current)
+    return result
+
+def run_llm_grading(min_pending: int = LLM_GRADING_MIN_PENDING, limiter: Optional[RateLimiter] = None,
+                    backend=None, dry_run: bool = False, quota: Optional[DailyQuota] = None) -> Dict[str, Any]:
+    """Grade pending answers of every question with at least min_pending of them.
+
+    Each call is counted against `quota` (normally the shared daily_quota()); the
+    run stops once it is spent, like when the limiter's budget runs out.
+    """
+    from shared_state import load_student_history, record_llm_grades
+
+    pending = pending_answers(load_student_history())
+    stats = {'questions': 0, 'answers': 0, 'calls': 0, 'graded': 0, 'copied': 0, 'failed_calls': 0}
+    for group in pending.values():
+        if group['known'] and not dry_run:
+            updates = [(index, num, score, feedback) for item, (score, feedback) in group['known']
+                       for index, num in item['targets']]
+            record_llm_grades(updates)
+            stats['copied'] += len(group['known'])
+        answers = list(group['answers'].values())
+        if len(answers) < max(min_pending, 1):
+            continue
+        stats['questions'] += 1
+        stats['answers'] += len(answers)
+        for batch in batches(answers):
+            if dry_run:
+                stats['calls'] += 1
+                continue
+            if limiter is not None and not limiter.acquire():
+                return stats
+            if quota is not None and not quota.try_consume():
+                stats['quota_exhausted'] = True
+                return stats
+            stats['calls'] += 1
+            try:
+                grades = grade_answers(group['question'], [item['answer'] for item in batch], backend)
+            except Exception:
+                stats['failed_calls'] += 1
+                continue
+            updates = [(index, num, grade[0], grade[1]) for item, grade in zip(batch, grades) if grade
+                       for index, num in item['targets']]
+            # Saved per call, so students see grades as they arrive
+            record_llm_grades(updates)
+            stats['graded'] += sum(1 for grade in grades if grade)
+    return stats
+
+def default_limiter() -> RateLimiter:
+    return RateLimiter(BATCH_REQUESTS_PER_MINUTE, max_requests=LLM_GRADING_MAX_REQUESTS)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grade pending descriptive answers with Gemini, many per call")
+    parser.add_argument('--min-pending', type=int, default=1,
+                        help="Skip questions with fewer ungraded distinct answers")
+    parser.add_argument('--max-requests', type=int, default=LLM_GRADING_MAX_REQUESTS)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    from config import API_avai
+    if not API_avai and not args.dry_run:
+        raise SystemExit("No Gemini API key configured (GEMINI_API_KEY)")
+    limiter = RateLimiter(BATCH_REQUESTS_PER_MINUTE, max_requests=args.max_requests)
+    stats = run_llm_grading(args.min_pending, limiter, dry_run=args.dry_run, quota=daily_quota())
+    print(json.dumps(stats, indent=2))
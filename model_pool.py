@@ -0,0 +1,242 @@
+"""Multi-key / multi-model routing pool for Gemini calls.
+
+ModelPool exposes the same generate_content() call as genai.GenerativeModel, so
+question_generator uses it unchanged. Each request goes to the member with the
+best score (weight x health x remaining quota / observed latency) and fails over
+to the next member on 429 and 5xx errors. Members wrap any object with a
+generate_content() method, so tests can use local fake backends.
+"""
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LATENCY = 2.0  # Seconds assumed when no member has been measured yet
+LATENCY_MEMORY = 300  # Seconds after which an unused member's latency is re-probed
+LATENCY_SMOOTHING = 0.3  # Weight of the newest sample in the latency EWMA
+RATE_LIMIT_COOLDOWN = 60  # Seconds a member is skipped after a 429
+SERVER_ERROR_COOLDOWN = 10  # Seconds a member is skipped after a 5xx
+HEALTH_RECOVERY = 0.2  # Health regained per success
+MIN_HEALTH = 0.05
+
+class KeyQuota:
+    """Daily request budget shared by all members using the same API key"""
+
+    def __init__(self, daily_limit: Optional[int] = None):
+        self.daily_limit = daily_limit
+        self.used = 0
+        self.day = date.today()
+
+    def _roll(self):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+
+    def remaining_fraction(self) -> float:
+        self._roll()
+        if not self.daily_limit:
+            return 1.0
+        return max(0.0, (self.daily_limit - self.used) / self.daily_limit)
+
+    def consume(self):
+        self._roll()
+        self.used += 1
+
+class PoolMember:
+    def __init__(self, name: str, backend: Any, weight: float = 1.0, quota: Optional[KeyQuota] = None):
+        self.name = name
+        self.backend = backend
+        self.weight = weight
+        self.quota = quota or KeyQuota()
+        self.health = 1.0
+        self.latency = None  # EWMA of successful call latency (seconds)
+        self.last_used = 0.0
+        self.cooldown_until = 0.0
+        self.successes = 0
+        self.failures = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until and self.quota.remaining_fraction() > 0
+
+    def known_latency(self, now: float) -> Optional[float]:
+        """Latency estimate, or None if never measured or too stale to trust"""
+        if self.latency is None or now - self.last_used > LATENCY_MEMORY:
+            return None
+        return self.latency
+
+    def score(self, now: float, optimistic_latency: float) -> float:
+        # Unmeasured members get the best observed latency, so each one is tried
+        latency = self.known_latency(now)
+        if latency is None:
+            latency = optimistic_latency
+        return self.weight * self.health * self.quota.remaining_fraction() / max(latency, 1e-3)
+
+    def record_success(self, latency: float):
+        self.successes += 1
+        self.last_used = time.time()
+        self.health = min(1.0, self.health + HEALTH_RECOVERY)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+
+    def record_failure(self, cooldown: float):
+        self.failures += 1
+        self.health = max(MIN_HEALTH, self.health * 0.5)
+        self.cooldown_until = time.time() + cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'weight': self.weight,
+            'health': round(self.health, 3),
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'quota_used': self.quota.used,
+            'quota_limit': self.quota.daily_limit,
+            'cooling_down': time.time() < self.cooldown_until,
+            'successes': self.successes,
+            'failures': self.failures
+        }
+
+# gRPC status names, for errors that carry a status code instead of an HTTP status
+GRPC_HTTP_STATUS = {
+    'RESOURCE_EXHAUSTED': 429,
+    'INTERNAL': 500,
+    'UNKNOWN': 500,
+    'UNAVAILABLE': 503,
+    'DEADLINE_EXCEEDED': 504
+}
+
+def get_error_status(error: Exception) -> Optional[int]:
+    """HTTP status of an API error, from its status code or type (never from the message text)"""
+    # google.api_core exceptions (what the Gemini SDK raises) carry the HTTP status as .code
+    code = getattr(error, 'code', None)
+    if callable(code):
+        # Raw gRPC errors: code() is a grpc.StatusCode
+        try:
+            code = GRPC_HTTP_STATUS.get(getattr(code(), 'name', None))
+        except Exception:
+            code = None
+    if code is None:
+        # requests / httpx style errors
+        code = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if code is not None:
+        try:
+            return int(code)
+        except (TypeError, ValueError):
+            pass
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return 503
+    return None
+
+class ModelPool:
+    """Routes generate_content() calls across several keys/models"""
+
+    def __init__(self, members: List[PoolMember]):
+        if not members:
+            raise ValueError("ModelPool needs at least one member")
+        self.members = members
+        self._lock = threading.Lock()
+
+    def ranked_members(self, exclude=()) -> List[PoolMember]:
+        now = time.time()
+        with self._lock:
+            candidates = [m for m in self.members if m.name not in exclude and m.available(now)]
+            if not candidates:
+                # Everything is cooling down: try the soonest-available members anyway
+                candidates = sorted(
+                    (m for m in self.members if m.name not in exclude and m.quota.remaining_fraction() > 0),
+                    key=lambda m: m.cooldown_until
+                )
+                return candidates
+            known = [m.known_latency(now) for m in candidates if m.known_latency(now) is not None]
+            # Slightly better than the best member, so unmeasured members get probed once
+            optimistic_latency = 0.5 * min(known) if known else DEFAULT_LATENCY
+            return sorted(candidates, key=lambda m: m.score(now, optimistic_latency), reverse=True)
+
+    def generate_content(self, contents, **kwargs):
+        tried = set()
+        last_error = None
+        while True:
+            candidates = self.ranked_members(exclude=tried)
+            if not candidates:
+                break
+            member = candidates[0]
+            tried.add(member.name)
+            start = time.monotonic()
+            try:
+                response = member.backend.generate_content(contents, **kwargs)
+            except Exception as e:
+                status = get_error_status(e)
+                with self._lock:
+                    if status == 429:
+                        member.record_failure(RATE_LIMIT_COOLDOWN)
+                    elif status is not None and status >= 500:
+                        member.record_failure(SERVER_ERROR_COOLDOWN)
+                    else:
+                        # Bad request etc.: another member won't do better
+                        raise
+                last_error = e
+                continue
+            with self._lock:
+                member.quota.consume()
+                member.record_success(time.monotonic() - start)
+            return response
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError("All models in the pool are out of quota")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [m.stats() for m in self.members]
+
+class GeminiKeyBackend:
+    """generate_content() for one API key and model.
+
+    genai.configure() sets one key for the whole process, so each backend owns a
+    GenerativeServiceClient for its key and builds requests with the SDK's public
+    conversion helpers, as genai.GenerativeModel does.
+    """
+
+    def __init__(self, api_key: str, model_name: str, client=None):
+        import google.ai.generativelanguage as glm
+
+        self.model_name = model_name if '/' in model_name else f"models/{model_name}"
+        self.client = client or glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+    def generate_content(self, contents, generation_config=None, safety_settings=None, request_options=None):
+        from google.generativeai import protos
+        from google.generativeai.types import content_types, generation_types, safety_types
+
+        request = protos.GenerateContentRequest(
+            model=self.model_name,
+            contents=content_types.to_contents(contents),
+            generation_config=generation_types.to_generation_config_dict(generation_config),
+            safety_settings=safety_types.normalize_safety_settings(safety_types.to_easy_safety_dict(safety_settings))
+        )
+        if request.contents and not request.contents[-1].role:
+            request.contents[-1].role = 'user'
+        response = self.client.generate_content(request, **(request_options or {}))
+        return generation_types.GenerateContentResponse.from_response(response)
+
+def make_gemini_backend(api_key: str, model_name: str) -> GeminiKeyBackend:
+    return GeminiKeyBackend(api_key, model_name)
+
+def build_gemini_pool(api_keys: List[str], model_names: List[str],
+                      model_weights: Optional[List[float]] = None,
+                      key_quotas: Optional[List[Optional[int]]] = None) -> ModelPool:
+    """One member per (key, model); quotas are per key, weights per model"""
+    members = []
+    for key_idx, api_key in enumerate(api_keys):
+        limit = key_quotas[key_idx] if key_quotas and key_idx < len(key_quotas) else None
+        quota = KeyQuota(limit)
+        for model_idx, model_name in enumerate(model_names):
+            weight = model_weights[model_idx] if model_weights and model_idx < len(model_weights) else 1.0
+            members.append(PoolMember(
+                f"key{key_idx + 1}:{model_name}",
+                make_gemini_backend(api_key, model_name),
+                weight,
+                quota
+            ))
+    return ModelPool(members)
@@ -145,4 +145,19 @@ def get_ncert_reference(subject, class_level, chapter):
         if ref['key_figs']:
             parts.append(f"Key Figures: {', '.join(ref['key_figs'][:3])}")
         return " | ".join(parts)
-    return None
\ No newline at end of file
+    return None
+
+def get_syllabus_content(subject, class_level, chapter):
+    """Study material built from the syllabus alone (used when no material is uploaded)"""
+    parts = [f"NCERT {subject} textbook for Class {class_level}, chapter \"{chapter}\"."]
+    ref = NCERT_REFS.get(f"{subject}_{class_level}", {}).get(chapter)
+    if ref:
+        if ref['pages']:
+            parts.append(f"The chapter covers textbook pages {ref['pages']}.")
+        if ref['key_figs']:
+            parts.append(f"Important figures: {', '.join(ref['key_figs'])}.")
+    parts.append(
+        "Cover the core concepts, definitions, laws, processes and examples of this chapter "
+        "exactly as they are taught in the NCERT textbook."
+    )
+    return " ".join(parts)
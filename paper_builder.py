@@ -0,0 +1,150 @@
+"""Full exam-paper builder driven by curriculum.EXAM_PATTERNS.
+
+Expands a pattern (e.g. CBSE_10: 20 MCQ, 6 VSA, 6 SA, 3 LA) into per-type generation
+tasks, runs them concurrently within the rate limit and assembles one assessment.
+Can also be scheduled from cron:
+
+    python paper_builder.py --board CBSE --class 10 --subject Physics --chapter Electricity --publish
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from config import API_avai, BATCH_REQUESTS_PER_MINUTE, BATCH_MAX_REQUESTS, MAX_QUESTIONS_PER_CALL, PAPER_MAX_WORKERS
+from curriculum import BOARDS, get_exam_pattern
+from ncert_references import get_syllabus_content
+from question_generator import generate_with_api, generate_demo, is_cached
+from question_bank import get_bank_questions
+from rate_limit import RateLimiter, daily_quota
+from shared_state import save_questions
+
+def default_backend(content: str, info: Dict[str, Any], images=None) -> List[Dict[str, Any]]:
+    if API_avai:
+        return generate_with_api(content, info, images, fallback_to_demo=False)
+    return generate_demo(info, images)
+
+def expand_pattern(pattern: Dict[str, Dict[str, int]], base_info: Dict[str, Any],
+                   use_bank: bool = False) -> Dict[str, Any]:
+    """Plan a paper: banked questions per type plus the generation tasks still needed"""
+    banked = {}
+    tasks = []
+    for q_type, spec in pattern.items():
+        type_info = {**base_info, 'question_type': q_type}
+        banked[q_type] = get_bank_questions(type_info, spec['count']) if use_bank else []
+        remaining = spec['count'] - len(banked[q_type])
+        part = 0
+        while remaining > 0:
+            num = min(remaining, MAX_QUESTIONS_PER_CALL)
+            task = {**type_info, 'num_questions': num}
+            if part:
+                # Only later calls for a split type; the first shares its cache key with interactive generation
+                task['part'] = part
+            tasks.append(task)
+            remaining -= num
+            part += 1
+    return {'banked': banked, 'tasks': tasks}
+
+def build_paper(content: Optional[str], base_info: Dict[str, Any], pattern: Dict[str, Dict[str, int]],
+                images=None,
+                backend: Callable[..., List[Dict[str, Any]]] = default_backend,
+                limiter: Optional[RateLimiter] = None,
+                max_workers: int = PAPER_MAX_WORKERS,
+                progress: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, Any]:
+    """Generate every section of the pattern and assemble one list of questions.
+
+    Without content the paper is generated from the NCERT syllabus and the question
+    bank is used first. Cache hits never wait on the rate limiter.
+    """
+    use_bank = not content
+    if not content:
+        content = get_syllabus_content(base_info['subject'], base_info['class'], base_info['chapter'])
+
+    plan = expand_pattern(pattern, base_info, use_bank)
+    tasks = plan['tasks']
+    stats = {'api_calls': 0, 'cached': 0, 'banked': sum(len(q) for q in plan['banked'].values()), 'failed': 0}
+    generated = {q_type: [] for q_type in pattern}
+
+    def run_task(info):
+        cached = API_avai and is_cached(content, info, images)
+        if not cached and limiter and not limiter.acquire():
+            return info, [], cached
+        return info, backend(content, info, images), cached
+
+    done = 0
+    if progress:
+        progress(done, len(tasks), f"{stats['banked']} questions from the bank, {len(tasks)} generation tasks")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(run_task, info) for info in tasks]
+        for future in as_completed(futures):
+            try:
+                info, questions, cached = future.result()
+            except Exception:
+                info, questions, cached = None, [], False
+            done += 1
+            if questions:
+                stats['cached' if cached else 'api_calls'] += 1
+                generated[info['question_type']].extend(questions[:info['num_questions']])
+            else:
+                stats['failed'] += 1
+            if progress:
+                label = info['question_type'] if info else "task"
+                progress(done, len(tasks), f"{label}: {len(questions)} questions" + (" (cached)" if cached else ""))
+
+    # Assemble sections in pattern order with the pattern's marks
+    questions = []
+    missing = {}
+    for q_type, spec in pattern.items():
+        section = (plan['banked'][q_type] + generated[q_type])[:spec['count']]
+        for q in section:
+            q['marks'] = spec['marks']
+            q['question_type'] = q_type
+        questions.extend(section)
+        if len(section) < spec['count']:
+            missing[q_type] = spec['count'] - len(section)
+
+    return {'questions': questions, 'missing': missing, 'stats': stats}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a full exam paper from an EXAM_PATTERNS entry")
+    parser.add_argument('--board', default="CBSE", choices=BOARDS)
+    parser.add_argument('--class', dest='class_level', type=int, default=10)
+    parser.add_argument('--subject', required=True)
+    parser.add_argument('--chapter', default="")
+    parser.add_argument('--bloom', default="Apply")
+    parser.add_argument('--content-file', type=Path, help="Study material (default: NCERT syllabus)")
+    parser.add_argument('--workers', type=int, default=PAPER_MAX_WORKERS)
+    parser.add_argument('--max-requests', type=int, default=BATCH_MAX_REQUESTS)
+    parser.add_argument('--publish', action='store_true', help="Publish the paper to students")
+    args = parser.parse_args(argv)
+
+    pattern = get_exam_pattern(args.board, args.class_level)
+    if not pattern:
+        print(f"No exam pattern for {args.board} class {args.class_level}")
+        return 1
+
+    base_info = {
+        'board': args.board,
+        'class': args.class_level,
+        'subject': args.subject,
+        'chapter': args.chapter,
+        'bloom_level': args.bloom
+    }
+    content = args.content_file.read_text() if args.content_file else None
+    limiter = RateLimiter(BATCH_REQUESTS_PER_MINUTE, burst=args.workers, max_requests=args.max_requests,
+                          quota=daily_quota() if API_avai else None)
+    paper = build_paper(content, base_info, pattern, limiter=limiter, max_workers=args.workers,
+                        progress=lambda done, total, msg: print(f"[{done}/{total}] {msg}"))
+
+    stats = paper['stats']
+    print(f"Paper: {len(paper['questions'])} questions ({stats['api_calls']} API calls, "
+          f"{stats['cached']} cached, {stats['banked']} from bank, {stats['failed']} failed)")
+    if paper['missing']:
+        print(f"Missing: {paper['missing']}")
+    if args.publish and paper['questions']:
+        print("Published" if save_questions(paper['questions']) else "Failed to publish")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+"""Speculative pre-processing started as soon as study material is uploaded.
+
+While the teacher is still choosing question type, Bloom level and count, a
+background thread cleans and ranks the content, fingerprints it, hashes the
+images and probes the generation cache for every setting the dashboard offers.
+When "Generate Assessment" is pressed only the API call (or nothing, on a cache
+hit) is left.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Any, Iterable
+
+from PIL import Image
+
+from config import OPTIMAL_CONTENT_LENGTH, MAX_QUESTIONS_PER_CALL
+from curriculum import QUESTION_TYPES, EXAM_KEYWORDS
+from question_generator import optimize_content, get_image_hash, make_cache_key, get_cached_questions, build_prompt
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preprocess")
+
+def content_fingerprint(content: str, images: Optional[List[Image.Image]], base_info: Dict[str, Any]) -> str:
+    """Identity of everything the pipeline's output depends on"""
+    digest = hashlib.sha256(content.encode())
+    for field in ('board', 'class', 'subject', 'chapter'):
+        digest.update(f"|{base_info.get(field, '')}".encode())
+    # Uploaded images stay the same objects in session state across reruns
+    digest.update(f"|{tuple(id(img) for img in images or [])}".encode())
+    return digest.hexdigest()
+
+def settings_key(info: Dict[str, Any]) -> str:
+    return f"{info['question_type']}|{info['bloom_level']}|{info['num_questions']}"
+
+def preprocess(content: str, images: Optional[List[Image.Image]], base_info: Dict[str, Any],
+               likely_settings: Iterable[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    """Everything generate_with_api does before the API call, for all dashboard settings"""
+    optimized_content = optimize_content(content, base_info.get('chapter'), OPTIMAL_CONTENT_LENGTH)
+    image_hash = get_image_hash(images) if images else ""
+
+    # Probe the cache for every reachable setting (a few hundred md5s)
+    cache_hits = {}
+    for q_type in QUESTION_TYPES:
+        for bloom_level in EXAM_KEYWORDS:
+            for num_questions in range(1, MAX_QUESTIONS_PER_CALL + 1):
+                info = {**base_info, 'question_type': q_type, 'bloom_level': bloom_level,
+                        'num_questions': num_questions}
+                cache_key = make_cache_key(optimized_content, info, image_hash)
+                if get_cached_questions(cache_key) is not None:
+                    cache_hits[settings_key(info)] = cache_key
+
+    # Build prompts for the settings the teacher is most likely to use
+    prompts = {}
+    for settings in likely_settings:
+        info = {**base_info, **settings}
+        prompts[settings_key(info)] = build_prompt(optimized_content, info)
+
+    return {
+        'fingerprint': content_fingerprint(content, images, base_info),
+        'optimized_content': optimized_content,
+        'image_hash': image_hash,
+        'cache_hits': cache_hits,
+        'prompts': prompts
+    }
+
+def start_preprocessing(content: str, images: Optional[List[Image.Image]], base_info: Dict[str, Any],
+                        likely_settings: Iterable[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    """Kick off the pipeline; keep the returned handle in session state"""
+    return {
+        'fingerprint': content_fingerprint(content, images, base_info),
+        'future': _executor.submit(preprocess, content, images, base_info, list(likely_settings))
+    }
+
+def get_prepared(handle: Optional[Dict[str, Any]], content: str, images: Optional[List[Image.Image]],
+                 info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Pre-computed work for this request, or None if the material changed since upload.
+
+    Waits for the pipeline if it is still running (it is doing work the request needs anyway).
+    """
+    if not handle or handle['fingerprint'] != content_fingerprint(content, images, info):
+        return None
+    future: Future = handle['future']
+    try:
+        result = future.result()
+    except Exception:
+        return None
+    return {
+        'optimized_content': result['optimized_content'],
+        'image_hash': result['image_hash'],
+        'prompt': result['prompts'].get(settings_key(info))
+    }
+
+def is_probed_hit(handle: Optional[Dict[str, Any]], info: Dict[str, Any]) -> bool:
+    """Whether the finished pipeline found cached questions for these settings (non-blocking)"""
+    if not handle or not handle['future'].done():
+        return False
+    try:
+        return settings_key(info) in handle['future'].result()['cache_hits']
+    except Exception:
+        return False
+
+def get_prepared_cached_questions(prepared: Optional[Dict[str, Any]], info: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Cached questions for the request, looked up with the pre-computed key parts"""
+    if not prepared:
+        return None
+    return get_cached_questions(make_cache_key(prepared['optimized_content'], info, prepared['image_hash']))
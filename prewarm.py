@@ -0,0 +1,189 @@
+"""Offline prewarm job: fills the generation cache and question bank for the NCERT syllabus.
+
+Run it ahead of school hours so the first teacher to pick a chapter gets cached questions:
+
+    python prewarm.py --classes 9 10 --subjects Physics Chemistry --types MCQ SA --bloom Remember Apply
+    python prewarm.py --demo --classes 6      # fake backend, no API calls
+
+Progress is checkpointed after every task, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from config import API_avai, BATCH_REQUESTS_PER_MINUTE, BATCH_MAX_REQUESTS
+from curriculum import BOARDS, NCERT_CHAPTERS, QUESTION_TYPES, EXAM_KEYWORDS
+from ncert_references import get_syllabus_content
+from question_generator import generate_with_api, generate_demo, is_cached
+import question_bank
+from question_bank import add_bank_questions, get_slot_key
+from rate_limit import RateLimiter, daily_quota
+
+CHECKPOINT_FILE = Path("prewarm_checkpoint.json")
+DEMO_CHECKPOINT_FILE = Path("prewarm_checkpoint.demo.json")
+DEMO_BANK_FILE = Path("question_bank.demo.json")
+DEFAULT_TYPES = ["MCQ", "VSA", "SA", "LA"]  # IMAGE/DIAGRAM need uploaded images
+DEFAULT_BLOOM_LEVELS = list(EXAM_KEYWORDS.keys())
+DEFAULT_NUM_QUESTIONS = 5
+
+def iter_syllabus(classes=None, subjects=None, chapters=None):
+    """Yield (subject, class_level, chapter) for the selected slice of NCERT_CHAPTERS"""
+    for key, chapter_list in NCERT_CHAPTERS.items():
+        subject, class_level = key.rsplit('_', 1)
+        class_level = int(class_level)
+        if classes and class_level not in classes:
+            continue
+        if subjects and subject not in subjects:
+            continue
+        for chapter in chapter_list:
+            if chapters and chapter not in chapters:
+                continue
+            yield subject, class_level, chapter
+
+def build_tasks(board="CBSE", classes=None, subjects=None, chapters=None,
+                question_types=None, bloom_levels=None,
+                num_questions=DEFAULT_NUM_QUESTIONS) -> List[Dict[str, Any]]:
+    """Expand a syllabus slice into one curriculum_info dict per generation call"""
+    tasks = []
+    for subject, class_level, chapter in iter_syllabus(classes, subjects, chapters):
+        for q_type in question_types or DEFAULT_TYPES:
+            for bloom_level in bloom_levels or DEFAULT_BLOOM_LEVELS:
+                tasks.append({
+                    'board': board,
+                    'class': class_level,
+                    'subject': subject,
+                    'chapter': chapter,
+                    'num_questions': num_questions,
+                    'question_type': q_type,
+                    'bloom_level': bloom_level
+                })
+    return tasks
+
+def task_key(info: Dict[str, Any]) -> str:
+    return f"{get_slot_key(info)}|{info['num_questions']}"
+
+def load_checkpoint(path: Path = CHECKPOINT_FILE) -> Dict[str, Any]:
+    if path.exists():
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+                data.setdefault('done', [])
+                data.setdefault('failed', {})
+                return data
+        except Exception:
+            pass
+    return {'done': [], 'failed': {}}
+
+def save_checkpoint(checkpoint: Dict[str, Any], path: Path = CHECKPOINT_FILE):
+    checkpoint['updated'] = datetime.now().isoformat()
+    temp_file = path.with_suffix('.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump(checkpoint, f)
+    temp_file.replace(path)
+
+def api_backend(content: str, info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Gemini backend: caches successful generations, returns [] on failure"""
+    return generate_with_api(content, info, fallback_to_demo=False)
+
+def demo_backend(content: str, info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fake backend for tests and dry runs (never calls the API)"""
+    return generate_demo(info)
+
+def run_prewarm(tasks: List[Dict[str, Any]],
+                backend: Callable[[str, Dict[str, Any]], List[Dict[str, Any]]] = api_backend,
+                limiter: Optional[RateLimiter] = None,
+                checkpoint_file: Path = CHECKPOINT_FILE,
+                progress: Callable[[str], None] = print) -> Dict[str, int]:
+    """Generate every task not yet in the checkpoint. Returns counters."""
+    checkpoint = load_checkpoint(checkpoint_file)
+    done = set(checkpoint['done'])
+    stats = {'generated': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+
+    for num, info in enumerate(tasks, 1):
+        key = task_key(info)
+        if key in done:
+            stats['skipped'] += 1
+            continue
+
+        content = get_syllabus_content(info['subject'], info['class'], info['chapter'])
+        cached = backend is api_backend and is_cached(content, info)
+
+        # Cache hits make no API call, so they don't spend rate-limit budget
+        if not cached and limiter and not limiter.acquire():
+            progress(f"Request budget exhausted after {limiter.used} calls; rerun to resume.")
+            break
+
+        label = f"[{num}/{len(tasks)}] {info['subject']} {info['class']} | {info['chapter']} | {info['question_type']} | {info['bloom_level']}"
+        try:
+            questions = backend(content, info)
+        except Exception as e:
+            questions = []
+            progress(f"{label}: error {e}")
+
+        if not questions:
+            stats['failed'] += 1
+            checkpoint['failed'][key] = datetime.now().isoformat()
+            save_checkpoint(checkpoint, checkpoint_file)
+            progress(f"{label}: failed (will retry on next run)")
+            continue
+
+        add_bank_questions(info, questions)
+        stats['cached' if cached else 'generated'] += 1
+        done.add(key)
+        checkpoint['done'].append(key)
+        checkpoint['failed'].pop(key, None)
+        save_checkpoint(checkpoint, checkpoint_file)
+        progress(f"{label}: {'cached' if cached else 'generated'} {len(questions)} questions")
+
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prewarm the question cache/bank for a slice of the NCERT syllabus")
+    parser.add_argument('--board', default="CBSE", choices=BOARDS)
+    parser.add_argument('--classes', type=int, nargs='*')
+    parser.add_argument('--subjects', nargs='*')
+    parser.add_argument('--chapters', nargs='*')
+    parser.add_argument('--types', nargs='*', default=DEFAULT_TYPES, choices=list(QUESTION_TYPES.keys()))
+    parser.add_argument('--bloom', nargs='*', default=DEFAULT_BLOOM_LEVELS, choices=DEFAULT_BLOOM_LEVELS)
+    parser.add_argument('--num-questions', type=int, default=DEFAULT_NUM_QUESTIONS)
+    parser.add_argument('--requests-per-minute', type=float, default=BATCH_REQUESTS_PER_MINUTE)
+    parser.add_argument('--max-requests', type=int, default=BATCH_MAX_REQUESTS)
+    parser.add_argument('--checkpoint', type=Path)
+    parser.add_argument('--bank-file', type=Path)
+    parser.add_argument('--restart', action='store_true', help="Ignore the existing checkpoint")
+    parser.add_argument('--demo', action='store_true', help="Use the fake demo backend (no API calls)")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the tasks")
+    args = parser.parse_args(argv)
+
+    tasks = build_tasks(args.board, args.classes, args.subjects, args.chapters,
+                        args.types, args.bloom, args.num_questions)
+    if args.dry_run:
+        for info in tasks:
+            print(task_key(info))
+        print(f"{len(tasks)} tasks")
+        return 0
+
+    if not args.demo and not API_avai:
+        print("GEMINI_API_KEY not configured. Use --demo to run with the fake backend.")
+        return 1
+
+    # Keep fake demo questions out of the real bank and checkpoint
+    checkpoint_file = args.checkpoint or (DEMO_CHECKPOINT_FILE if args.demo else CHECKPOINT_FILE)
+    if args.bank_file or args.demo:
+        question_bank.BANK_FILE = args.bank_file or DEMO_BANK_FILE
+
+    if args.restart and checkpoint_file.exists():
+        checkpoint_file.unlink()
+
+    # Draws on the same daily budget as paper builds and LLM grading (BACKGROUND_DAILY_LIMIT)
+    limiter = None if args.demo else RateLimiter(args.requests_per_minute, max_requests=args.max_requests,
+                                                 quota=daily_quota())
+    stats = run_prewarm(tasks, demo_backend if args.demo else api_backend, limiter, checkpoint_file)
+    print(f"Done: {stats['generated']} generated, {stats['cached']} already cached, "
+          f"{stats['skipped']} skipped (checkpoint), {stats['failed']} failed")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from file_store import file_lock, atomic_write
+
+BANK_FILE = Path("question_bank.json")
+MAX_QUESTIONS_PER_SLOT = 50  # Keep the bank file small
+
+_bank_data = None  # Lazy-loaded bank data
+_bank_mtime = None  # BANK_FILE's mtime when _bank_data was read
+_bank_lock = threading.RLock()
+
+def get_slot_key(info: Dict[str, Any]) -> str:
+    """Bank slot for a curriculum setting (independent of uploaded content)"""
+    return "|".join(str(info.get(field, '')) for field in
+                    ('board', 'class', 'subject', 'chapter', 'question_type', 'bloom_level'))
+
+def _bank_file_mtime() -> Optional[int]:
+    try:
+        return BANK_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _read_bank() -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(BANK_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def load_bank() -> Dict[str, Dict[str, Any]]:
+    """Lazy load the question bank, re-reading it when another process (e.g. prewarm.py) saved it"""
+    global _bank_data, _bank_mtime
+    with _bank_lock:
+        mtime = _bank_file_mtime()
+        if _bank_data is None or mtime != _bank_mtime:
+            _bank_data = _read_bank()
+            _bank_mtime = mtime
+        return _bank_data
+
+def save_bank(bank: Dict[str, Dict[str, Any]]):
+    """Write the bank atomically"""
+    global _bank_data, _bank_mtime
+    with _bank_lock:
+        try:
+            atomic_write(BANK_FILE, json.dumps(bank))
+            _bank_data = bank
+            _bank_mtime = _bank_file_mtime()
+        except Exception:
+            pass
+
+def add_bank_questions(info: Dict[str, Any], questions: List[Dict[str, Any]]) -> int:
+    """Add generated questions to the bank, skipping duplicates. Returns number added."""
+    with _bank_lock, file_lock(BANK_FILE):
+        # The saved bank, not our copy, so other processes' additions are kept
+        bank = _read_bank()
+        slot = bank.setdefault(get_slot_key(info), {'questions': [], 'updated': 0})
+        seen = {q.get('question', '').strip().lower() for q in slot['questions']}
+        added = 0
+        for q in questions:
+            text = q.get('question', '').strip().lower()
+            if text and text not in seen:
+                slot['questions'].append(q)
+                seen.add(text)
+                added += 1
+        slot['questions'] = slot['questions'][-MAX_QUESTIONS_PER_SLOT:]
+        slot['updated'] = time.time()
+        if added:
+            save_bank(bank)
+        return added
+
+def get_bank_questions(info: Dict[str, Any], count: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Return up to count banked questions for the curriculum setting"""
+    slot = load_bank().get(get_slot_key(info))
+    if not slot:
+        return []
+    count = info.get('num_questions', 1) if count is None else count
+    return [dict(q) for q in slot['questions'][:count]]
+
+def count_bank_questions(info: Dict[str, Any]) -> int:
+    slot = load_bank().get(get_slot_key(info))
+    return len(slot['questions']) if slot else 0
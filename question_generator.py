@@ -4,21 +4,26 @@ import hashlib
 import time
 import json
 import re
+import threading
 from curriculum import get_keywords_for_bloom, get_question_type_info
 from ncert_references import get_ncert_reference
+from question_bank import get_bank_questions
+import copy
 import pickle
 from pathlib import Path
 from config import MAX_CACHE_AGE_HOURS
 from PIL import Image
 import io
 from functools import lru_cache
+from file_store import file_lock, atomic_write
 from typing import Optional, List, Dict, Any
 
 
 CACHE_FILE = Path("question_cache.pkl")
 IMAGE_HASH_CACHE = {}  # In-memory cache for image hashes
 _cache_data = None  # Lazy-loaded cache data
-_cache_loaded = False  # Track if cache has been loaded
+_cache_mtime = None  # CACHE_FILE's mtime when _cache_data was read
+_cache_lock = threading.RLock()  # Batch jobs generate from several threads
 
 def optimize_content(content: str, chapter: Optional[str] = None, max_length: int = OPTIMAL_CONTENT_LENGTH) -> str:
     """Optimize content length for API efficiency with improved text extraction"""
@@ -114,104 +119,140 @@ def get_image_hash(images: Optional[List[Image.Image]]) -> str:
     except Exception:
         return ""
 
+def _cache_file_mtime() -> Optional[int]:
+    try:
+        return CACHE_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _read_cache_file() -> Dict[str, tuple]:
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            return pickle.load(f) or {}
+    except Exception:
+        return {}
+
+def _write_cache_file(cache: Dict[str, tuple]):
+    """Save under the file lock held by the caller and make it the in-process copy"""
+    global _cache_data, _cache_mtime
+    atomic_write(CACHE_FILE, pickle.dumps(cache), 'wb')
+    _cache_data = cache
+    _cache_mtime = _cache_file_mtime()
+
 def load_cache() -> Dict[str, tuple]:
-    """Lazy load cache - only load when needed"""
-    global _cache_data, _cache_loaded
+    """Lazy load cache, re-reading it when another process (e.g. prewarm.py) has saved it"""
+    global _cache_data, _cache_mtime
     
-    if _cache_loaded:
-        return _cache_data if _cache_data is not None else {}
+    mtime = _cache_file_mtime()
+    if _cache_data is not None and mtime == _cache_mtime:
+        return _cache_data
     
-    if CACHE_FILE.exists():
-        try:
-            with open(CACHE_FILE, 'rb') as f:
-                _cache_data = pickle.load(f)
-                _cache_loaded = True
-                return _cache_data if _cache_data is not None else {}
-        except Exception:
-            _cache_data = {}
-            _cache_loaded = True
-            return {}
-    
-    _cache_data = {}
-    _cache_loaded = True
-    return {}
+    with _cache_lock:
+        mtime = _cache_file_mtime()
+        if _cache_data is None or mtime != _cache_mtime:
+            _cache_data = _read_cache_file()
+            _cache_mtime = mtime
+        return _cache_data
 
 def save_cache(cache: Dict[str, tuple], incremental: bool = True):
     """Save cache with optional incremental updates"""
-    global _cache_data
-    
     try:
-        # If incremental and we have existing cache, merge
-        if incremental and _cache_data:
-            cache = {**_cache_data, **cache}
-        
-        _cache_data = cache
-        
-        # Use atomic write to prevent corruption
-        temp_file = CACHE_FILE.with_suffix('.tmp')
-        with open(temp_file, 'wb') as f:
-            pickle.dump(cache, f)
-        temp_file.replace(CACHE_FILE)  # Atomic rename
+        with _cache_lock, file_lock(CACHE_FILE):
+            # Merge into the saved file, not our copy, so other processes' entries are kept
+            if incremental:
+                cache = {**_read_cache_file(), **cache}
+            _write_cache_file(cache)
     except Exception:
         pass
 
 def cleanup_expired_cache():
     """Remove expired entries from cache"""
-    global _cache_data
-    if not _cache_data:
-        return
-    
     current_time = time.time()
-    expired_keys = [
-        key for key, (_, timestamp) in _cache_data.items()
-        if (current_time - timestamp) / 3600 >= MAX_CACHE_AGE_HOURS
-    ]
-    
-    for key in expired_keys:
-        del _cache_data[key]
+    try:
+        with _cache_lock, file_lock(CACHE_FILE):
+            cache = _read_cache_file()
+            expired_keys = [
+                key for key, (_, timestamp) in cache.items()
+                if (current_time - timestamp) / 3600 >= MAX_CACHE_AGE_HOURS
+            ]
+            for key in expired_keys:
+                del cache[key]
+            if expired_keys:
+                _write_cache_file(cache)
+    except Exception:
+        pass
+
+def make_cache_key(optimized_content: str, info: Dict[str, Any], image_hash: str = "") -> str:
+    """Cache key for a generation request (content sample + curriculum settings).
     
-    if expired_keys:
-        save_cache(_cache_data, incremental=False)
+    'part' distinguishes several calls for the same settings (e.g. 20 MCQs in two batches).
+    """
+    # Use first 500 chars instead of 200 for better cache key uniqueness
+    content_sample = optimized_content[:500] if len(optimized_content) > 500 else optimized_content
+    cache_key_data = (
+        f"{content_sample}{info['board']}{info['class']}{info['subject']}"
+        f"{info['chapter']}{info['num_questions']}{info['question_type']}"
+        f"{info['bloom_level']}{image_hash}{info.get('part', '')}"
+    )
+    return hashlib.md5(cache_key_data.encode()).hexdigest()
+
+def get_cached_questions(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Return unexpired cached questions for a key, or None"""
+    cache = load_cache()
+    if cache_key in cache:
+        cached_data, timestamp = cache[cache_key]
+        age_hours = (time.time() - timestamp) / 3600
+        if age_hours < MAX_CACHE_AGE_HOURS:
+            # Callers (e.g. paper_builder) adjust questions in place
+            return copy.deepcopy(cached_data)
+        # Remove expired entry
+        with _cache_lock:
+            cache.pop(cache_key, None)
+    return None
+
+def is_cached(content: str, info: Dict[str, Any], images: Optional[List[Image.Image]] = None) -> bool:
+    """Check whether a request would be served from the cache (no API call)"""
+    optimized_content = optimize_content(content, info.get('chapter'), OPTIMAL_CONTENT_LENGTH)
+    image_hash = get_image_hash(images) if images else ""
+    return get_cached_questions(make_cache_key(optimized_content, info, image_hash)) is not None
 
-def generate_questions(content, curriculum_info, images=None):
+def generate_questions(content, curriculum_info, images=None, prepared=None):
     if API_avai:
-        return generate_with_api(content, curriculum_info, images)
+        return generate_with_api(content, curriculum_info, images, prepared=prepared)
     else:
         st.info("API unavailable. Using demo mode")
         return generate_demo(curriculum_info, images)
 
-def generate_with_api(content: str, info: Dict[str, Any], images: Optional[List[Image.Image]] = None) -> List[Dict[str, Any]]:
-    """Generate questions with API, optimized for performance"""
+def generate_with_api(content: str, info: Dict[str, Any], images: Optional[List[Image.Image]] = None,
+                      fallback_to_demo: bool = True, prepared: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Generate questions with API, optimized for performance.
+    
+    With fallback_to_demo=False, failures return [] instead of demo questions
+    (used by headless jobs that must not store placeholders).
+    `prepared` carries work already done by the upload pipeline (see preprocess.py):
+    optimized_content, image_hash and optionally the prompt for these settings.
+    """
+    prepared = prepared or {}
+    
     # Optimize content before processing
-    optimized_content = optimize_content(content, info.get('chapter'), OPTIMAL_CONTENT_LENGTH)
+    optimized_content = prepared.get('optimized_content')
+    if optimized_content is None:
+        optimized_content = optimize_content(content, info.get('chapter'), OPTIMAL_CONTENT_LENGTH)
     if len(optimized_content) < len(content) and ENABLE_CONTENT_OPTIMIZATION:
         reduction = len(content) - len(optimized_content)
         st.info(f"✓ Content optimized: Reduced by {reduction} characters for API efficiency")
     
     # Generate cache key efficiently (use more content for better cache hits)
-    image_hash = get_image_hash(images) if images else ""
-    # Use first 500 chars instead of 200 for better cache key uniqueness
-    content_sample = optimized_content[:500] if len(optimized_content) > 500 else optimized_content
-    cache_key_data = (
-        f"{content_sample}{info['board']}{info['class']}{info['subject']}"
-        f"{info['chapter']}{info['num_questions']}{info['question_type']}"
-        f"{info['bloom_level']}{image_hash}"
-    )
-    cache_key = hashlib.md5(cache_key_data.encode()).hexdigest()
-    
-    # Load cache (lazy loading)
-    cache = load_cache()
+    image_hash = prepared.get('image_hash')
+    if image_hash is None:
+        image_hash = get_image_hash(images) if images else ""
+    cache_key = make_cache_key(optimized_content, info, image_hash)
     
-    # Check cache with expiry
-    if cache_key in cache:
-        cached_data, timestamp = cache[cache_key]
-        age_hours = (time.time() - timestamp) / 3600
-        if age_hours < MAX_CACHE_AGE_HOURS:
-            st.info("✓ Using cached questions (saves API calls)")
-            return cached_data
-        else:
-            # Remove expired entry
-            del cache[cache_key]
+    # Check cache with expiry (lazy loading)
+    cached_data = get_cached_questions(cache_key)
+    if cached_data is not None:
+        st.info("✓ Using cached questions (saves API calls)")
+        return cached_data
     
     # Only send images if question type requires them (early exit optimization)
     images_to_send = None
@@ -220,7 +261,7 @@ def generate_with_api(content: str, info: Dict[str, Any], images: Optional[List[
         images_to_send = images[:MAX_IMAGES_PER_REQUEST]
     
     # Build prompt (cached internally)
-    prompt = build_prompt(optimized_content, info, images_to_send)
+    prompt = prepared.get('prompt') or build_prompt(optimized_content, info, images_to_send)
     
     # Pre-compute values used in loop
     ncert_ref = get_ncert_reference(info['subject'], info['class'], info['chapter'])
@@ -367,8 +408,7 @@ def generate_with_api(content: str, info: Dict[str, Any], images: Optional[List[
             result = questions[:num_questions_needed]
             
             # Save to cache incrementally
-            cache[cache_key] = (result, time.time())
-            save_cache({cache_key: cache[cache_key]}, incremental=True)
+            save_cache({cache_key: (result, time.time())}, incremental=True)
             
             return result
         
@@ -387,6 +427,15 @@ def generate_with_api(content: str, info: Dict[str, Any], images: Optional[List[
             else:
                 st.warning("API call failed after retries. Falling back to demo mode.")
     
+    if not fallback_to_demo:
+        return []
+    
+    # Prefer pre-generated questions from the bank over demo placeholders
+    banked = get_bank_questions(info)
+    if banked:
+        st.info("✓ Using questions from the question bank")
+        return banked
+    
     # Only use demo if API is unavailable or all attempts failed
     if not API_avai:
         return generate_demo(info, images)
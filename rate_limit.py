@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import BACKGROUND_DAILY_LIMIT
+from file_store import file_lock, atomic_write
+
+QUOTA_FILE = Path("api_quota.json")
+
+_daily_quota = None
+
+class RateLimiter:
+    """Thread-safe token bucket for headless API jobs (prewarm, paper builder).
+
+    Allows `burst` back-to-back calls, then one call every 60/requests_per_minute
+    seconds. Optionally stops after max_requests calls in total, or once a
+    shared DailyQuota refuses a call (each call is reserved as it is made).
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = 1, max_requests: Optional[int] = None,
+                 quota: Optional['DailyQuota'] = None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.burst = max(1, burst)
+        self.max_requests = max_requests
+        self.quota = quota
+        self.used = 0
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[int]:
+        if self.max_requests is None:
+            return None
+        return max(0, self.max_requests - self.used)
+
+    def acquire(self) -> bool:
+        """Block until a request may be made. Returns False once the budget is spent."""
+        while True:
+            with self._lock:
+                if self.max_requests is not None and self.used >= self.max_requests:
+                    return False
+                now = time.monotonic()
+                if self.interval:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last) / self.interval)
+                else:
+                    self._tokens = self.burst
+                self._last = now
+                if self._tokens >= 1:
+                    if self.quota is not None and not self.quota.try_consume():
+                        return False
+                    self._tokens -= 1
+                    self.used += 1
+                    return True
+                wait = (1 - self._tokens) * self.interval
+            time.sleep(wait)
+
+class DailyQuota:
+    """Gemini calls per day for background work, counted in a file.
+
+    Every job worker and process shares it: paper builds, prewarm and LLM
+    grading draw from BACKGROUND_DAILY_LIMIT. Interactive generation keeps its own
+    per-session DAILY_LIMIT in the app.
+    """
+
+    def __init__(self, limit: int = BACKGROUND_DAILY_LIMIT, path: Path = QUOTA_FILE):
+        self.limit = limit
+        self.path = path
+
+    def _read(self) -> Dict[str, Any]:
+        today = date.today().isoformat()
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('date') == today:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {'date': today, 'used': 0}
+
+    def used(self) -> int:
+        return self._read()['used']
+
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used())
+
+    def try_consume(self) -> bool:
+        """Reserve one call; False once today's limit is reached"""
+        with file_lock(self.path):
+            data = self._read()
+            if data['used'] >= self.limit:
+                return False
+            data['used'] += 1
+            atomic_write(self.path, json.dumps(data))
+            return True
+
+def daily_quota() -> DailyQuota:
+    global _daily_quota
+    if _daily_quota is None:
+        _daily_quota = DailyQuota()
+    return _daily_quota
@@ -0,0 +1,220 @@
+"""Re-grade stored student history with the current scoring settings.
+
+After changing SEMANTIC_SIMILARITY_THRESHOLD, the scoring weights or the
+embedding model, old results in student_history.json are stale. This command
+streams every stored submission, evaluates each distinct (question, answer)
+pair once, spread over a process pool, and writes the new scores to
+REGRADES_DIR/<scoring version>.json next to the untouched history, with
+per-question score deltas:
+
+    python regrade.py --workers 8
+    python regrade.py --dry-run      # count what would be re-graded
+
+Only submissions saved with their answers (assessment_id + responses) can be
+re-graded; older ones are counted and skipped.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import SHORT_ANSWER_POLICY, REGRADE_WORKERS, REGRADE_CHUNK_SIZE, REGRADE_BATCH_SIZE
+from shared_state import HISTORY_FILE, load_assessment
+
+REGRADES_DIR = Path("regrades")
+
+def iter_submissions(path: Path = HISTORY_FILE) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(history index, entry) for every stored submission"""
+    try:
+        with open(path, 'r') as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        return
+    for index, entry in enumerate(history):
+        yield index, entry
+
+def collect_pairs(submissions) -> Dict[str, Any]:
+    """Distinct (question, answer) pairs and, per submission, which pair each response is"""
+    from answer_keys import question_digest
+    from result_cache import result_key
+
+    pairs: List[Tuple[Dict[str, Any], Any]] = []
+    pair_index: Dict[str, int] = {}
+    assessments: Dict[str, Any] = {}
+    digests: Dict[str, List[str]] = {}
+    graded = []
+    skipped = 0
+    responses = 0
+    for index, entry in submissions:
+        archive_id = entry.get('assessment_id')
+        if not archive_id or 'responses' not in entry:
+            skipped += 1
+            continue
+        if archive_id not in assessments:
+            assessments[archive_id] = load_assessment(archive_id)
+            if assessments[archive_id] is not None:
+                digests[archive_id] = [question_digest(question) for question in assessments[archive_id]]
+        questions = assessments[archive_id]
+        if questions is None or len(questions) != len(entry['responses']):
+            skipped += 1
+            continue
+        rows = []
+        for question, digest, response in zip(questions, digests[archive_id], entry['responses']):
+            # The version part is irrelevant here: every pair is graded with the same settings
+            key = result_key(digest, response['answer'], '')
+            if key not in pair_index:
+                pair_index[key] = len(pairs)
+                pairs.append((question, response['answer']))
+            rows.append(pair_index[key])
+        responses += len(rows)
+        graded.append((index, entry, rows))
+    return {'pairs': pairs, 'graded': graded, 'skipped': skipped, 'responses': responses}
+
+def _init_worker(threads: int):
+    import eval_scheduler
+    from semantic_model import load_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    # One encode per chunk, in large batches (no other submitters to wait for)
+    eval_scheduler.configure(enabled=True, window_ms=0, max_batch=REGRADE_BATCH_SIZE)
+    load_model()
+
+def _grade_chunk(task: Tuple[List[Tuple[Dict[str, Any], Any]], str]) -> Tuple[List[Dict[str, Any]], str]:
+    from evaluate import evaluate_uncached
+    from result_cache import scoring_config_version
+    pairs, short_answer_policy = task
+    return evaluate_uncached(pairs, short_answer_policy), scoring_config_version(short_answer_policy)
+
+def grade_pairs(pairs, short_answer_policy: str = SHORT_ANSWER_POLICY, workers: int = REGRADE_WORKERS,
+                chunk_size: int = REGRADE_CHUNK_SIZE) -> Tuple[List[Dict[str, Any]], str]:
+    """Evaluations for every pair (in order) and the scoring version they were made with"""
+    from answer_keys import question_digest
+
+    workers = workers or os.cpu_count() or 1
+    # Pairs of the same question together, so each worker encodes its key points once
+    order = sorted(range(len(pairs)), key=lambda i: question_digest(pairs[i][0]))
+    tasks = [([pairs[i] for i in order[start:start + chunk_size]], short_answer_policy)
+             for start in range(0, len(order), chunk_size)]
+    workers = max(1, min(workers, len(tasks)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if workers == 1:
+        _init_worker(threads)
+        outputs = [_grade_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(threads,)) as pool:
+            outputs = list(pool.map(_grade_chunk, tasks))
+
+    evaluations = [None] * len(pairs)
+    position = 0
+    for chunk_evaluations, _ in outputs:
+        for evaluation in chunk_evaluations:
+            evaluations[order[position]] = evaluation
+            position += 1
+    if outputs:
+        version = outputs[0][1]
+    else:
+        from result_cache import scoring_config_version
+        version = scoring_config_version(short_answer_policy)
+    return evaluations, version
+
+def question_deltas(graded, evaluations, questions_by_id) -> List[Dict[str, Any]]:
+    """Old vs new score per (assessment, question), largest changes first"""
+    stats: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for _, entry, rows in graded:
+        for num, (response, row) in enumerate(zip(entry['responses'], rows), 1):
+            item = stats.setdefault((entry['assessment_id'], num), {
+                'assessment_id': entry['assessment_id'],
+                'question_num': num,
+                'question': questions_by_id[entry['assessment_id']][num - 1].get('question', ''),
+                'responses': 0, 'changed': 0, 'old_total': 0.0, 'new_total': 0.0, 'max_abs_delta': 0.0
+            })
+            delta = evaluations[row]['score'] - response['score']
+            item['responses'] += 1
+            item['changed'] += delta != 0
+            item['old_total'] += response['score']
+            item['new_total'] += evaluations[row]['score']
+            item['max_abs_delta'] = max(item['max_abs_delta'], abs(delta))
+    deltas = []
+    for item in stats.values():
+        item['old_mean'] = item.pop('old_total') / item['responses']
+        item['new_mean'] = item.pop('new_total') / item['responses']
+        item['mean_delta'] = item['new_mean'] - item['old_mean']
+        deltas.append(item)
+    return sorted(deltas, key=lambda item: -abs(item['mean_delta']))
+
+def regrade(history_file: Path = HISTORY_FILE, short_answer_policy: str = SHORT_ANSWER_POLICY,
+            workers: int = REGRADE_WORKERS, chunk_size: int = REGRADE_CHUNK_SIZE,
+            dry_run: bool = False) -> Dict[str, Any]:
+    start = time.perf_counter()
+    collected = collect_pairs(iter_submissions(history_file))
+    pairs, graded = collected['pairs'], collected['graded']
+    report = {
+        'submissions': len(graded),
+        'skipped': collected['skipped'],
+        'responses': collected['responses'],
+        'unique_answers': len(pairs)
+    }
+    if dry_run or not pairs:
+        return report
+
+    evaluations, version = grade_pairs(pairs, short_answer_policy, workers, chunk_size)
+    questions_by_id = {entry['assessment_id']: load_assessment(entry['assessment_id']) for _, entry, _ in graded}
+    submissions = []
+    for index, entry, rows in graded:
+        scores = [evaluations[row]['score'] for row in rows]
+        total = sum(scores)
+        max_total = sum(evaluations[row]['max_score'] for row in rows)
+        submissions.append({
+            'history_index': index,
+            'username': entry.get('username'),
+            'timestamp': entry.get('timestamp'),
+            'assessment_id': entry['assessment_id'],
+            'old_total_score': entry.get('total_score'),
+            'total_score': total,
+            'max_score': max_total,
+            'percentage': (total / max_total * 100) if max_total > 0 else 0,
+            'scores': scores
+        })
+    report.update({
+        'version': version,
+        'timestamp': datetime.now().isoformat(),
+        'short_answer_policy': short_answer_policy,
+        'seconds': time.perf_counter() - start,
+        'question_deltas': question_deltas(graded, evaluations, questions_by_id),
+        'results': submissions
+    })
+    REGRADES_DIR.mkdir(exist_ok=True)
+    path = REGRADES_DIR / f"{version}.json"
+    temp_file = path.with_suffix('.tmp')
+    with open(temp_file, 'w') as f:
+        json.dump(report, f)
+    temp_file.replace(path)
+    report['path'] = str(path)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-grade stored student history with current scoring settings")
+    parser.add_argument('--history', type=Path, default=HISTORY_FILE)
+    parser.add_argument('--policy', choices=['semantic', 'keyword'], default=SHORT_ANSWER_POLICY,
+                        help="Short-answer policy (see SHORT_ANSWER_POLICY)")
+    parser.add_argument('--workers', type=int, default=REGRADE_WORKERS, help="0 = one per CPU core")
+    parser.add_argument('--chunk-size', type=int, default=REGRADE_CHUNK_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="Only count submissions and distinct answers")
+    parser.add_argument('--top', type=int, default=10, help="Questions to list by score change")
+    args = parser.parse_args()
+
+    report = regrade(args.history, args.policy, args.workers, args.chunk_size, args.dry_run)
+    print(f"{report['submissions']} submissions ({report['skipped']} skipped without stored answers), "
+          f"{report['responses']} responses, {report['unique_answers']} distinct answers")
+    if 'path' in report:
+        print(f"Re-graded in {report['seconds']:.1f}s with scoring version {report['version']} -> {report['path']}")
+        for item in report['question_deltas'][:args.top]:
+            print(f"  {item['assessment_id']} Q{item['question_num']}: {item['old_mean']:.2f} -> "
+                  f"{item['new_mean']:.2f} ({item['mean_delta']:+.2f}), {item['changed']}/{item['responses']} changed")
@@ -0,0 +1,83 @@
+"""Memoized evaluation results, shared by every session in the process.
+
+Identical answers to the same question (common for MCQs, short VSA answers and
+resubmissions) are evaluated once. Keys combine the question digest, a digest
+of the stripped answer and a digest of everything that affects
+scoring (thresholds, policies, the loaded embedding model), so changing any of
+them makes old entries unreachable.
+"""
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import config
+import scoring
+from semantic_model import model_id
+
+SCORING_VERSION = 2  # Bump when scoring code changes results (2: answer chunking off by default, at 180 words)
+
+_results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+def scoring_config_version(short_answer_policy: str) -> str:
+    settings = {
+        'version': SCORING_VERSION,
+        'model': model_id(),
+        'semantic': config.ENABLE_SEMANTIC_EVALUATION,
+        'threshold': config.SEMANTIC_SIMILARITY_THRESHOLD,
+        'weights': [scoring.MODEL_ANSWER_WEIGHT, scoring.KEY_POINT_WEIGHT],
+        'short_answer': [config.SHORT_ANSWER_WORDS, short_answer_policy],
+        'chunking': [config.CHUNK_LONG_ANSWERS, config.CHUNK_ANSWER_WORDS, config.CHUNK_MAX_WORDS]
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+def normalize_answer(student_answer) -> str:
+    """Answers that always evaluate identically normalize to the same string"""
+    if isinstance(student_answer, str):
+        # Only the ends: the too-short check counts inner whitespace
+        return student_answer.strip()
+    # Diagram labels: feedback echoes the raw text, so keep values as typed
+    return json.dumps(student_answer, sort_keys=True, default=str)
+
+def answer_digest(student_answer) -> str:
+    return hashlib.sha256(normalize_answer(student_answer).encode()).hexdigest()
+
+def result_key(question_digest: str, student_answer, version: str) -> str:
+    return f"{question_digest}:{answer_digest(student_answer)}:{version}"
+
+def get_result(key: str) -> Optional[Dict[str, Any]]:
+    global _hits, _misses
+    with _lock:
+        evaluation = _results.get(key)
+        if evaluation is None:
+            _misses += 1
+            return None
+        _results.move_to_end(key)
+        _hits += 1
+    return copy.deepcopy(evaluation)
+
+def put_result(key: str, evaluation: Dict[str, Any]):
+    with _lock:
+        _results[key] = copy.deepcopy(evaluation)
+        _results.move_to_end(key)
+        while len(_results) > config.RESULT_CACHE_MAX_ENTRIES:
+            _results.popitem(last=False)
+
+def clear_results():
+    with _lock:
+        _results.clear()
+
+def result_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            'entries': len(_results),
+            'hits': _hits,
+            'misses': _misses,
+            'hit_rate': _hits / lookups if lookups else None
+        }
@@ -0,0 +1,131 @@
+"""Vectorized semantic scoring for all descriptive answers of a submission.
+
+Every question's key points are stacked into one matrix; `segments` maps each
+key-point row to its question. Similarities, the threshold, the 0.4/0.6 mix of
+model-answer and key-point similarity, the word-limit adjustment and rounding
+are all array operations, with no per-question Python loop.
+
+Long answers can be split into sentence chunks (MiniLM truncates at ~256 word
+pieces, so the end of an LA/CASE answer would otherwise be ignored). A key point
+then scores its best-matching chunk, and the answer as a whole is the mean of
+its chunk embeddings.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import SEMANTIC_SIMILARITY_THRESHOLD, CHUNK_MAX_WORDS
+from eval_metrics import span
+
+MODEL_ANSWER_WEIGHT = 0.4
+KEY_POINT_WEIGHT = 0.6
+SHORT_ANSWER_PENALTY = 0.3  # Max fraction lost for writing below the minimum words
+LONG_ANSWER_FACTOR = 0.95  # Applied beyond 1.5x the maximum words
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def split_answer(text: str, max_words: int = CHUNK_MAX_WORDS) -> List[str]:
+    """Sentences of an answer; sentences longer than max_words are cut into windows"""
+    chunks = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            chunks.append(" ".join(words[start:start + max_words]))
+    return chunks or [text]
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+def stack_key_points(key_point_embs: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(normalized stacked matrix, question index of each row)"""
+    counts = [len(embs) for embs in key_point_embs]
+    segments = np.repeat(np.arange(len(counts)), counts)
+    non_empty = [embs for embs in key_point_embs if len(embs)]
+    if not non_empty:
+        return np.zeros((0, 0), dtype=np.float32), segments
+    return normalize_rows(np.concatenate(non_empty)), segments
+
+def word_limit_arrays(word_limits: List[Optional[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(min_words, max_words) arrays; 0 where a question has no limit"""
+    limits = np.array([limit if limit else (0, 0) for limit in word_limits], dtype=np.float32).reshape(-1, 2)
+    return limits[:, 0], limits[:, 1]
+
+def adjust_scores_for_word_limit(scores: np.ndarray, word_counts: np.ndarray, min_words: np.ndarray,
+                                 max_words: np.ndarray) -> np.ndarray:
+    """Vector form of evaluate.adjust_for_word_limit (min_words == 0 means no limit)"""
+    has_limit = min_words > 0
+    safe_min = np.where(has_limit, min_words, 1)
+    too_short = has_limit & (word_counts < min_words)
+    too_long = has_limit & ~too_short & (word_counts > max_words * 1.5)
+    penalty = (safe_min - word_counts) / safe_min * SHORT_ANSWER_PENALTY
+    scores = np.where(too_short, scores * (1 - penalty), scores)
+    return np.where(too_long, scores * LONG_ANSWER_FACTOR, scores)
+
+def score_descriptive(student_embs: np.ndarray, model_embs: np.ndarray, key_point_embs: List[np.ndarray],
+                      max_marks: np.ndarray, word_counts: np.ndarray,
+                      word_limits: List[Optional[Tuple[int, int]]],
+                      chunk_offsets: Optional[np.ndarray] = None, kind=None) -> Dict[str, np.ndarray]:
+    """Score n answers at once.
+
+    student_embs: (m, d) chunk embeddings, answer i owning rows
+    chunk_offsets[i]:chunk_offsets[i + 1] (default: one row per answer);
+    model_embs: (n, d); key_point_embs: n arrays of (k_i, d); kind labels the
+    timing spans (eval_metrics.span). Returns per-question arrays (overall_similarity, score, answer_embeddings:
+    the normalized whole-answer vectors) and per-key-point
+    arrays (point_similarity, matched, segments) in stacked order.
+    """
+    n = len(model_embs)
+    with span('similarity', kind=kind, batch=n):
+        answers, overall, point_similarity, segments = _similarities(student_embs, model_embs, key_point_embs,
+                                                                     chunk_offsets)
+    counts = np.bincount(segments, minlength=n)
+    sums = np.bincount(segments, weights=point_similarity, minlength=n)
+    mean_point = sums / np.maximum(counts, 1)
+    combined = np.where(counts > 0, overall * MODEL_ANSWER_WEIGHT + mean_point * KEY_POINT_WEIGHT, overall)
+
+    with span('word_limit', kind=kind, batch=n):
+        max_marks = np.asarray(max_marks, dtype=np.float64)
+        word_counts = np.asarray(word_counts, dtype=np.float64)
+        min_words, max_words = word_limit_arrays(word_limits)
+        scores = adjust_scores_for_word_limit(combined * max_marks, word_counts, min_words, max_words)
+        scores = np.clip(scores, 0, max_marks)
+        scores = np.clip(np.round(scores * 2) / 2, 0, max_marks)
+
+    return {
+        'overall_similarity': overall,
+        'score': scores,
+        'answer_embeddings': answers,
+        'point_similarity': point_similarity,
+        'matched': point_similarity >= SEMANTIC_SIMILARITY_THRESHOLD,
+        'segments': segments,
+        'offsets': np.concatenate([[0], np.cumsum(counts)])
+    }
+
+def _similarities(student_embs, model_embs, key_point_embs, chunk_offsets):
+    """Whole-answer vectors, their model answer similarity, and best-chunk similarity per key point"""
+    chunks = normalize_rows(student_embs)
+    n = len(model_embs)
+    if chunk_offsets is None:
+        chunk_offsets = np.arange(n + 1)
+    chunk_offsets = np.asarray(chunk_offsets)
+    chunk_counts = np.diff(chunk_offsets)
+    # Whole-answer vector: mean of its chunks (the chunk itself when there is one)
+    answers = normalize_rows(np.add.reduceat(chunks, chunk_offsets[:-1], axis=0))
+    overall = np.einsum('nd,nd->n', answers, normalize_rows(model_embs))
+
+    keys, segments = stack_key_points(key_point_embs)
+    if len(keys):
+        # Every (key point, chunk of its own answer) pair: one row-wise product,
+        # then the best chunk per key point
+        pair_counts = chunk_counts[segments]
+        pair_offsets = np.concatenate([[0], np.cumsum(pair_counts)])
+        pair_key = np.repeat(np.arange(len(keys)), pair_counts)
+        chunk_start = chunk_offsets[segments]
+        pair_chunk = np.arange(pair_offsets[-1]) - np.repeat(pair_offsets[:-1] - chunk_start, pair_counts)
+        pair_similarity = np.einsum('pd,pd->p', keys[pair_key], chunks[pair_chunk])
+        point_similarity = np.maximum.reduceat(pair_similarity, pair_offsets[:-1])
+    else:
+        point_similarity = np.zeros(0, dtype=np.float32)
+    return answers, overall, point_similarity, segments
@@ -0,0 +1,109 @@
+"""Process-wide semantic model, preloaded when the server starts.
+
+One SentenceTransformer instance is shared by every session in the process.
+preload() starts loading it on a background thread as soon as the app is
+imported, so the first submission doesn't pay for importing torch and the
+weights. Weights are read from SEMANTIC_MODEL_PATH when it exists; a model
+saved there with `python semantic_model.py --export` uses safetensors, which
+are memory-mapped on load instead of copied. EMBEDDING_BACKEND picks the
+runtime (see embedding_backends.py).
+"""
+import argparse
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import (ENABLE_SEMANTIC_EVALUATION, SEMANTIC_MODEL_NAME, SEMANTIC_MODEL_PATH,
+                    EMBEDDING_BACKEND, ONNX_MODEL_PATH, STATIC_MODEL_PATH)
+
+_model = None
+_status = 'not_loaded'  # not_loaded | loading | ready | unavailable
+_error = None
+_source = None
+_load_seconds = None
+_load_lock = threading.Lock()
+_preload_thread: Optional[threading.Thread] = None
+
+def get_model_source() -> str:
+    """Local path if the model has been exported there, else the hub name"""
+    if SEMANTIC_MODEL_PATH and Path(SEMANTIC_MODEL_PATH).is_dir():
+        return SEMANTIC_MODEL_PATH
+    return SEMANTIC_MODEL_NAME
+
+def load_model():
+    """Load the model once per process (thread-safe). Returns None if unavailable."""
+    global _model, _status, _error, _source, _load_seconds
+    if _status in ('ready', 'unavailable'):
+        return _model
+    with _load_lock:
+        if _status in ('ready', 'unavailable'):
+            return _model
+        _status = 'loading'
+        start = time.perf_counter()
+        try:
+            from embedding_backends import load_embedding_backend
+            _source = {'onnx': ONNX_MODEL_PATH, 'static': STATIC_MODEL_PATH}.get(EMBEDDING_BACKEND) or get_model_source()
+            model = load_embedding_backend(EMBEDDING_BACKEND, _source)
+            # Warm-up encode so the first real batch doesn't pay one-off setup costs
+            model.encode(["warm up"], convert_to_numpy=True, show_progress_bar=False)
+            _model = model
+            _status = 'ready'
+        except ImportError as e:
+            _error = f"{e.name or 'sentence-transformers'} not installed"
+            _status = 'unavailable'
+        except Exception as e:
+            _error = str(e)
+            _status = 'unavailable'
+        _load_seconds = time.perf_counter() - start
+        return _model
+
+def preload():
+    """Start loading in the background (idempotent); call at server start"""
+    global _preload_thread
+    if not ENABLE_SEMANTIC_EVALUATION or _status != 'not_loaded':
+        return
+    with _load_lock:
+        if _preload_thread is None:
+            _preload_thread = threading.Thread(target=load_model, name="semantic-model-preload", daemon=True)
+            _preload_thread.start()
+
+def get_model():
+    """The shared model, waiting for an in-flight preload if necessary"""
+    if not ENABLE_SEMANTIC_EVALUATION:
+        return None
+    return load_model()
+
+def is_ready() -> bool:
+    return _status == 'ready'
+
+def model_status() -> Dict[str, Any]:
+    return {
+        'status': _status if ENABLE_SEMANTIC_EVALUATION else 'disabled',
+        'error': _error,
+        'backend': EMBEDDING_BACKEND,
+        'source': _source,
+        'load_seconds': _load_seconds
+    }
+
+def model_id() -> Optional[str]:
+    """Identity of the loaded backend + weights, or None until it is ready"""
+    if _status != 'ready':
+        return None
+    return f"{EMBEDDING_BACKEND}:{_source}"
+
+def export_model(path: str = SEMANTIC_MODEL_PATH):
+    """Download the hub model once and save it locally (safetensors weights)"""
+    from sentence_transformers import SentenceTransformer
+    SentenceTransformer(SEMANTIC_MODEL_NAME, device='cpu').save(path)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local semantic model")
+    parser.add_argument('--export', action='store_true', help=f"Save {SEMANTIC_MODEL_NAME} to SEMANTIC_MODEL_PATH")
+    args = parser.parse_args()
+    if args.export:
+        print(f"Saved to {export_model()}")
+    else:
+        load_model()
+        print(model_status())
@@ -1,9 +1,15 @@
+import hashlib
 import json
 from pathlib import Path
 from datetime import datetime
 
+from answer_keys import publish_answer_keys, clear_answer_keys
+from file_store import file_lock, atomic_write
+
 DATA_FILE = Path("shared_questions.json")
 HISTORY_FILE = Path("student_history.json")
+ASSESSMENTS_DIR = Path("assessments")  # Every published question set, for re-grading history
+SIMILARITY_FLAGS_FILE = Path("similarity_flags.json")  # Near-copy flags, kept out of the history
 
 def save_questions(questions):
     """Teacher saves generated questions"""
@@ -13,6 +19,9 @@ def save_questions(questions):
                 'questions': questions,
                 'timestamp': datetime.now().isoformat()
             }, f)
+        archive_assessment(questions)
+        # Keys are an optimization: evaluation falls back to encoding them itself
+        publish_answer_keys(questions)
         return True
     except:
         return False
@@ -28,27 +37,133 @@ def load_questions():
             pass
     return []
 
+def assessment_id(questions):
+    return hashlib.sha256(json.dumps(questions, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def archive_assessment(questions):
+    """Keep a copy of a question set under its id; results refer to it by id"""
+    archive_id = assessment_id(questions)
+    path = ASSESSMENTS_DIR / f"{archive_id}.json"
+    if not path.exists():
+        try:
+            ASSESSMENTS_DIR.mkdir(exist_ok=True)
+            temp_file = path.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(questions, f)
+            temp_file.replace(path)
+        except OSError:
+            pass
+    return archive_id
+
+def load_assessment(archive_id):
+    """Archived question set, or None if it was never archived"""
+    try:
+        with open(ASSESSMENTS_DIR / f"{archive_id}.json", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _read_history():
+    """History as stored; a file that exists but does not parse raises ValueError"""
+    if not HISTORY_FILE.exists():
+        return []
+    with open(HISTORY_FILE, 'r') as f:
+        try:
+            return json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{HISTORY_FILE} is not valid JSON; refusing to overwrite it") from e
+
+def _update_history(change):
+    """Apply change(history) and save it, under the history lock so concurrent updates are kept"""
+    with file_lock(HISTORY_FILE):
+        history = _read_history()
+        result = change(history)
+        atomic_write(HISTORY_FILE, json.dumps(history))
+    return result
+
 def save_student_result(result):
-    """Save student assessment result"""
-    history = load_student_history()
-    history.append(result)
+    """Save student assessment result; False if its submission_id is already saved (a retried job)"""
+    def change(history):
+        submission_id = result.get('submission_id')
+        if submission_id is not None and any(entry.get('submission_id') == submission_id for entry in history):
+            return False
+        history.append(result)
+        return True
+    return _update_history(change)
+
+def response_score(response):
+    """Score that counts: teacher override, else LLM grade, else the automatic score"""
+    if 'override' in response:
+        return response['override']
+    return response.get('llm_score', response['score'])
+
+def _update_total(entry):
+    entry['total_score'] = sum(response_score(r) for r in entry['responses'])
+    entry['percentage'] = (entry['total_score'] / entry['max_score'] * 100) if entry['max_score'] > 0 else 0
+
+def override_scores(archive_id, question_num, history_indexes, score):
+    """Teacher's score for one question in several submissions; their totals are recomputed"""
+    def change(history):
+        for index in history_indexes:
+            entry = history[index]
+            if entry.get('assessment_id') != archive_id or 'responses' not in entry:
+                continue
+            entry['responses'][question_num - 1]['override'] = score
+            _update_total(entry)
     try:
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(history, f)
-    except:
-        pass
+        _update_history(change)
+        return True
+    except (OSError, ValueError):
+        return False
+
+def record_llm_grades(updates):
+    """Store (history index, question number, score, feedback) grades from llm_grading.py"""
+    if not updates:
+        return
+    def change(history):
+        for index, question_num, score, feedback in updates:
+            entry = history[index]
+            response = entry['responses'][question_num - 1]
+            response['llm_score'] = score
+            response['llm_feedback'] = feedback
+            _update_total(entry)
+    _update_history(change)
+
+def add_similarity_flags(submission_id, username, flags):
+    """Record near-copy flags on a submission and on each submission it resembles"""
+    with file_lock(SIMILARITY_FLAGS_FILE):
+        stored = load_similarity_flags(strict=True)
+        for flag in flags:
+            pairs = [(submission_id, flag), (flag['submission_id'], {**flag, 'submission_id': submission_id,
+                                                                     'username': username})]
+            for owner, record in pairs:
+                existing = stored.setdefault(owner, [])
+                if not any(f['question_num'] == record['question_num']
+                           and f['submission_id'] == record['submission_id'] for f in existing):
+                    existing.append(record)
+        atomic_write(SIMILARITY_FLAGS_FILE, json.dumps(stored))
+
+def load_similarity_flags(strict=False):
+    """Near-copy flags by submission id; strict raises on an unreadable file instead of returning {}"""
+    try:
+        with open(SIMILARITY_FLAGS_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        if strict:
+            raise
+        return {}
 
 def load_student_history():
-    """Load all student results"""
-    if HISTORY_FILE.exists():
-        try:
-            with open(HISTORY_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    return []
+    """Load all student results (for display; writers go through _update_history)"""
+    try:
+        return _read_history()
+    except (OSError, ValueError):
+        return []
 
 def clear_questions():
     """Clear current assessment"""
     if DATA_FILE.exists():
-        DATA_FILE.unlink()
\ No newline at end of file
+        DATA_FILE.unlink()
+    clear_answer_keys()
@@ -0,0 +1,177 @@
+"""Near-copy detection between students' answers with a per-question LSH index.
+
+Comparing every pair of answers is O(n^2) per question. Instead each answer
+vector is hashed with random hyperplanes (COLLUSION_LSH_TABLES tables of
+COLLUSION_LSH_BITS sign bits). Only answers sharing a bucket in some table are
+compared exactly, and pairs at or above COLLUSION_THRESHOLD cosine similarity
+are flagged.
+
+check_submission() runs as a background job after each submission (job kind
+'similarity'). It adds the submission's answers to the index, flags its near
+copies and stores the flags on both history entries. Index rows are
+append-only shards in SIMILARITY_INDEX_DIR/<question digest>/, written before
+querying. Of two concurrent submissions, the later reader therefore always
+sees the other.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from config import COLLUSION_THRESHOLD, COLLUSION_MIN_WORDS, COLLUSION_LSH_BITS, COLLUSION_LSH_TABLES
+from eval_service import embedding_model_id
+
+SIMILARITY_INDEX_DIR = Path("similarity_index")
+LSH_SEED = 20240601  # Same hyperplanes in every process
+MAX_SHARDS = 256  # Shards per question before they are merged into one
+
+_indexes: Dict[str, Dict[str, Any]] = {}  # question digest -> {'model', 'shards', 'seen', 'index'}
+_lock = threading.Lock()
+
+class LSHIndex:
+    """Random-hyperplane LSH over normalized vectors, with exact re-ranking of candidates"""
+
+    def __init__(self, dim: int, bits: int = COLLUSION_LSH_BITS, tables: int = COLLUSION_LSH_TABLES,
+                 seed: int = LSH_SEED):
+        self.bits = bits
+        self.tables = tables
+        self.planes = np.random.default_rng(seed).standard_normal((tables * bits, dim)).astype(np.float32)
+        self.powers = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(tables)]
+        self.ids: List[Any] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:len(self.ids)]
+
+    def codes(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, tables) bucket code of each vector in each table"""
+        signs = (vectors @ self.planes.T > 0).reshape(len(vectors), self.tables, self.bits)
+        return signs.astype(np.int64) @ self.powers
+
+    def add(self, vectors: np.ndarray, ids: Sequence[Any]):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        start = len(self.ids)
+        if start + len(ids) > len(self._vectors):
+            grown = np.zeros((max(2 * len(self._vectors), start + len(ids), 64), self._vectors.shape[1]),
+                             dtype=np.float32)
+            grown[:start] = self._vectors[:start]
+            self._vectors = grown
+        self._vectors[start:start + len(ids)] = vectors
+        self.ids.extend(ids)
+        for offset, codes in enumerate(self.codes(vectors)):
+            for table, code in enumerate(codes):
+                self.buckets[table].setdefault(int(code), []).append(start + offset)
+
+    def candidates(self, vector: np.ndarray) -> np.ndarray:
+        rows = set()
+        for table, code in enumerate(self.codes(vector[None, :])[0]):
+            rows.update(self.buckets[table].get(int(code), ()))
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    def query(self, vector: np.ndarray, threshold: float = COLLUSION_THRESHOLD) -> List[Tuple[Any, float]]:
+        """(id, similarity) of indexed vectors at least threshold-similar, most similar first"""
+        vector = np.asarray(vector, dtype=np.float32)
+        rows = self.candidates(vector)
+        if not len(rows):
+            return []
+        # Shards store float16, so an identical answer can come out a hair above 1
+        similarities = np.minimum(self._vectors[rows] @ vector, 1.0)
+        hits = np.flatnonzero(similarities >= threshold)
+        hits = hits[np.argsort(-similarities[hits])]
+        return [(self.ids[rows[i]], float(similarities[i])) for i in hits]
+
+def _question_dir(question_digest: str) -> Path:
+    return SIMILARITY_INDEX_DIR / question_digest
+
+def _write_shard(question_digest: str, rows: List[Dict[str, Any]], vectors: np.ndarray):
+    directory = _question_dir(question_digest)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+    temp_file = directory / f"{name}.tmp.npz"
+    np.savez(temp_file, vectors=vectors.astype(np.float16),
+             meta=np.array(json.dumps({'embedding_model': embedding_model_id(), 'rows': rows})))
+    temp_file.replace(directory / f"{name}.npz")
+
+def load_index(question_digest: str, dim: int) -> LSHIndex:
+    """The question's index with every shard written so far (by any process) added"""
+    directory = _question_dir(question_digest)
+    shards = sorted(shard for shard in directory.glob('*.npz') if not shard.name.endswith('.tmp.npz')) \
+        if directory.is_dir() else []
+    current_model = embedding_model_id()
+    with _lock:
+        state = _indexes.get(question_digest)
+        if state is None or state['model'] != current_model:
+            state = {'model': current_model, 'shards': set(), 'seen': set(), 'index': LSHIndex(dim)}
+            _indexes[question_digest] = state
+        for shard in shards:
+            if shard.name in state['shards']:
+                continue
+            try:
+                with np.load(shard) as data:
+                    meta = json.loads(str(data['meta']))
+                    vectors = data['vectors'].astype(np.float32)
+            except (OSError, ValueError, KeyError):
+                continue
+            state['shards'].add(shard.name)
+            # Compacted shards repeat rows this process may already have
+            new = [i for i, row in enumerate(meta['rows']) if row['submission_id'] not in state['seen']]
+            if meta['embedding_model'] == current_model and new:
+                state['index'].add(vectors[new], [meta['rows'][i] for i in new])
+                state['seen'].update(meta['rows'][i]['submission_id'] for i in new)
+        index = state['index']
+        if len(shards) > MAX_SHARDS and len(index):
+            _compact(question_digest, [shard for shard in shards if shard.name in state['shards']], index)
+        return index
+
+def _compact(question_digest: str, shards: List[Path], index: LSHIndex):
+    """Replace the per-submission shards with one holding every row"""
+    try:
+        _write_shard(question_digest, list(index.ids), index.vectors())
+        for shard in shards:
+            shard.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+def check_submission(submission_id: str) -> Dict[str, Any]:
+    """Index one submission's descriptive answers and store flags for its near copies"""
+    from answer_keys import get_question_kind, question_digest
+    from answer_clusters import answer_vectors
+    from shared_state import load_student_history, load_assessment, add_similarity_flags
+
+    entry = next((h for h in load_student_history() if h.get('submission_id') == submission_id), None)
+    if entry is None or 'responses' not in entry:
+        return {'flags': 0}
+    questions = load_assessment(entry['assessment_id']) or []
+    flags = []
+    for num, (question, response) in enumerate(zip(questions, entry['responses']), 1):
+        answer = response['answer']
+        # Short answers to the same question are alike anyway
+        if get_question_kind(question) != 'descriptive' or len(answer.split()) < COLLUSION_MIN_WORDS:
+            continue
+        vectors = answer_vectors(question, [answer])
+        if vectors is None:
+            break
+        digest = question_digest(question)
+        _write_shard(digest, [{'submission_id': submission_id, 'username': entry.get('username')}], vectors)
+        for other, similarity in load_index(digest, vectors.shape[1]).query(vectors[0]):
+            if other['submission_id'] != submission_id and other['username'] != entry.get('username'):
+                flags.append({'question_num': num, 'submission_id': other['submission_id'],
+                              'username': other['username'], 'similarity': round(similarity, 4)})
+    if flags:
+        add_similarity_flags(submission_id, entry.get('username'), flags)
+    return {'flags': len(flags)}
+
+def clear_similarity_index():
+    with _lock:
+        _indexes.clear()
+    if SIMILARITY_INDEX_DIR.is_dir():
+        for shard in SIMILARITY_INDEX_DIR.glob('*/*.npz'):
+            shard.unlink(missing_ok=True)
@@ -0,0 +1,54 @@
+"""Grading and recording of one student submission.
+
+run_submission() grades the answers (publishing partial results as it goes),
+stores the result in the student history and queues the follow-up checks. The
+app runs it as an 'evaluate' background job, so MCQ/diagram results show at
+once and descriptive ones as each step finishes, and a rerun or page reload
+picks the job up again. With ENABLE_BACKGROUND_EVALUATION off it runs in the
+request thread.
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import API_avai, ENABLE_COLLUSION_CHECK, ENABLE_LLM_GRADING
+from evaluate import evaluate_progressively, calculate_total_score
+from job_queue import submit_job, list_jobs
+from shared_state import save_student_result, archive_assessment
+
+def record_submission(submission_id: str, username: str, questions: List[Dict[str, Any]],
+                      results: List[Dict[str, Any]], timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """Save a graded submission to the history and queue its follow-up jobs"""
+    score_summary = calculate_total_score(results)
+    saved = save_student_result({
+        'submission_id': submission_id,
+        'username': username,
+        'timestamp': timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'total_score': score_summary['total_score'],
+        'max_score': score_summary['max_score'],
+        'percentage': score_summary['percentage'],
+        'num_questions': len(questions),
+        # Enough to re-grade later (regrade.py) when scoring settings change
+        'assessment_id': archive_assessment(questions),
+        'responses': [
+            {'answer': r['student_answer'], 'score': r['evaluation']['score']}
+            for r in results
+        ]
+    })
+    # A retried job finds its entry already saved; queue the check only if the first attempt didn't
+    if ENABLE_COLLUSION_CHECK and (saved or not any(job['params'].get('submission_id') == submission_id
+                                                    for job in list_jobs(kind='similarity'))):
+        # Near-copy check against other students, off the request thread
+        submit_job('similarity', {'submission_id': submission_id}, username)
+    if ENABLE_LLM_GRADING and API_avai and not any(job['status'] == 'queued' for job in list_jobs(kind='llm_grade')):
+        # Waits until enough answers are pending to fill a request (LLM_GRADING_MIN_PENDING)
+        submit_job('llm_grade', {})
+    return score_summary
+
+def run_submission(submission_id: str, username: str, questions: List[Dict[str, Any]],
+                   student_answers: Dict[int, Any], publish: Optional[Callable] = None,
+                   known: Optional[Dict[int, Dict[str, Any]]] = None,
+                   timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """Grade, record and return the results shown to the student"""
+    results, timings = evaluate_progressively(questions, student_answers, publish, known)
+    score_summary = record_submission(submission_id, username, questions, results, timestamp)
+    return {'results': results, 'submission_id': submission_id, 'timings': timings, **score_summary}
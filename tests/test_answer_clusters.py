@@ -0,0 +1,38 @@
+import numpy as np
+
+import answer_clusters
+import shared_state
+from answer_clusters import question_clusters
+
+QUESTION = {'question': "Explain evaporation.", 'model_answer': "Water turns into vapour.",
+            'key_points': ["water turns into vapour"], 'marks': 5, 'type': 'SA'}
+VECTORS = {"water turns to vapour": [1.0, 0.0], "water becomes vapour": [0.99, 0.14], "ice melts": [0.0, 1.0]}
+
+def submit(answers):
+    archive_id = shared_state.archive_assessment([QUESTION])
+    for answer in answers:
+        shared_state.save_student_result({'assessment_id': archive_id, 'total_score': 1, 'max_score': 5,
+                                          'percentage': 20, 'responses': [{'answer': answer, 'score': 1}]})
+    return archive_id
+
+def test_clusters_are_reused_until_the_answers_change(monkeypatch):
+    encoded = []
+
+    def fake_vectors(question, answers):
+        encoded.append(list(answers))
+        vectors = np.array([VECTORS[answer] for answer in answers], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    monkeypatch.setattr(answer_clusters, 'answer_vectors', fake_vectors)
+    monkeypatch.setattr(answer_clusters, 'embedding_model_id', lambda: "fake")
+    archive_id = submit(["water turns to vapour", "water becomes vapour", "ice melts"])
+
+    first = question_clusters(archive_id, 1, shared_state.load_student_history())
+    assert sorted(c['size'] for c in first) == [1, 2]
+    assert question_clusters(archive_id, 1, shared_state.load_student_history()) == first
+    assert len(encoded) == 1
+
+    submit(["ice melts"])
+    again = question_clusters(archive_id, 1, shared_state.load_student_history())
+    assert sorted(c['size'] for c in again) == [2, 2]
+    assert len(encoded) == 2
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('onnxruntime')
+pytest.importorskip('sentence_transformers')
+torch = pytest.importorskip('torch')
+
+from config import SEMANTIC_SIMILARITY_THRESHOLD
+from embedding_backends import OnnxEmbeddingBackend, export_onnx, normalize_rows
+
+WORDS = ("photosynthesis converts light energy into chemical energy friction opposes the motion of objects "
+         "the heart pumps blood to all parts of the body evaporation absorbs heat from the surroundings "
+         "an acid reacts with bases to form salt and water sound moves through a medium").split()
+
+def sample_texts(count, seed, min_words=3, max_words=20):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, rng.integers(min_words, max_words + 1))) for _ in range(count)]
+
+@pytest.fixture(scope='module')
+def tiny_model(tmp_path_factory):
+    """A randomly initialised two-layer BERT with a vocabulary covering the sample answers"""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    root = tmp_path_factory.mktemp('tiny')
+    words = sorted(set(WORDS))
+    vocab = root / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "."] + words) + "\n")
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(words) + 6, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64, max_position_embeddings=128)
+    BertModel(config).save_pretrained(root / "hf")
+    BertTokenizerFast(vocab_file=str(vocab)).save_pretrained(root / "hf")
+    transformer = models.Transformer(str(root / "hf"), max_seq_length=128)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode='mean')
+    SentenceTransformer(modules=[transformer, pooling, models.Normalize()], device='cpu').save(str(root / "st"))
+    export_onnx(str(root / "st"), str(root / "onnx"))
+    return root
+
+def similarities(model, answers, key_points):
+    answer_embs = normalize_rows(np.asarray(model.encode(answers, convert_to_numpy=True), dtype=np.float32))
+    key_embs = normalize_rows(np.asarray(model.encode(key_points, convert_to_numpy=True), dtype=np.float32))
+    return answer_embs @ key_embs.T
+
+@pytest.mark.parametrize('quantized, min_agreement', [(False, 1.0), (True, 0.97)])
+def test_onnx_grades_the_same_side_of_the_threshold_as_torch(tiny_model, quantized, min_agreement):
+    from sentence_transformers import SentenceTransformer
+
+    answers = sample_texts(64, seed=1)
+    key_points = sample_texts(16, seed=2, max_words=6)
+    reference = similarities(SentenceTransformer(str(tiny_model / "st"), device='cpu'), answers, key_points)
+    onnx = similarities(OnnxEmbeddingBackend(str(tiny_model / "onnx"), quantized=quantized), answers, key_points)
+
+    # A random tiny model's similarities cluster high, so also cut at their median: half the pairs each side
+    for threshold in (SEMANTIC_SIMILARITY_THRESHOLD, float(np.median(reference))):
+        # Pairs this close to the threshold may legitimately flip under float rounding
+        clear = np.abs(reference - threshold) > (1e-4 if not quantized else 0)
+        agreement = ((reference >= threshold) == (onnx >= threshold))[clear]
+        assert agreement.mean() >= min_agreement, threshold
@@ -0,0 +1,24 @@
+import pytest
+
+import eval_metrics
+import evaluate
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    monkeypatch.setattr(eval_metrics, '_enabled', True)
+    monkeypatch.setattr(eval_metrics, '_series', {})
+
+def test_mixed_batches_split_time_by_rows():
+    eval_metrics.record('encode', 0.4, kind={'SA': 3, 'LA': 1}, batch=4)
+    stage = eval_metrics.snapshot()['stages']['encode']
+    assert stage['all']['mean_ms'] == 400
+    assert stage['by_kind']['SA']['mean_ms'] == 300 and stage['by_kind']['LA']['mean_ms'] == 100
+
+def test_descriptive_spans_are_labelled_with_the_question_type(monkeypatch):
+    monkeypatch.setattr(evaluate, 'ENABLE_SEMANTIC_EVALUATION', False)
+    questions = [{'question': "Define friction.", 'key_points': ["friction opposes motion"], 'marks': 1,
+                  'type': 'VSA'},
+                 {'question': "Explain evaporation.", 'key_points': ["water turns into vapour"], 'marks': 5,
+                  'question_type': 'LA'}]
+    evaluate.evaluate_uncached([(q, "friction opposes motion of water vapour") for q in questions])
+    assert set(eval_metrics.snapshot()['stages']['keyword']['by_kind']) == {'VSA', 'LA'}
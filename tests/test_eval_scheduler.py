@@ -0,0 +1,61 @@
+import threading
+import time
+
+import numpy as np
+
+import eval_scheduler
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        return np.array([[len(text), 1.0] for text in texts])
+
+def batcher_threads():
+    return [t for t in threading.enumerate() if t.name == "eval-batcher"]
+
+def test_reconfiguring_stops_the_previous_batcher():
+    eval_scheduler.configure(enabled=True)
+    for window_ms in range(10):
+        assert eval_scheduler.encode_answers(FakeModel(), ["ab", "c"]).tolist() == [[2, 1], [1, 1]]
+        eval_scheduler.configure(window_ms=window_ms)
+    assert len(batcher_threads()) <= 1
+
+def test_closed_batcher_still_encodes_for_late_callers():
+    batcher = eval_scheduler.MicroBatcher()
+    batcher.close()
+    assert not batcher._thread.is_alive()
+    assert batcher.encode(FakeModel(), ["abc"]).tolist() == [[3, 1]]
+
+def test_concurrent_callers_share_encode_calls_and_get_their_own_rows():
+    class SlowModel:
+        """Encodes text i of the vocabulary as [i, i]; slow enough for submissions to pile up"""
+        calls = 0
+
+        def encode(self, texts, **kwargs):
+            SlowModel.calls += 1
+            time.sleep(0.05)
+            return np.array([[vocabulary.index(text)] * 2 for text in texts], dtype=np.float32)
+
+    callers = 8
+    requests = [[f"answer {caller}-{row}" for row in range(3)] + ["shared answer"] for caller in range(callers)]
+    vocabulary = sorted({text for texts in requests for text in texts})
+    model = SlowModel()  # The process-wide model every session shares
+    batcher = eval_scheduler.MicroBatcher(window_ms=100, max_batch=1000)
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def caller(index):
+        barrier.wait()
+        results[index] = batcher.encode(model, requests[index])
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert SlowModel.calls < callers
+    for texts, rows in zip(requests, results):
+        assert rows.tolist() == [[vocabulary.index(text)] * 2 for text in texts]
+    # The answer every caller sent was encoded once per batch, not once per caller
+    assert batcher.stats()['encoded'] < sum(len(texts) for texts in requests)
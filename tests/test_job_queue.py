@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import job_queue
+from job_queue import get_job, run_job, submit_job, claim_next_job
+
+def make_stale(job_id):
+    lock = job_queue._lock_file(job_id)
+    lock.touch()
+    old = time.time() - job_queue.JOB_TIMEOUT_SECONDS - 1
+    os.utime(lock, (old, old))
+
+def test_stale_lock_is_reclaimed_by_one_worker():
+    job_id = submit_job('noop', {})
+    make_stale(job_id)
+    barrier = threading.Barrier(8)
+    wins = []
+
+    def claim():
+        barrier.wait()
+        if job_queue._try_claim(job_id):
+            wins.append(threading.get_ident())
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(wins) == 1
+    assert not job_queue._try_claim(job_id)
+
+def test_running_job_keeps_its_lock_fresh(monkeypatch):
+    monkeypatch.setattr(job_queue, 'JOB_HEARTBEAT_SECONDS', 0.05)
+    monkeypatch.setattr(job_queue, 'JOB_TIMEOUT_SECONDS', 0.3)
+    reclaimed = []
+
+    def slow_handler(job):
+        # Longer than the timeout: without heartbeats another worker would take the job over
+        deadline = time.time() + 1.0
+        while time.time() < deadline:
+            reclaimed.append(job_queue._try_claim(job['id']))
+            time.sleep(0.1)
+        return 'ok'
+
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, 'slow', slow_handler)
+    submit_job('slow', {})
+    run_job(claim_next_job('test'))
+    assert reclaimed and not any(reclaimed)
+
+def test_claims_skip_finished_jobs_and_rebuild_the_index(monkeypatch):
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, 'noop', lambda job: 'ok')
+    first = submit_job('noop', {})
+    run_job(claim_next_job('test'))
+    assert get_job(first)['status'] == 'done'
+    assert not job_queue._pending_file(first).exists()
+
+    second = submit_job('noop', {})
+    for marker in job_queue.PENDING_DIR.iterdir():
+        marker.unlink()
+    job_queue.PENDING_DIR.rmdir()
+    assert claim_next_job('test')['id'] == second
+    assert claim_next_job('test') is None
+
+def test_workers_delete_old_finished_jobs(monkeypatch):
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, 'noop', lambda job: 'ok')
+    monkeypatch.setattr(job_queue, '_last_cleanup', 0.0)
+    old = submit_job('noop', {})
+    run_job(claim_next_job('test'))
+    job_queue.update_job(old, finished=time.time() - job_queue.JOB_RETENTION_HOURS * 3600 - 1)
+    recent = submit_job('noop', {})
+
+    job_queue._maybe_cleanup()
+    assert get_job(old) is None
+    assert get_job(recent) is not None
+    assert [job['id'] for job in job_queue.list_jobs()] == [recent]
+
+def test_paper_job_publishes_progress_and_the_paper(monkeypatch):
+    import paper_builder
+    import shared_state
+
+    progress = []
+    real_update = job_queue.update_job
+
+    def recording_update(job_id, **fields):
+        if 'progress' in fields:
+            progress.append(fields['progress'])
+        return real_update(job_id, **fields)
+
+    monkeypatch.setattr(job_queue, 'update_job', recording_update)
+    monkeypatch.setattr(paper_builder, 'default_backend',
+                        lambda content, info, images=None: [{'question': f"{info['question_type']} {i}"}
+                                                            for i in range(info['num_questions'])])
+    base_info = {'board': 'CBSE', 'class': 10, 'subject': 'Physics', 'chapter': 'Electricity', 'bloom_level': 'Apply'}
+    job_id = submit_job('paper', {'content': None, 'base_info': base_info, 'publish': True}, 'teacher')
+    run_job(claim_next_job('test'))
+
+    job = get_job(job_id)
+    assert job['status'] == 'done', job['error']
+    assert job['result']['published'] and not job['result']['missing']
+    assert shared_state.load_questions() == job['result']['questions']
+    assert progress[-1]['done'] == progress[-1]['total'] > 0
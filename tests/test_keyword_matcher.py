@@ -0,0 +1,29 @@
+import answer_keys
+import evaluate
+import keyword_matcher
+
+DIAGRAM = {'question': "Label the parts.", 'labels': {'1': "Cell membrane", '2': "Nucleus"}, 'marks': 2}
+LONG_ANSWER = {'question': "Explain the water cycle.", 'model_answer': "Water evaporates and condenses.",
+               'key_points': ["Water evaporates from oceans", "Vapour condenses into clouds"], 'marks': 4}
+
+def publish_with_keywords(monkeypatch, question, **fields):
+    """Publish keys for `question` with some compiled keyword sets replaced"""
+    monkeypatch.setattr(keyword_matcher, '_matchers', keyword_matcher.OrderedDict())
+    compiled = answer_keys.compile_answer_keys([question])
+    compiled['entries'][0].update(fields)
+    answer_keys.save_answer_keys(compiled)
+
+def test_diagram_grading_uses_the_compiled_label_keywords(monkeypatch):
+    answer = {'1': "cytoplasm", '2': "nucleus"}
+    publish_with_keywords(monkeypatch, DIAGRAM)
+    assert evaluate.evaluate_diagram_labeling(DIAGRAM, answer)['score'] == 1
+    publish_with_keywords(monkeypatch, DIAGRAM, label_keywords={'1': ["cytoplasm"], '2': ["nucleus"]})
+    assert evaluate.evaluate_diagram_labeling(DIAGRAM, answer)['score'] == 2
+
+def test_keyword_grading_uses_the_compiled_key_point_keywords(monkeypatch):
+    answer = "Evaporation happens over seas, then condensation forms clouds."
+    publish_with_keywords(monkeypatch, LONG_ANSWER)
+    before = evaluate.evaluate_keyword_based(LONG_ANSWER, answer, LONG_ANSWER['key_points'], 4, 9)
+    publish_with_keywords(monkeypatch, LONG_ANSWER, keywords=[["evaporation", "seas"], ["condensation", "clouds"]])
+    after = evaluate.evaluate_keyword_based(LONG_ANSWER, answer, LONG_ANSWER['key_points'], 4, 9)
+    assert before['matched_points'] != after['matched_points'] == LONG_ANSWER['key_points']
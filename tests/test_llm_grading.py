@@ -0,0 +1,34 @@
+import shared_state
+from llm_grading import parse_grades, run_llm_grading
+from rate_limit import DailyQuota
+
+def test_truncated_reply_with_brackets_in_feedback_keeps_complete_grades():
+    reply = ('```json\n[{"id": 1, "score": 3.5, "feedback": "mentions [a] and {b}"},\n'
+             ' {"id": 2, "score": 2, "feedback": "line one\nline two"},\n'
+             ' {"id": 3, "score": 4, "feedback": "cut off here {c')
+    assert parse_grades(reply, 3, 5) == {1: (3.5, "mentions [a] and {b}"), 2: (2.0, "line one\nline two")}
+
+def test_scores_are_clamped_and_rounded_and_unknown_ids_dropped():
+    reply = '[{"id": 1, "score": 7}, {"id": 2, "score": 1.3}, {"id": 9, "score": 1}, {"id": "x", "score": 1}]'
+    assert parse_grades(reply, 2, 5) == {1: (5, ""), 2: (1.5, "")}
+
+def test_grading_stops_when_the_daily_quota_is_spent():
+    question = {'question': "Explain evaporation.", 'model_answer': "Water turns into vapour.",
+                'key_points': ["water turns into vapour"], 'marks': 5, 'type': 'LA'}
+    archive_id = shared_state.archive_assessment([question])
+    for answer in ["water turns to vapour when heated", "ice melts into water slowly"]:
+        shared_state.save_student_result({'assessment_id': archive_id, 'total_score': 1, 'max_score': 5,
+                                          'percentage': 20, 'responses': [{'answer': answer, 'score': 1}]})
+
+    class Backend:
+        calls = 0
+
+        def generate_content(self, contents, **kwargs):
+            Backend.calls += 1
+            return '[{"id": 1, "score": 4, "feedback": "good"}]'
+
+    quota = DailyQuota(limit=1)
+    assert quota.try_consume()
+    stats = run_llm_grading(1, backend=Backend(), quota=quota)
+    assert stats.get('quota_exhausted') and Backend.calls == 0
+    assert DailyQuota(limit=2).try_consume() and quota.used() == 2
@@ -0,0 +1,86 @@
+import pytest
+from google.api_core import exceptions
+
+from model_pool import KeyQuota, ModelPool, PoolMember, get_error_status
+
+class FakeBackend:
+    """Local stand-in for a Gemini model: returns its name or raises the queued errors"""
+
+    def __init__(self, name, errors=()):
+        self.name = name
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate_content(self, contents, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"{self.name}: {contents}"
+
+def pool(*backends, quotas=None):
+    return ModelPool([PoolMember(b.name, b, quota=(quotas or {}).get(b.name)) for b in backends])
+
+def test_fails_over_on_rate_limit_and_cools_the_member_down():
+    first, second = FakeBackend('a', [exceptions.ResourceExhausted('quota')]), FakeBackend('b')
+    model = pool(first, second)
+    assert model.generate_content("hi") == "b: hi"
+    stats = {s['name']: s for s in model.stats()}
+    assert stats['a']['cooling_down'] and stats['a']['failures'] == 1
+    # While 'a' cools down, requests go straight to 'b'
+    assert model.generate_content("again") == "b: again"
+    assert first.calls == 1 and second.calls == 2
+
+def test_fails_over_on_server_errors():
+    model = pool(FakeBackend('a', [exceptions.ServiceUnavailable('down')]),
+                 FakeBackend('b', [exceptions.InternalServerError('oops')]), FakeBackend('c'))
+    assert model.generate_content("hi") == "c: hi"
+
+def test_client_errors_are_not_retried_on_other_members():
+    first, second = FakeBackend('a', [exceptions.InvalidArgument('bad request about 429 and 500 marks')]), FakeBackend('b')
+    with pytest.raises(exceptions.InvalidArgument):
+        pool(first, second).generate_content("hi")
+    assert second.calls == 0
+
+def test_raises_the_last_error_when_every_member_fails():
+    model = pool(FakeBackend('a', [exceptions.ResourceExhausted('a')]), FakeBackend('b', [exceptions.ServiceUnavailable('b')]))
+    with pytest.raises(exceptions.ServiceUnavailable):
+        model.generate_content("hi")
+
+def test_members_out_of_daily_quota_are_skipped():
+    spent = KeyQuota(1)
+    spent.consume()
+    first, second = FakeBackend('a'), FakeBackend('b')
+    assert pool(first, second, quotas={'a': spent}).generate_content("hi") == "b: hi"
+    assert first.calls == 0
+    with pytest.raises(RuntimeError):
+        pool(FakeBackend('c'), quotas={'c': spent}).generate_content("hi")
+
+class StatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+def test_error_status_comes_from_the_code_not_the_message():
+    assert get_error_status(exceptions.ResourceExhausted('x')) == 429
+    assert get_error_status(exceptions.GatewayTimeout('x')) == 504
+    assert get_error_status(StatusError('ok', 502)) == 502
+    assert get_error_status(TimeoutError()) == 503
+    assert get_error_status(ValueError('expected 500 words, got 429')) is None
+
+def test_gemini_backend_builds_requests_for_its_own_client():
+    from google.generativeai import protos
+    from model_pool import GeminiKeyBackend
+
+    class FakeClient:
+        def generate_content(self, request, **kwargs):
+            self.request = request
+            return protos.GenerateContentResponse(candidates=[protos.Candidate(
+                content=protos.Content(parts=[protos.Part(text="[]")], role='model'), finish_reason=1)])
+
+    client = FakeClient()
+    backend = GeminiKeyBackend("key", "gemini-1.5-flash", client=client)
+    response = backend.generate_content(["prompt"], generation_config={'temperature': 0.3})
+    assert response.text == "[]"
+    assert client.request.model == "models/gemini-1.5-flash"
+    assert client.request.contents[0].role == 'user'
+    assert client.request.generation_config.temperature == pytest.approx(0.3)
@@ -0,0 +1,30 @@
+import threading
+
+from paper_builder import expand_pattern
+from question_generator import make_cache_key
+from rate_limit import DailyQuota, RateLimiter
+
+BASE_INFO = {'board': 'CBSE', 'class': 10, 'subject': 'Physics', 'chapter': 'Electricity', 'bloom_level': 'Apply'}
+
+def test_only_split_sections_get_a_part():
+    tasks = expand_pattern({'MCQ': {'count': 20, 'marks': 1}, 'LA': {'count': 3, 'marks': 5}}, BASE_INFO)['tasks']
+    assert [(t['question_type'], t.get('part')) for t in tasks] == [('MCQ', None), ('MCQ', 1), ('LA', None)]
+    # A single-call section shares the key written by interactive generation and prewarm
+    interactive = {**BASE_INFO, 'question_type': 'LA', 'num_questions': 3}
+    assert make_cache_key("content", tasks[2]) == make_cache_key("content", interactive)
+
+def test_concurrent_limiters_never_overspend_a_shared_quota():
+    quota = DailyQuota(limit=5)
+    limiters = [RateLimiter(0, burst=10, quota=quota) for _ in range(2)]
+    granted = []
+
+    def drain(limiter):
+        while limiter.acquire():
+            granted.append(1)
+
+    threads = [threading.Thread(target=drain, args=(limiter,)) for limiter in limiters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(granted) == 5 and quota.remaining() == 0
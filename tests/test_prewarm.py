@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import prewarm
+import question_bank
+import rate_limit
+from prewarm import build_tasks, demo_backend, load_checkpoint, run_prewarm, task_key
+from rate_limit import DailyQuota, RateLimiter
+
+class FakeClock:
+    """Stands in for the time module in rate_limit: sleeping advances the clock instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def tasks(workdir, monkeypatch):
+    monkeypatch.setattr(question_bank, 'BANK_FILE', workdir / "question_bank.json")
+    # generate_demo waits a second per call to look like an API call
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    return build_tasks(classes=[9], subjects=["Physics"], question_types=["MCQ", "SA"],
+                       bloom_levels=["Remember", "Apply"], num_questions=2)[:6]
+
+def test_interrupted_run_resumes(tasks, workdir):
+    checkpoint_file = workdir / "checkpoint.json"
+    calls = []
+
+    def interrupted_backend(content, info):
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        calls.append(task_key(info))
+        return demo_backend(content, info)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_prewarm(tasks, interrupted_backend, checkpoint_file=checkpoint_file, progress=lambda message: None)
+    assert load_checkpoint(checkpoint_file)['done'] == calls
+
+    resumed = []
+
+    def backend(content, info):
+        resumed.append(task_key(info))
+        return demo_backend(content, info)
+
+    stats = run_prewarm(tasks, backend, checkpoint_file=checkpoint_file, progress=lambda message: None)
+    assert stats == {'generated': 3, 'cached': 0, 'skipped': 3, 'failed': 0}
+    assert resumed == [task_key(info) for info in tasks[3:]]
+    assert sorted(load_checkpoint(checkpoint_file)['done']) == sorted(task_key(info) for info in tasks)
+
+def test_request_budget_stops_and_resumes(tasks, workdir):
+    checkpoint_file = workdir / "checkpoint.json"
+    first = run_prewarm(tasks, demo_backend, RateLimiter(0, max_requests=2), checkpoint_file,
+                        progress=lambda message: None)
+    assert first['generated'] == 2
+    second = run_prewarm(tasks, demo_backend, RateLimiter(0), checkpoint_file, progress=lambda message: None)
+    assert second == {'generated': 4, 'cached': 0, 'skipped': 2, 'failed': 0}
+
+def test_shared_daily_quota_stops_the_run(tasks, workdir):
+    quota = DailyQuota(limit=3)
+    assert quota.try_consume()  # Spent elsewhere, e.g. by a paper build
+    stats = run_prewarm(tasks, demo_backend, RateLimiter(0, quota=quota), workdir / "checkpoint.json",
+                        progress=lambda message: None)
+    assert stats['generated'] == 2 and quota.remaining() == 0
+
+def test_requests_per_minute_limit(tasks, workdir, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    calls = []
+
+    def backend(content, info):
+        calls.append(clock.now)
+        return demo_backend(content, info)
+
+    requests_per_minute = 4
+    stats = run_prewarm(tasks, backend, RateLimiter(requests_per_minute), workdir / "checkpoint.json",
+                        progress=lambda message: None)
+    assert stats['generated'] == len(tasks) == len(calls)
+    for start in calls:
+        assert sum(1 for t in calls if start <= t < start + 60) <= requests_per_minute
+    assert all(later - earlier >= 60 / requests_per_minute - 1e-9 for earlier, later in zip(calls, calls[1:]))
+
+def test_demo_questions_reach_the_bank(tasks):
+    run_prewarm(tasks[:1], demo_backend, checkpoint_file=prewarm.DEMO_CHECKPOINT_FILE, progress=lambda message: None)
+    assert question_bank.count_bank_questions(tasks[0]) == tasks[0]['num_questions']
@@ -0,0 +1,47 @@
+import json
+import pickle
+import time
+
+import pytest
+
+import question_bank
+import question_generator
+from question_generator import get_cached_questions, load_cache, save_cache
+
+@pytest.fixture(autouse=True)
+def cache_file(workdir, monkeypatch):
+    monkeypatch.setattr(question_generator, 'CACHE_FILE', workdir / "question_cache.pkl")
+    monkeypatch.setattr(question_generator, '_cache_data', None)
+    monkeypatch.setattr(question_bank, 'BANK_FILE', workdir / "question_bank.json")
+    monkeypatch.setattr(question_bank, '_bank_data', None)
+    return workdir / "question_cache.pkl"
+
+def write_from_other_process(path, entries):
+    with open(path, 'wb') as f:
+        pickle.dump(entries, f)
+
+def test_entries_saved_by_another_process_are_seen_and_kept(cache_file):
+    save_cache({'app': ([{'question': 'a'}], time.time())})
+    stored = pickle.loads(cache_file.read_bytes())
+    write_from_other_process(cache_file, {**stored, 'prewarm': ([{'question': 'b'}], time.time())})
+
+    assert get_cached_questions('prewarm') == [{'question': 'b'}]
+    save_cache({'app2': ([{'question': 'c'}], time.time())})
+    assert set(pickle.loads(cache_file.read_bytes())) == {'app', 'prewarm', 'app2'}
+    assert set(load_cache()) == {'app', 'prewarm', 'app2'}
+
+def test_cached_questions_are_copies():
+    save_cache({'key': ([{'question': 'a', 'marks': 1}], time.time())})
+    get_cached_questions('key')[0]['marks'] = 5
+    assert get_cached_questions('key')[0]['marks'] == 1
+
+def test_bank_keeps_questions_added_by_another_process():
+    info = {'board': 'CBSE', 'class': 9, 'subject': 'Physics', 'chapter': 'Motion',
+            'question_type': 'MCQ', 'bloom_level': 'Remember'}
+    question_bank.add_bank_questions(info, [{'question': 'one'}])
+    other = json.loads(question_bank.BANK_FILE.read_text())
+    other[question_bank.get_slot_key(info)]['questions'].append({'question': 'two'})
+    question_bank.BANK_FILE.write_text(json.dumps(other))
+
+    question_bank.add_bank_questions(info, [{'question': 'three'}])
+    assert [q['question'] for q in question_bank.get_bank_questions(info, 10)] == ['one', 'two', 'three']
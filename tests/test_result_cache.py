@@ -0,0 +1,8 @@
+from result_cache import answer_digest
+
+def test_inner_whitespace_changes_the_key():
+    # "ab  cd   ef" passes the too-short check; "ab cd ef" does not
+    assert answer_digest("ab  cd   ef") != answer_digest("ab cd ef")
+
+def test_surrounding_whitespace_does_not():
+    assert answer_digest("  Friction opposes motion.\n") == answer_digest("Friction opposes motion.")
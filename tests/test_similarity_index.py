@@ -0,0 +1,16 @@
+import numpy as np
+
+from similarity_index import LSHIndex
+
+def test_identical_float16_vectors_are_at_most_1_similar():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = LSHIndex(32)
+    # As loaded from a shard
+    index.add(vectors.astype(np.float16), list(range(50)))
+    stored = vectors.astype(np.float16).astype(np.float32)
+    assert (np.einsum('ij,ij->i', stored, stored) > 1).any()
+    top = [index.query(vector)[0] for vector in stored]
+    assert [i for i, _ in top] == list(range(50))
+    assert max(similarity for _, similarity in top) == 1.0
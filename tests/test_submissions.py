@@ -0,0 +1,13 @@
+import shared_state
+import submissions
+from job_queue import list_jobs
+
+QUESTIONS = [{'question': "2 + 2?", 'options': {'A': "3", 'B': "4"}, 'correct_answer': "B", 'marks': 1}]
+RESULTS = [{'student_answer': "B", 'evaluation': {'score': 1, 'max_score': 1, 'percentage': 100}}]
+
+def test_a_retried_submission_is_recorded_once(monkeypatch):
+    monkeypatch.setattr(submissions, 'ENABLE_COLLUSION_CHECK', True)
+    for _ in range(2):
+        submissions.record_submission("sub-1", "asha", QUESTIONS, RESULTS)
+    assert [entry['submission_id'] for entry in shared_state.load_student_history()] == ["sub-1"]
+    assert len(list_jobs(kind='similarity')) == 1